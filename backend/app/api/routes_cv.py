@@ -4,6 +4,7 @@ from uuid import uuid4
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Body, Depends, Header
 from fastapi.responses import FileResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional
 import os
@@ -13,9 +14,10 @@ import secrets
 
 from app.services.yaml_service import build_yaml
 from app.services.render_service import render_cv
-from app.services.ollama_service import improve_bullets
+from app.services.ollama_service import improve_bullets_many
 from app.services.auth_service import AuthService
 from app.services.gamification_service import GamificationService
+from app.services.pagination_service import InvalidCursor, approx_counts, paginate
 from app.models.database import get_db, CV, User, UserProfile
 
 router = APIRouter(prefix="/cv", tags=["cv"])
@@ -54,6 +56,19 @@ def generate_slug(name: str) -> str:
     return f"{slug}-{suffix}"
 
 
+def improve_sections_highlights(model: str, sections: dict, user_key: str = None) -> dict:
+    """Mejora con IA los highlights de todas las entradas en paralelo"""
+    entries = [
+        entry
+        for entries in sections.values() if isinstance(entries, list)
+        for entry in entries if isinstance(entry, dict) and "highlights" in entry
+    ]
+    improved = improve_bullets_many(model, [entry["highlights"] for entry in entries], user_key=user_key)
+    for entry, highlights in zip(entries, improved):
+        entry["highlights"] = highlights
+    return sections
+
+
 @router.post("")
 def create_cv(
     payload: dict = Body(...),
@@ -66,13 +81,10 @@ def create_cv(
 
         # IA opcional para mejorar highlights
         if payload.get("improve", False) and payload.get("model"):
-            sections = payload.get("sections", {})
-            for section_name, entries in sections.items():
-                if isinstance(entries, list):
-                    for entry in entries:
-                        if isinstance(entry, dict) and "highlights" in entry:
-                            entry["highlights"] = improve_bullets(payload["model"], entry["highlights"])
-            payload["sections"] = sections
+            payload["sections"] = improve_sections_highlights(
+                payload["model"], payload.get("sections", {}),
+                user_key=f"user:{current_user.id}" if current_user else None
+            )
 
         # Construir YAML y renderizar PDF
         yaml_text = build_yaml(payload)
@@ -96,16 +108,14 @@ def create_cv(
             )
             db.add(cv)
 
-            # Actualizar contador de CVs creados
-            profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
-            if profile:
-                profile.cvs_created = (profile.cvs_created or 0) + 1
-
-                # Otorgar puntos por crear CV
-                GamificationService.add_points(
-                    db, current_user.id, 'cv_created',
-                    f"CV creado: {payload.get('name', 'Sin nombre')}"
-                )
+            # Contador de CVs creados y puntos, en la misma transacción que el CV
+            GamificationService.award_many(
+                db, current_user.id,
+                [{'action': 'cv_created', 'description': f"CV creado: {payload.get('name', 'Sin nombre')}"}],
+                counters_delta={'cvs_created': 1},
+                commit=False
+            )
+            approx_counts.invalidate_on_commit(db, f"cvs:user:{current_user.id}")
 
             db.commit()
 
@@ -134,16 +144,27 @@ def create_cv(
 @router.get("/my")
 def get_my_cvs(
     authorization: str = Header(...),
+    limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Obtiene todos los CVs del usuario autenticado"""
+    """Obtiene los CVs del usuario autenticado (paginado por cursor)"""
     try:
         token = authorization.replace("Bearer ", "")
         user = AuthService.get_current_user(db, token)
         if not user:
             raise HTTPException(status_code=401, detail="No autenticado")
 
-        cvs = db.query(CV).filter(CV.user_id == user.id).order_by(CV.created_at.desc()).all()
+        try:
+            cvs, next_cursor = paginate(
+                db.query(CV).filter(CV.user_id == user.id), [CV.created_at, CV.id], limit, cursor
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = approx_counts.count(
+            f"cvs:user:{user.id}",
+            lambda: db.query(func.count(CV.id)).filter(CV.user_id == user.id).scalar()
+        )
 
         return {
             "cvs": [
@@ -161,7 +182,8 @@ def get_my_cvs(
                 }
                 for cv in cvs
             ],
-            "total": len(cvs)
+            "next_cursor": next_cursor,
+            "total": total
         }
     except HTTPException:
         raise
@@ -193,14 +215,14 @@ def publish_cv(
         if cv.is_published and not was_published:
             cv.published_at = datetime.utcnow()
 
-            # Actualizar contador y otorgar puntos
-            profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
-            if profile:
-                profile.cvs_published = (profile.cvs_published or 0) + 1
-                GamificationService.add_points(
-                    db, user.id, 'cv_published',
-                    f"CV publicado: {cv.name}"
-                )
+            # Actualizar contador y otorgar puntos ('top_creator' sale de cvs_published)
+            GamificationService.award_many(
+                db, user.id,
+                [{'action': 'cv_published', 'description': f"CV publicado: {cv.name}"}],
+                counters_delta={'cvs_published': 1},
+                commit=False
+            )
+        approx_counts.invalidate_on_commit(db, "cvs:published")
 
         db.commit()
 
@@ -272,13 +294,9 @@ def update_cv(
 
         # IA opcional para mejorar highlights
         if payload.get("improve", False) and payload.get("model"):
-            sections = payload.get("sections", {})
-            for section_name, entries in sections.items():
-                if isinstance(entries, list):
-                    for entry in entries:
-                        if isinstance(entry, dict) and "highlights" in entry:
-                            entry["highlights"] = improve_bullets(payload["model"], entry["highlights"])
-            payload["sections"] = sections
+            payload["sections"] = improve_sections_highlights(
+                payload["model"], payload.get("sections", {}), user_key=f"user:{user.id}"
+            )
 
         # Construir nuevo YAML y regenerar PDF
         yaml_text = build_yaml(payload)
@@ -339,6 +357,7 @@ def delete_cv(
             raise HTTPException(status_code=404, detail="CV no encontrado")
 
         db.delete(cv)
+        approx_counts.invalidate_on_commit(db, f"cvs:user:{user.id}", "cvs:published", f"comments:{cv_id}")
         db.commit()
 
         return {"message": "CV eliminado", "cv_id": cv_id}
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """Rutas extendidas para CVs - Comunidad, Gamificación y Landing Pages"""
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 from typing import Optional, List
 import yaml
@@ -13,6 +14,8 @@ from app.api.routes_auth import get_current_user
 from app.services.gamification_service import GamificationService
 from app.services.yaml_service import build_yaml
 from app.services.render_service import render_cv
+from app.services.pagination_service import InvalidCursor, approx_counts, paginate
+from app.services.visit_buffer_service import visit_buffer
 
 router = APIRouter(prefix="/community", tags=["community"])
 
@@ -55,10 +58,13 @@ def create_cv(request: CreateCVRequest, current_user: User = Depends(get_current
         )
         db.add(cv)
         
-        GamificationService.add_points(db, current_user.id, 'cv_created', "Creaste un nuevo CV", cv_id)
-        
-        profile = db.query(User).filter_by(id=current_user.id).first().profile
-        profile.cvs_created += 1
+        GamificationService.award_many(
+            db, current_user.id,
+            [{'action': 'cv_created', 'description': "Creaste un nuevo CV", 'related_cv_id': cv_id}],
+            counters_delta={'cvs_created': 1},
+            commit=False
+        )
+        approx_counts.invalidate_on_commit(db, f"cvs:user:{current_user.id}")
         
         db.commit()
         return {"message": "CV creado", "cv": {"id": cv.id, "name": cv.name, "slug": cv.slug}}
@@ -66,24 +72,36 @@ def create_cv(request: CreateCVRequest, current_user: User = Depends(get_current
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Orden de /browse: clave principal + id para desempatar (índices idx_cv_published_*_id)
+BROWSE_SORTS = {
+    "popular": CV.total_likes,
+    "visited": CV.total_visits,
+    "created": CV.created_at,
+}
+
+
 @router.get("/browse")
 def browse_cvs(
-    skip: int = 0,
     limit: int = 20,
     sort_by: str = "created",
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
     db: Session = Depends(get_db)
 ):
-    """Explora CVs públicos de la comunidad"""
-    query = db.query(CV).filter(CV.is_published == True)
+    """
+    Explora CVs públicos de la comunidad (paginado por cursor).
+
+    `skip` (offset) se mantiene para los clientes antiguos; con cursor se ignora.
+    `total` es el número aproximado de CVs publicados, no el de la página.
+    """
+    # El autor viene en el mismo SELECT (JOIN) en lugar de una consulta por CV
+    query = db.query(CV).options(joinedload(CV.user)).filter(CV.is_published == True)
+    sort_key = BROWSE_SORTS.get(sort_by, CV.created_at)
     
-    if sort_by == "popular":
-        query = query.order_by(CV.total_likes.desc())
-    elif sort_by == "visited":
-        query = query.order_by(CV.total_visits.desc())
-    else:
-        query = query.order_by(CV.created_at.desc())
-    
-    cvs = query.offset(skip).limit(limit).all()
+    try:
+        cvs, next_cursor = paginate(query, [sort_key, CV.id], limit, cursor, offset=skip)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     results = []
     for cv in cvs:
@@ -98,12 +116,16 @@ def browse_cvs(
             "created_at": cv.created_at
         })
     
-    return {"cvs": results, "total": len(results)}
+    total = approx_counts.count(
+        "cvs:published",
+        lambda: db.query(func.count(CV.id)).filter(CV.is_published == True).scalar()
+    )
+    return {"cvs": results, "next_cursor": next_cursor, "total": total}
 
 
 @router.get("/public/{slug}")
 def get_public_cv(slug: str, db: Session = Depends(get_db)):
-    cv = db.query(CV).filter_by(slug=slug, is_published=True).first()
+    cv = db.query(CV).options(joinedload(CV.user)).filter_by(slug=slug, is_published=True).first()
     if not cv:
         raise HTTPException(status_code=404, detail="CV no encontrado")
     
@@ -136,7 +158,8 @@ def record_visit_by_slug(
     if not cv:
         raise HTTPException(status_code=404, detail="CV no encontrado")
 
-    GamificationService.record_visit(db, cv.id, visitor_ip)
+    # Se encola y se guarda en el siguiente volcado por lotes
+    visit_buffer.record(cv.id, visitor_ip)
     return {"message": "Visita registrada"}
 
 
@@ -150,7 +173,7 @@ def record_visit(
     if not cv:
         raise HTTPException(status_code=404, detail="CV no encontrado")
 
-    GamificationService.record_visit(db, cv_id, visitor_ip)
+    visit_buffer.record(cv_id, visitor_ip)
     return {"message": "Visita registrada"}
 
 
@@ -174,11 +197,36 @@ def add_comment(
 
 
 @router.get("/{cv_id}/comments")
-def get_comments(cv_id: str, db: Session = Depends(get_db)):
-    comments = db.query(Comment).filter_by(cv_id=cv_id, parent_id=None).order_by(Comment.created_at.desc()).all()
+def get_comments(
+    cv_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    # Respuestas agregadas por comentario padre: una sola consulta con autor y conteo
+    replies = db.query(
+        Comment.parent_id.label("parent_id"),
+        func.count(Comment.id).label("replies_count")
+    ).filter(
+        Comment.cv_id == cv_id,
+        Comment.parent_id.isnot(None)
+    ).group_by(Comment.parent_id).subquery()
+
+    query = db.query(Comment, func.coalesce(replies.c.replies_count, 0)).options(
+        joinedload(Comment.user)
+    ).outerjoin(
+        replies, replies.c.parent_id == Comment.id
+    ).filter(
+        Comment.cv_id == cv_id,
+        Comment.parent_id.is_(None)
+    )
+    try:
+        rows, next_cursor = paginate(query, [Comment.created_at, Comment.id], limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     results = []
-    for comment in comments:
+    for comment, replies_count in rows:
         results.append({
             "id": comment.id,
             "content": comment.content,
@@ -187,7 +235,13 @@ def get_comments(cv_id: str, db: Session = Depends(get_db)):
                 "avatar_url": comment.user.avatar_url
             },
             "created_at": comment.created_at,
-            "replies_count": len(comment.replies) if hasattr(comment, 'replies') else 0
+            "replies_count": replies_count
         })
     
-    return {"comments": results}
+    total = approx_counts.count(
+        f"comments:{cv_id}",
+        lambda: db.query(func.count(Comment.id)).filter(
+            Comment.cv_id == cv_id, Comment.parent_id.is_(None)
+        ).scalar()
+    )
+    return {"comments": results, "next_cursor": next_cursor, "total": total}
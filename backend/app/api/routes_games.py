@@ -12,6 +12,7 @@ from app.services.game_ai_service import get_ollama_move, check_ollama_health
 from app.services.game_training_service import GameTrainingService
 from app.services.game_parameters_service import GameParametersService
 from app.services.game_algorithms_service import GameAlgorithmService
+from app.services.response_cache_service import cached_json, response_cache
 
 router = APIRouter(prefix="/games", tags=["games"])
 
@@ -134,6 +135,7 @@ async def get_game_leaderboard(
 
     - Incluye solo usuarios registrados
     - Ordenado por score descendente
+    - Respuesta cacheada unos segundos (RESPONSE_CACHE_TTL)
     """
     # Verificar que el game_id es válido
     games_list = GamificationService.get_games_list()
@@ -142,22 +144,27 @@ async def get_game_leaderboard(
     if game_id not in valid_game_ids:
         raise HTTPException(status_code=400, detail=f"Juego inválido: {game_id}")
 
-    leaderboard = GamificationService.get_game_leaderboard(
-        db=db,
-        game_id=game_id,
-        limit=min(limit, 100)
-    )
+    def render():
+        leaderboard = GamificationService.get_game_leaderboard(
+            db=db,
+            game_id=game_id,
+            limit=min(limit, 100)
+        )
 
-    # Buscar info del juego
-    game_info = next((g for g in games_list if g['id'] == game_id), None)
+        # Buscar info del juego
+        game_info = next((g for g in games_list if g['id'] == game_id), None)
 
-    return {
-        "game_id": game_id,
-        "game_name": game_info['name'] if game_info else game_id,
-        "game_icon": game_info['icon'] if game_info else '?',
-        "leaderboard": leaderboard,
-        "total": len(leaderboard)
-    }
+        return {
+            "game_id": game_id,
+            "game_name": game_info['name'] if game_info else game_id,
+            "game_icon": game_info['icon'] if game_info else '?',
+            "leaderboard": leaderboard,
+            "total": len(leaderboard)
+        }
+
+    # Se invalida al registrar una partida de este juego (record_game_session)
+    body, hit = response_cache.get_or_render(f"games:{game_id}", str(min(limit, 100)), render)
+    return cached_json(body, hit)
 
 
 @router.get("/my-scores")
@@ -170,33 +177,7 @@ async def get_my_game_scores(
 
     Requiere autenticación.
     """
-    from app.models.database import GameSession, User
-
-    user_id = current_user['user_id']
-
-    # Obtener juegos disponibles
-    games_list = GamificationService.get_games_list()
-
-    # Para cada juego, obtener la mejor puntuación del usuario
-    my_scores = []
-    for game in games_list:
-        best_session = db.query(GameSession).filter(
-            GameSession.user_id == user_id,
-            GameSession.game_id == game['id']
-        ).order_by(GameSession.score.desc()).first()
-
-        if best_session:
-            my_scores.append({
-                'game_id': game['id'],
-                'game_name': game['name'],
-                'game_icon': game['icon'],
-                'best_score': best_session.score,
-                'won': best_session.won,
-                'moves': best_session.moves,
-                'time_seconds': best_session.time_seconds,
-                'points_earned': best_session.points_earned,
-                'played_at': best_session.created_at.isoformat()
-            })
+    my_scores = GamificationService.get_user_best_scores(db, current_user['user_id'])
 
     return {
         "scores": my_scores,
@@ -1,20 +1,57 @@
 # -*- coding: utf-8 -*-
 """Rutas de Gamificación - Leaderboard, Stats, Badges"""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from typing import Optional
 
 from app.models.database import get_db, User
 from app.api.routes_auth import get_current_user
 from app.services.gamification_service import GamificationService
+from app.services.leaderboard_service import LEADERBOARD_CACHE, leaderboard as points_leaderboard
+from app.services.pagination_service import InvalidCursor
+from app.services.response_cache_service import cached_json, response_cache
 
 router = APIRouter(prefix="/gamification", tags=["gamification"])
 
+MAX_RANK_RADIUS = 25
+
 
 @router.get("/leaderboard")
-def get_leaderboard(limit: int = 100, db: Session = Depends(get_db)):
-    """Obtiene el ranking de usuarios por puntos"""
-    leaderboard = GamificationService.get_leaderboard(db, limit)
-    return {"leaderboard": leaderboard}
+def get_leaderboard(limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """Obtiene el ranking de usuarios por puntos (paginado por cursor, cacheado)"""
+    def render():
+        try:
+            leaderboard, next_cursor = GamificationService.get_leaderboard_page(db, limit, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Total exacto y sin COUNT: es el tamaño del ranking en memoria
+        return {"leaderboard": leaderboard, "next_cursor": next_cursor, "total": len(points_leaderboard.board)}
+
+    body, hit = response_cache.get_or_render(LEADERBOARD_CACHE, f"{limit}:{cursor or ''}", render)
+    return cached_json(body, hit)
+
+
+@router.get("/leaderboard/me")
+def get_my_rank(
+    radius: int = 5,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Puesto del usuario actual y los usuarios que tiene cerca"""
+    return _rank_or_404(db, current_user.id, radius)
+
+
+@router.get("/leaderboard/rank/{user_id}")
+def get_user_rank(user_id: str, radius: int = 5, db: Session = Depends(get_db)):
+    """Puesto de un usuario y los usuarios que tiene cerca"""
+    return _rank_or_404(db, user_id, radius)
+
+
+def _rank_or_404(db: Session, user_id: str, radius: int) -> dict:
+    rank = GamificationService.get_user_rank(db, user_id, max(0, min(radius, MAX_RANK_RADIUS)))
+    if rank is None:
+        raise HTTPException(status_code=404, detail="El usuario no está en el ranking")
+    return rank
 
 
 @router.get("/stats/me")
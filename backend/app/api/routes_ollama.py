@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
 """Rutas para verificar y usar Ollama"""
-from fastapi import APIRouter
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from app.services.ollama_service import list_models, generate_text, improve_bullets
+from app.services.model_registry_service import registry
+from app.services.model_warmup_service import warmup_manager
+from app.services.circuit_breaker_service import breaker, CircuitOpenError, CLOSED
+from app.services.llm_scheduler_service import scheduler, SchedulerBusyError
+from app.services.llm_telemetry_service import telemetry
+from app.services.bullet_cache_service import bullet_cache
+from app.services.cv_prompt_service import prompt_savings
+from app.services.model_router_service import router as model_router
+from app.services.review_job_service import review_jobs, DONE, ERROR
+from app.services.auth_service import AuthService
 
 router = APIRouter(prefix="/ollama", tags=["ollama"])
 
@@ -16,14 +28,81 @@ class ReviewCVRequest(BaseModel):
     cv_data: dict
     model: Optional[str] = None
 
+def _unavailable(error: Exception) -> HTTPException:
+    """503 inmediato cuando el circuito está abierto o la cola de IA está llena"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def client_key(http_request: Request) -> str:
+    """Identifica al solicitante para repartir los cupos de IA: usuario del token o IP"""
+    authorization = http_request.headers.get("authorization", "")
+    if authorization.startswith("Bearer "):
+        payload = AuthService.decode_token(authorization[7:])
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    forwarded = http_request.headers.get("x-forwarded-for")
+    if forwarded:
+        return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{http_request.client.host if http_request.client else 'unknown'}"
+
 @router.get("/models")
 def get_models():
     """Obtiene la lista de modelos disponibles en Ollama"""
     models = list_models()
+    details = registry.get_models()
+    circuit = breaker.get_status()
+    if not models:
+        status = "disconnected"
+    elif circuit["state"] != CLOSED:
+        status = "degraded"
+    else:
+        status = "connected"
     return {
-        "status": "connected" if models else "disconnected",
+        "status": status,
         "models": models,
-        "count": len(models)
+        "count": len(models),
+        "details": [details[name] for name in models if name in details],
+        "cache": registry.get_status(),
+        "circuit": circuit
+    }
+
+@router.get("/metrics")
+def get_metrics():
+    """Tokens/s, latencias y reparto de tiempo (prompt/carga) por modelo y tarea"""
+    return {
+        "metrics": telemetry.get_summary(),
+        "bullet_cache": bullet_cache.get_stats(),
+        "review_jobs": review_jobs.get_stats(),
+        "cv_prompt": prompt_savings.get_stats(),
+        "persisted_to": telemetry.path or None,
+        "dropped_telemetry_lines": telemetry.dropped_lines
+    }
+
+@router.get("/route")
+def get_route(task: str, budget: Optional[float] = None):
+    """Modelo que se usaría para una tarea (improve_bullets, review_cv, game_analysis) y por qué"""
+    return model_router.route(task, budget)
+
+@router.get("/scheduler")
+def get_scheduler_status():
+    """Generaciones en curso y en cola por clase de prioridad"""
+    return scheduler.get_status()
+
+@router.get("/warmup")
+def get_warmup_status():
+    """Estado de precarga, keep_alive y latencias en frío/caliente por modelo"""
+    return warmup_manager.get_status()
+
+@router.post("/warmup")
+def trigger_warmup():
+    """Precarga ahora los modelos configurados, fijados y más usados"""
+    results = warmup_manager.warmup_all()
+    return {
+        "status": "success" if results and all(results.values()) else "partial",
+        "models": results
     }
 
 @router.post("/test")
@@ -36,29 +115,77 @@ def test_ollama():
     }
 
 @router.post("/improve-bullets")
-def improve_bullets_endpoint(request: ImproveBulletsRequest):
+def improve_bullets_endpoint(request: ImproveBulletsRequest, http_request: Request):
     """Mejora bullets de experiencia"""
     try:
-        improved = improve_bullets(model=request.model, bullets=request.bullets, instruction=request.instruction)
+        improved = improve_bullets(
+            model=request.model,
+            bullets=request.bullets,
+            instruction=request.instruction,
+            user_key=client_key(http_request)
+        )
         return {
             "status": "success",
             "original": request.bullets,
             "improved": improved
         }
+    except (CircuitOpenError, SchedulerBusyError) as e:
+        raise _unavailable(e)
     except Exception as e:
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=f"Error procesando con IA: {str(e)}")
 
 @router.post("/review-cv")
-def review_cv_endpoint(request: ReviewCVRequest):
+def review_cv_endpoint(request: ReviewCVRequest, http_request: Request):
     """Realiza una revisión integral del CV"""
     try:
         from app.services.ollama_service import review_cv
-        review = review_cv(model=request.model, cv_data=request.cv_data)
+        review = review_cv(model=request.model, cv_data=request.cv_data, user_key=client_key(http_request))
         return {
             "status": "success",
             "review": review
         }
+    except (CircuitOpenError, SchedulerBusyError) as e:
+        raise _unavailable(e)
     except Exception as e:
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=f"Error en la revisión integral: {str(e)}")
+
+@router.post("/review-cv/jobs", status_code=202)
+def submit_review_job(request: ReviewCVRequest, http_request: Request):
+    """Encola una revisión integral y devuelve el id del trabajo al instante"""
+    try:
+        job = review_jobs.submit(request.model, request.cv_data, user_key=client_key(http_request))
+    except SchedulerBusyError as e:
+        raise _unavailable(e)
+    return job.to_dict()
+
+@router.get("/review-cv/jobs/{job_id}")
+def get_review_job(job_id: str, wait: float = 0):
+    """Estado y resultado de un trabajo de revisión (wait: segundos de long-polling, máx. 30)"""
+    job = review_jobs.wait(job_id, min(max(wait, 0), 30)) if wait else review_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+    return job.to_dict()
+
+@router.get("/review-cv/jobs/{job_id}/events")
+def stream_review_job(job_id: str):
+    """Server-Sent Events: envía el estado del trabajo hasta que termina"""
+    if review_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+
+    def events():
+        last_status = None
+        while True:
+            job = review_jobs.wait(job_id, 15)
+            if job is None:
+                yield "event: error\ndata: {\"detail\": \"Trabajo expirado\"}\n\n"
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield f"data: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if job.status in (DONE, ERROR):
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
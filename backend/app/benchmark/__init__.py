@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Herramientas de benchmark y pruebas de carga de la IA (sin Ollama real)"""
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Benchmark de escrituras concurrentes contra la base de datos.
+
+Reproduce la escritura de una visita (insertar una Visit y sumar
+total_visits al CV con el UPDATE atómico de counter_service, un commit por
+visita) desde varios hilos y compara los perfiles de app.models.db:
+commits/s, latencia p50/p95/p99 por commit, errores (p.ej. "database is
+locked") e incrementos de total_visits perdidos (deben ser 0).
+
+Uso:
+    python -m app.benchmark.db_writes --threads 8 --ops 200 --profiles basic,tuned
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, User, CV, Visit
+from app.models.db import create_db_engine, describe_engine
+from app.services import counter_service as counters
+from app.services.llm_telemetry_service import percentile
+
+
+def _seed(Session) -> str:
+    db = Session()
+    try:
+        user = User(id=str(uuid.uuid4()), username="bench", email="bench@pixelcv.local", hashed_password="x")
+        cv = CV(id=str(uuid.uuid4()), user_id=user.id, name="Bench", slug=f"bench-{uuid.uuid4().hex[:8]}",
+                yaml_content="cv: {}", is_published=True)
+        db.add_all([user, cv])
+        db.commit()
+        return cv.id
+    finally:
+        db.close()
+
+
+def run_write_benchmark(url: str, profile: str, threads: int = 8, ops: int = 200) -> dict:
+    """Lanza `threads` hilos que hacen `ops` commits cada uno"""
+    engine = create_db_engine(url, profile=profile, pool_size=threads, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    cv_id = _seed(Session)
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(n: int):
+        db = Session()
+        barrier.wait()
+        try:
+            for i in range(ops):
+                start = time.perf_counter()
+                try:
+                    counters.increment(db, CV, cv_id, total_visits=1)
+                    db.add(Visit(cv_id=cv_id, visitor_ip=f"10.0.{n}.{i % 250}"))
+                    db.commit()
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                except Exception as e:
+                    db.rollback()
+                    with lock:
+                        errors.append(str(e).splitlines()[0])
+                finally:
+                    db.expire_all()
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - started
+
+    with Session() as db:
+        total_visits = db.get(CV, cv_id).total_visits or 0
+    settings = describe_engine(engine)
+    engine.dispose()
+    return {
+        "profile": profile,
+        "settings": settings,
+        "threads": threads,
+        "commits": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "lost_increments": len(latencies) - total_visits,
+        "commits_per_second": round(len(latencies) / wall, 1) if wall else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de escrituras concurrentes (visitas)")
+    parser.add_argument("--url", default="", help="URL de la BD; por defecto un SQLite temporal por perfil")
+    parser.add_argument("--profiles", default="basic,tuned")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles.split(","):
+            url = args.url or f"sqlite:///{os.path.join(tmp, f'bench_{profile}.db')}"
+            result = run_write_benchmark(url, profile, args.threads, args.ops)
+            results.append(result)
+            print(f"[DBBench] {profile:<6} {result['commits_per_second']} commits/s · "
+                  f"p50 {result['p50_ms']}ms · p95 {result['p95_ms']}ms · p99 {result['p99_ms']}ms · "
+                  f"errores {result['errors']} · perdidos {result['lost_increments']} · {result['settings']}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""Servidor HTTP que imita la API de Ollama para pruebas de carga y CI.
+
+Implementa /api/chat, /api/generate y /api/tags (con y sin streaming) sin
+modelos reales: la latencia se simula a partir de los tokens del prompt y de
+la respuesta, con velocidad, carga en frío, jitter y tasa de fallos
+configurables. Las respuestas son deterministas (semilla fija):
+- Con `format` (JSON schema) se devuelve un objeto que cumple el schema; si
+  pide "bullets" se reescriben los textos recibidos en el mensaje.
+- Sin `format` se devuelve una plantilla Markdown con la estructura del
+  reporte de revisión, o el texto de `responses` si se configuró.
+
+Uso:
+    python -m app.benchmark.fake_ollama --port 11435 --tokens-per-second 40
+    OLLAMA_BASE_URL=http://127.0.0.1:11435/api uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_MODELS = {
+    "phi3.5:latest": "3.8B",
+    "gemma3:1b": "1B",
+    "qwen3:0.6b": "751.63M",
+}
+
+REVIEW_TEMPLATE = (
+    "### 🌟 Fortalezas\n"
+    "- Experiencia relevante y bien descrita.\n\n"
+    "### 🛠️ Áreas de Mejora\n"
+    "- Agrega métricas [X] y verbos de acción a cada logro.\n\n"
+    "### 📈 Veredicto Profesional\n"
+    "Perfil sólido y contratable con pequeños ajustes."
+)
+
+
+@dataclass
+class FakeOllamaConfig:
+    models: dict = field(default_factory=lambda: dict(DEFAULT_MODELS))
+    tokens_per_second: float = 40.0         # velocidad de generación
+    prompt_tokens_per_second: float = 400.0  # velocidad de evaluación del prompt
+    base_latency: float = 0.05               # segundos fijos por petición
+    load_seconds: float = 0.0                # carga en frío la primera vez que se usa un modelo
+    jitter: float = 0.0                      # variación relativa de la latencia (0.1 = ±10%)
+    failure_rate: float = 0.0                # probabilidad de responder HTTP 500
+    time_scale: float = 1.0                  # multiplica las esperas reales (0 = sin dormir)
+    responses: dict = field(default_factory=dict)  # endpoint ("chat"/"generate") → texto fijo
+    seed: int = 42
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximación habitual: ~4 caracteres por token"""
+    return max(1, len(text) // 4)
+
+
+def schema_instance(schema: dict, bullets: Optional[list] = None):
+    """Objeto mínimo que cumple un JSON schema sencillo"""
+    kind = schema.get("type")
+    if kind == "object":
+        props = schema.get("properties", {})
+        obj = {}
+        for name in schema.get("required", list(props)):
+            if name == "bullets" and bullets is not None:
+                obj[name] = [f"Lideré y optimicé: {b} con impacto medible [X]%" for b in bullets]
+            elif name in props:
+                obj[name] = schema_instance(props[name])
+        return obj
+    if kind == "array":
+        count = schema.get("minItems", 1)
+        return [schema_instance(schema.get("items", {"type": "string"})) for _ in range(count)]
+    if kind in ("number", "integer"):
+        return 0
+    if kind == "boolean":
+        return False
+    return "texto"
+
+
+class FakeOllama:
+    """Lógica del falso Ollama, independiente del transporte HTTP"""
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None):
+        self.config = config or FakeOllamaConfig()
+        self._random = random.Random(self.config.seed)
+        self._loaded: set[str] = set()
+        self._lock = threading.Lock()
+        self.requests = {"chat": 0, "generate": 0, "tags": 0, "failed": 0}
+
+    def tags(self) -> dict:
+        with self._lock:
+            self.requests["tags"] += 1
+        return {"models": [
+            {
+                "name": name,
+                "model": name,
+                "size": int(float(size.rstrip("BM")) * (1e9 if size.endswith("B") else 1e6) * 0.6),
+                "details": {"family": name.split(":")[0], "parameter_size": size, "quantization_level": "Q4_K_M"},
+            }
+            for name, size in self.config.models.items()
+        ]}
+
+    def _output(self, endpoint: str, payload: dict, prompt: str) -> str:
+        if endpoint in self.config.responses:
+            return self.config.responses[endpoint]
+        schema = payload.get("format")
+        if isinstance(schema, dict):
+            bullets = [line[2:].strip() for line in prompt.splitlines() if line.startswith("- ")]
+            return json.dumps(schema_instance(schema, bullets), ensure_ascii=False)
+        if schema == "json":
+            return "{}"
+        return REVIEW_TEMPLATE
+
+    def generate(self, endpoint: str, payload: dict) -> tuple[int, dict, float]:
+        """Devuelve (status HTTP, cuerpo final, segundos simulados)"""
+        model = payload.get("model", "")
+        with self._lock:
+            self.requests[endpoint] += 1
+            # Un modelo inexistente no se carga: no debe contar como caliente después
+            if model not in self.config.models:
+                return 404, {"error": f"model '{model}' not found"}, 0.0
+            fail = self._random.random() < self.config.failure_rate
+            jitter = 1 + self._random.uniform(-self.config.jitter, self.config.jitter)
+            cold = model not in self._loaded
+            self._loaded.add(model)
+        if fail:
+            with self._lock:
+                self.requests["failed"] += 1
+            return 500, {"error": "simulated failure"}, self.config.base_latency
+
+        if endpoint == "chat":
+            prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+        else:
+            prompt = (payload.get("system") or "") + payload.get("prompt", "")
+        output = self._output(endpoint, payload, prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        eval_tokens = estimate_tokens(output)
+        load = self.config.load_seconds if cold else 0.0
+        prompt_eval = prompt_tokens / self.config.prompt_tokens_per_second * jitter
+        evaluation = eval_tokens / self.config.tokens_per_second * jitter
+        total = self.config.base_latency + load + prompt_eval + evaluation
+
+        body = {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int(total * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int(evaluation * 1e9),
+        }
+        if endpoint == "chat":
+            body["message"] = {"role": "assistant", "content": output}
+        else:
+            body["response"] = output
+        return 200, body, total
+
+
+def _make_handler(fake: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/api/tags":
+                self._send_json(200, fake.tags())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+            if endpoint not in ("chat", "generate"):
+                self._send_json(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "invalid JSON"})
+                return
+
+            status, body, seconds = fake.generate(endpoint, payload)
+            scale = fake.config.time_scale
+            if status != 200 or not payload.get("stream", True):
+                time.sleep(seconds * scale)
+                self._send_json(status, body)
+                return
+
+            # Streaming NDJSON: un fragmento por palabra y un último con las métricas
+            text = body["message"]["content"] if endpoint == "chat" else body["response"]
+            words = text.split(" ")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep((seconds - body["eval_duration"] / 1e9) * scale)
+            step = body["eval_duration"] / 1e9 / len(words) * scale
+            for i, word in enumerate(words):
+                piece = word if i == 0 else " " + word
+                chunk = {"model": body["model"], "created_at": body["created_at"], "done": False}
+                if endpoint == "chat":
+                    chunk["message"] = {"role": "assistant", "content": piece}
+                else:
+                    chunk["response"] = piece
+                self._write_chunk(chunk)
+                time.sleep(step)
+            final = dict(body)
+            if endpoint == "chat":
+                final["message"] = {"role": "assistant", "content": ""}
+            else:
+                final["response"] = ""
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, chunk: dict):
+            data = (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class FakeOllamaServer:
+    """Servidor en un hilo propio; usable como context manager"""
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.fake = FakeOllama(config)
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self.fake))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso de Ollama para benchmarks sin red")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", default=",".join(f"{m}={s}" for m, s in DEFAULT_MODELS.items()),
+                        help="modelo=tamaño separados por comas, p.ej. gemma3:1b=1B")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--base-latency", type=float, default=0.05)
+    parser.add_argument("--load-seconds", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    models = dict(item.split("=", 1) for item in args.models.split(",") if "=" in item)
+    config = FakeOllamaConfig(
+        models=models,
+        tokens_per_second=args.tokens_per_second,
+        prompt_tokens_per_second=args.prompt_tokens_per_second,
+        base_latency=args.base_latency,
+        load_seconds=args.load_seconds,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    server = FakeOllamaServer(config, args.host, args.port)
+    print(f"[FakeOllama] Escuchando en {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
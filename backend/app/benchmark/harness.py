@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""Benchmark reproducible de modelos Ollama para las tareas de PixelCV.
+
+Sustituye a los scripts sueltos de docs/scripts (benchmark_models.py,
+benchmark_review.py, test_consistency.py). Por cada modelo y tarea ejecuta
+unas rondas de calentamiento y N iteraciones con la concurrencia indicada,
+usando los mismos prompts de sistema y JSON schema que producción, y
+reporta latencias p50/p95/p99, tokens/s, éxito de parseo JSON y calidad de
+la revisión. El resultado se guarda como JSON versionado y se compara con
+una línea base (por defecto benchmark_results.json): si alguna métrica
+empeora más allá del umbral el proceso termina con código 1.
+
+Uso:
+    python -m app.benchmark.harness --models gemma3:1b,qwen3:0.6b --iterations 5 --concurrency 2
+    python -m app.benchmark.harness --base-url http://127.0.0.1:11435/api --baseline ../benchmark_results.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from app.services.cv_prompt_service import serialize_cv
+from app.services.llm_telemetry_service import percentile
+from app.services.ollama_service import (
+    BULLETS_SYSTEM_PROMPT,
+    REVIEW_SYSTEM_PROMPT,
+    PROMPT_VERSION,
+    bullets_schema,
+    validate_bullets,
+)
+
+SCHEMA_VERSION = 1
+BULLETS_TASK = "improve-bullets"
+REVIEW_TASK = "review-cv"
+TASKS = (BULLETS_TASK, REVIEW_TASK)
+DEFAULT_BASELINE = Path(__file__).resolve().parents[3] / "benchmark_results.json"
+
+TEST_BULLETS = [
+    "Trabajé en desarrollo web con React",
+    "Hice proyectos de machine learning",
+    "Colaboré con el equipo de desarrollo",
+]
+
+TEST_CV = {
+    "name": "Juan Pérez",
+    "label": "Desarrollador Full Stack",
+    "email": "juan@ejemplo.com",
+    "experience": [
+        {
+            "company": "Tech Corp",
+            "position": "Desarrollador Senior",
+            "highlights": ["Desarrollé aplicaciones web", "Trabajé en equipo"],
+        }
+    ],
+    "education": [
+        {"institution": "Universidad Nacional", "area": "Ingeniería de Sistemas", "studyType": "Pregrado"}
+    ],
+    "skills": ["Python", "JavaScript", "React", "FastAPI"],
+}
+
+
+def build_payload(model: str, task: str) -> dict:
+    """Misma forma de petición que ollama_service para la tarea"""
+    if task == BULLETS_TASK:
+        user_content = (
+            f"Devuelve exactamente {len(TEST_BULLETS)} textos, en el mismo orden.\n"
+            "Textos originales:\n" + "\n".join(f"- {b}" for b in TEST_BULLETS)
+        )
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": BULLETS_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content},
+            ],
+            "stream": False,
+            "format": bullets_schema(len(TEST_BULLETS)),
+            "options": {"temperature": 0.7},
+        }
+    cv_text, _ = serialize_cv(TEST_CV)
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": REVIEW_SYSTEM_PROMPT},
+            {"role": "user", "content": f"--- DATOS DEL CV A ANALIZAR ---\n{cv_text}"},
+        ],
+        "stream": False,
+        "options": {"temperature": 0.4},
+    }
+
+
+def review_quality(content: str) -> int:
+    """Puntuación 0-5 del reporte: tres secciones, español y que no repita el JSON"""
+    lower = content.lower()
+    has_fortalezas = "fortaleza" in lower or "🌟" in content
+    has_mejoras = "mejora" in lower or "🛠️" in content
+    has_veredicto = "veredicto" in lower or "📈" in content or "conclusi" in lower
+    is_spanish = any(f" {word} " in f" {lower} " for word in ("el", "la", "de", "que", "es", "un", "una"))
+    not_json_echo = not content.strip().startswith("{") and "experience" not in content[:200]
+    return sum([has_fortalezas, has_mejoras, has_veredicto, is_spanish, not_json_echo])
+
+
+def run_once(base_url: str, model: str, task: str, timeout: float) -> dict:
+    """Una petición medida: latencia, tokens/s y validez de la salida"""
+    start = time.perf_counter()
+    try:
+        resp = requests.post(f"{base_url}/chat", json=build_payload(model, task), timeout=timeout)
+        latency = time.perf_counter() - start
+        resp.raise_for_status()
+        data = resp.json()
+    except requests.exceptions.Timeout:
+        return {"ok": False, "latency": timeout, "error": "TIMEOUT"}
+    except Exception as e:
+        return {"ok": False, "latency": time.perf_counter() - start, "error": str(e)}
+
+    content = data.get("message", {}).get("content", "")
+    sample = {
+        "ok": True,
+        "latency": latency,
+        "eval_count": data.get("eval_count") or 0,
+        "eval_duration": data.get("eval_duration") or 0,
+        "prompt_eval_duration": data.get("prompt_eval_duration") or 0,
+    }
+    if task == BULLETS_TASK:
+        try:
+            validate_bullets(content, len(TEST_BULLETS))
+            sample["parsed"] = True
+        except ValueError as e:
+            sample["parsed"] = False
+            sample["error"] = f"parse: {e}"
+        sample["quality"] = 5 if sample["parsed"] else 0
+    else:
+        sample["quality"] = review_quality(content)
+        sample["parsed"] = sample["quality"] >= 3
+    return sample
+
+
+def summarize(model: str, task: str, samples: list[dict]) -> dict:
+    latencies = [s["latency"] for s in samples]
+    ok = [s for s in samples if s["ok"]]
+    eval_tokens = sum(s["eval_count"] for s in ok)
+    eval_seconds = sum(s["eval_duration"] for s in ok) / 1e9
+
+    def rounded(value, digits=3):
+        return round(value, digits) if value is not None else None
+
+    return {
+        "model": model,
+        "test": task,
+        "iterations": len(samples),
+        "errors": len(samples) - len(ok),
+        "success_rate": rounded(sum(1 for s in samples if s.get("parsed")) / len(samples)),
+        "p50_seconds": rounded(percentile(latencies, 50)),
+        "p95_seconds": rounded(percentile(latencies, 95)),
+        "p99_seconds": rounded(percentile(latencies, 99)),
+        "mean_seconds": rounded(sum(latencies) / len(latencies)),
+        "tokens_per_second": rounded(eval_tokens / eval_seconds, 2) if eval_seconds else None,
+        "avg_prompt_eval_seconds": rounded(sum(s["prompt_eval_duration"] for s in ok) / 1e9 / len(ok)) if ok else None,
+        "quality_score": rounded(sum(s.get("quality", 0) for s in samples) / len(samples), 2),
+        "last_error": next((s["error"] for s in reversed(samples) if s.get("error")), None),
+    }
+
+
+def run_benchmark(
+    base_url: str,
+    models: list[str],
+    tasks: tuple = TASKS,
+    iterations: int = 5,
+    warmup: int = 1,
+    concurrency: int = 1,
+    timeout: float = 120,
+) -> dict:
+    """Ejecuta el benchmark completo y devuelve el reporte versionado"""
+    results = []
+    for model in models:
+        for task in tasks:
+            print(f"[Benchmark] {model} · {task}: {warmup} calentamiento + {iterations} iteraciones (x{concurrency})")
+            for _ in range(warmup):
+                run_once(base_url, model, task, timeout)
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+                samples = list(executor.map(lambda _: run_once(base_url, model, task, timeout), range(iterations)))
+            results.append(summarize(model, task, samples))
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "base_url": base_url,
+        "prompt_version": PROMPT_VERSION,
+        "config": {"iterations": iterations, "warmup": warmup, "concurrency": concurrency, "timeout": timeout},
+        "results": results,
+    }
+
+
+def load_baseline(path: str) -> dict[tuple, dict]:
+    """
+    Línea base por (modelo, prueba) con p50 y tasa de éxito.
+
+    Acepta tanto los reportes versionados de este módulo como el formato
+    antiguo de benchmark_results.json (lista con time_seconds y success).
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data["results"] if isinstance(data, dict) else data
+    baseline = {}
+    for entry in entries:
+        if "p50_seconds" in entry:
+            baseline[(entry["model"], entry["test"])] = {
+                "p50_seconds": entry["p50_seconds"], "success_rate": entry["success_rate"],
+            }
+        else:
+            baseline[(entry["model"], entry["test"])] = {
+                "p50_seconds": entry.get("time_seconds"), "success_rate": 1.0 if entry.get("success") else 0.0,
+            }
+    return baseline
+
+
+def find_regressions(report: dict, baseline: dict[tuple, dict], threshold: float = 0.2) -> list[str]:
+    """Resultados más lentos o con menos éxito que la línea base más allá del umbral"""
+    regressions = []
+    for result in report["results"]:
+        base = baseline.get((result["model"], result["test"]))
+        if not base:
+            continue
+        label = f"{result['model']} · {result['test']}"
+        if base["p50_seconds"] and result["p50_seconds"] is not None:
+            limit = base["p50_seconds"] * (1 + threshold)
+            if result["p50_seconds"] > limit:
+                regressions.append(
+                    f"{label}: p50 {result['p50_seconds']}s > {limit:.2f}s (base {base['p50_seconds']}s)"
+                )
+        if result["success_rate"] < base["success_rate"] - threshold:
+            regressions.append(
+                f"{label}: éxito {result['success_rate']:.0%} < base {base['success_rate']:.0%}"
+            )
+    return regressions
+
+
+def to_baseline_entries(report: dict) -> list[dict]:
+    """Formato de benchmark_results.json (lo leen el router de modelos y load_baseline)"""
+    return [
+        {
+            **result,
+            "success": result["success_rate"] >= 0.5,
+            "time_seconds": result["p50_seconds"],
+            "schema_version": report["schema_version"],
+            "created_at": report["created_at"],
+        }
+        for result in report["results"]
+    ]
+
+
+def save_report(report: dict, output_dir: str) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = report["created_at"].replace(":", "").replace("-", "")
+    path = os.path.join(output_dir, f"benchmark_v{report['schema_version']}_{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def print_report(report: dict):
+    print(f"\n{'Modelo':<20} {'Prueba':<16} {'Éxito':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'tok/s':>7}")
+    print("-" * 78)
+    for r in report["results"]:
+        def fmt(value):
+            return f"{value:.2f}" if value is not None else "-"
+        print(f"{r['model']:<20} {r['test']:<16} {r['success_rate']:>6.0%} {fmt(r['p50_seconds']):>8} "
+              f"{fmt(r['p95_seconds']):>8} {fmt(r['p99_seconds']):>8} {fmt(r['tokens_per_second']):>7}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de modelos Ollama para PixelCV")
+    parser.add_argument("--base-url", default=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/api"))
+    parser.add_argument("--models", default=os.getenv("OLLAMA_DEFAULT_MODEL", "phi3.5:latest"),
+                        help="modelos separados por comas")
+    parser.add_argument("--tasks", default=",".join(TASKS))
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output-dir", default="benchmarks")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help="archivo con el que comparar ('' para no comparar)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="empeoramiento tolerado (0.2 = 20%%)")
+    parser.add_argument("--write-baseline", default="",
+                        help="guarda los resultados como nueva línea base en este archivo")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.base_url,
+        [m.strip() for m in args.models.split(",") if m.strip()],
+        tuple(t.strip() for t in args.tasks.split(",") if t.strip() in TASKS),
+        iterations=args.iterations,
+        warmup=args.warmup,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+    )
+    print_report(report)
+    print(f"\n[Benchmark] Resultados guardados en {save_report(report, args.output_dir)}")
+
+    exit_code = 0
+    if args.baseline and os.path.exists(args.baseline):
+        regressions = find_regressions(report, load_baseline(args.baseline), args.threshold)
+        for regression in regressions:
+            print(f"❌ Regresión: {regression}")
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"✅ Sin regresiones frente a {args.baseline}")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            json.dump(to_baseline_entries(report), f, indent=2, ensure_ascii=False)
+        print(f"[Benchmark] Nueva línea base en {args.write_baseline}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
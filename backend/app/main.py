@@ -19,7 +19,14 @@ from app.api.routes_cv_community import router as cv_community_router
 from app.api.routes_gamification import router as gamification_router
 from app.api.routes_ollama import router as ollama_router
 from app.api.routes_games import router as games_router
-from app.models.database import init_db
+from app.models.database import init_db, engine
+from app.models.db import describe_engine
+from app.services.model_registry_service import registry
+from app.services.model_warmup_service import warmup_manager
+from app.services.circuit_breaker_service import breaker
+from app.services.visit_buffer_service import visit_buffer
+from app.services.leaderboard_service import leaderboard
+from app.services.response_cache_service import response_cache
 
 app = FastAPI(
     title="PixelCV API",
@@ -35,12 +42,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Configuración efectiva del engine: se lee una vez, /health no consulta la base
+_database_info: dict = {}
+
+
+def database_info() -> dict:
+    """Descripción del engine (cacheada); {"error": ...} si la base no responde"""
+    if not _database_info:
+        try:
+            _database_info.update(describe_engine(engine))
+        except Exception as e:
+            print(f"[Health] No se pudo describir la base de datos: {e}")
+            return {"error": str(e)}
+    return _database_info
+
+
 # Inicializar base de datos al iniciar
 @app.on_event("startup")
 def startup_event():
     """Inicializa la base de datos y crea las tablas"""
     init_db()
     print("✅ Base de datos inicializada")
+    database_info()
+    # Lista de modelos de Ollama en caché, refrescada en segundo plano
+    registry.start_background_refresh()
+    # Precarga de los modelos por defecto (no bloquea el arranque)
+    warmup_manager.start()
+    # Volcado periódico de visitas por lotes
+    visit_buffer.start()
+    # Ranking por puntos en memoria, reconstruido periódicamente desde la base
+    leaderboard.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Vuelca las visitas pendientes antes de salir"""
+    leaderboard.stop()
+    visit_buffer.stop()
+    print(f"✅ Visitas volcadas: {visit_buffer.get_stats()['flushed']}")
 
 # Rutas
 app.include_router(cv_router)
@@ -66,7 +105,15 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    database = database_info()
+    return {
+        "status": "degraded" if "error" in database else "healthy",
+        "database": database,
+        "visits": visit_buffer.get_stats(),
+        "leaderboard": leaderboard.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "ollama": {"circuit": breaker.get_status()}
+    }
 
 # ==================== ENDPOINT TEMPORAL PARA INICIALIZAR DB ====================
 @app.post("/admin/init-db")
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 """Modelos de base de datos SQLite para PixelCV - Sistema de Comunidad y Gamificación"""
-from sqlalchemy import create_engine, Column, String, Integer, Text, Boolean, DateTime, Float, ForeignKey, JSON, Index
+from sqlalchemy import Column, String, Integer, Text, Boolean, DateTime, Float, ForeignKey, JSON, Index, desc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import os
 
+from app.models.db import create_db_engine
+
 DATABASE_URL = os.getenv("PIXELCV_DB_URL", "sqlite:///./pixelcv.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -67,6 +69,11 @@ class UserProfile(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Índice para el leaderboard global
+    __table_args__ = (
+        Index('idx_profile_points_user', 'total_points', 'user_id'),
+    )
+    
     # Relaciones
     user = relationship("User", back_populates="profile")
     points_history = relationship("PointHistory", back_populates="user_profile")
@@ -107,6 +114,14 @@ class CV(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Índices para "mis CVs" y la exploración de CVs publicados (id desempata la paginación)
+    __table_args__ = (
+        Index('idx_cv_user_created_id', 'user_id', 'created_at', 'id'),
+        Index('idx_cv_published_created_id', 'is_published', 'created_at', 'id'),
+        Index('idx_cv_published_likes_id', 'is_published', 'total_likes', 'id'),
+        Index('idx_cv_published_visits_id', 'is_published', 'total_visits', 'id'),
+    )
+    
     # Relaciones
     user = relationship("User", back_populates="cvs")
     comments = relationship("Comment", back_populates="cv")
@@ -129,6 +144,11 @@ class PointHistory(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Índice para el historial de un usuario
+    __table_args__ = (
+        Index('idx_point_history_user_date', 'user_id', 'created_at'),
+    )
+    
     # Relaciones
     user_profile = relationship("UserProfile", back_populates="points_history")
 
@@ -149,6 +169,7 @@ class Visit(Base):
     # Índice para estadísticas rápidas
     __table_args__ = (
         Index('idx_cv_visit_date', 'cv_id', 'created_at'),
+        Index('idx_visit_dedup', 'cv_id', 'visitor_ip', 'created_at'),
     )
     
     # Relaciones
@@ -171,6 +192,11 @@ class Comment(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Índice para los comentarios raíz de un CV ordenados por fecha
+    __table_args__ = (
+        Index('idx_comment_cv_parent_date_id', 'cv_id', 'parent_id', 'created_at', 'id'),
+    )
+    
     # Relaciones
     cv = relationship("CV", back_populates="comments")
     user = relationship("User", back_populates="comments")
@@ -229,6 +255,25 @@ class GameSession(Base):
     training_data = relationship("GameTrainingData", back_populates="session", uselist=False)
 
 
+class UserGameBest(Base):
+    """Mejor puntuación de cada usuario en cada juego (una fila por usuario y juego)"""
+    __tablename__ = "user_game_best"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    game_id = Column(String, primary_key=True)
+    best_score = Column(Integer, nullable=False)
+    session_id = Column(Integer, ForeignKey("game_sessions.id"))  # Partida del récord
+    games_played = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Cuándo se logró el récord
+
+    # Ranking de un juego: mejor puntuación y, a igual puntuación, quien la logró antes
+    __table_args__ = (
+        Index('idx_game_best_rank', 'game_id', desc('best_score'), 'session_id'),
+    )
+
+    session = relationship("GameSession")
+
+
 class GameAIParameters(Base):
     """Parámetros configurables para IA de juegos (sistema offline)"""
     __tablename__ = "game_ai_parameters"
@@ -333,8 +378,10 @@ class AIParameterHistory(Base):
 
 # Función para inicializar la base de datos
 def init_db():
-    """Crea todas las tablas en la base de datos"""
+    """Crea todas las tablas y aplica las migraciones pendientes"""
+    from app.models.migrations import run_migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
 
 # Función para obtener sesión de base de datos
@@ -1 +1,128 @@
-# SQLite se configura desde .env (PIXELCV_DB_URL)
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""Perfil de base de datos: crea el engine ajustado al motor configurado.
+
+SQLite se configura desde .env (PIXELCV_DB_URL). Con el perfil "tuned" (por
+defecto) cada conexión SQLite activa WAL (las lecturas ya no esperan al
+escritor), synchronous=NORMAL (un fsync por checkpoint en lugar de por
+commit), busy_timeout, mmap y una caché de páginas mayor. En PostgreSQL se
+usa un pool dimensionado con pre-ping, reciclado de conexiones y
+statement_timeout. PIXELCV_DB_PROFILE=basic recupera el engine por defecto.
+"""
+import os
+import random
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+PIXELCV_DB_PROFILE = os.getenv("PIXELCV_DB_PROFILE", "tuned")  # tuned | basic
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "10"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "20"))
+PG_POOL_TIMEOUT = int(os.getenv("PG_POOL_TIMEOUT", "30"))
+PG_POOL_RECYCLE = int(os.getenv("PG_POOL_RECYCLE", "1800"))
+PG_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "15000"))
+
+DB_LOCK_RETRIES = int(os.getenv("DB_LOCK_RETRIES", "3"))
+
+# Errores de contención: la transacción se deshizo entera y se puede repetir
+_LOCK_ERRORS = ("database is locked", "deadlock detected", "could not serialize access")
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMAs aplicados a cada conexión SQLite nueva (orden relevante: journal_mode primero)"""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": -SQLITE_CACHE_SIZE_KB,  # negativo = KiB
+        "temp_store": "MEMORY",
+    }
+
+
+def _apply_sqlite_pragmas(engine: Engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: str, profile: Optional[str] = None, **kwargs) -> Engine:
+    """
+    Engine de SQLAlchemy para la URL según el perfil (tuned/basic).
+
+    Los kwargs del llamador (pool_size, connect_args, ...) tienen prioridad
+    sobre los valores del perfil; connect_args se combina clave a clave.
+    """
+    profile = profile or PIXELCV_DB_PROFILE
+    defaults = {}
+    if url.startswith("sqlite"):
+        defaults["connect_args"] = {"check_same_thread": False}
+        if profile == "tuned":
+            # El driver espera el lock en Python además del busy_timeout de SQLite
+            defaults["connect_args"]["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+    elif url.startswith("postgresql") and profile == "tuned":
+        defaults = {
+            "pool_size": PG_POOL_SIZE,
+            "max_overflow": PG_MAX_OVERFLOW,
+            "pool_timeout": PG_POOL_TIMEOUT,
+            "pool_recycle": PG_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": {"options": f"-c statement_timeout={PG_STATEMENT_TIMEOUT_MS}"},
+        }
+    options = {**defaults, **kwargs}
+    if "connect_args" in defaults and "connect_args" in kwargs:
+        options["connect_args"] = {**defaults["connect_args"], **kwargs["connect_args"]}
+
+    engine = create_engine(url, **options)
+    if url.startswith("sqlite") and profile == "tuned":
+        _apply_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+def describe_engine(engine: Engine) -> dict:
+    """Configuración efectiva (para /health y el benchmark de escrituras)"""
+    info = {"dialect": engine.dialect.name, "pool": type(engine.pool).__name__}
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in ("journal_mode", "synchronous", "busy_timeout"):
+                info[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    elif hasattr(engine.pool, "size"):
+        info["pool_size"] = engine.pool.size()
+    return info
+
+
+def is_lock_error(error: Exception) -> bool:
+    message = str(getattr(error, "orig", error)).lower()
+    return any(text in message for text in _LOCK_ERRORS)
+
+
+def retry_on_lock(db: Session, transaction: Callable, retries: int = DB_LOCK_RETRIES):
+    """
+    Ejecuta `transaction()` (una transacción completa, con su commit) y la
+    repite si choca con un lock: en SQLite con muchos escritores la espera
+    puede agotar busy_timeout y en PostgreSQL un deadlock aborta a una de las
+    dos. Cada reintento empieza de cero tras el rollback, con una pausa
+    aleatoria creciente para no volver a chocar con el mismo escritor.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return transaction()
+        except OperationalError as e:
+            db.rollback()
+            if attempt == retries or not is_lock_error(e):
+                raise
+            print(f"[DB] Lock ocupado, reintento {attempt + 1}/{retries}: {e.orig}")
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
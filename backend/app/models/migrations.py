@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Migraciones versionadas del esquema.
+
+create_all() solo crea las tablas que faltan: nunca añade índices ni columnas
+a tablas existentes, así que las bases ya desplegadas se quedan sin lo que se
+declare después en los modelos. Cada migración tiene un número de versión y
+una lista de sentencias DDL idempotentes; las aplicadas se registran en la
+tabla schema_migrations y init_db() ejecuta solo las pendientes.
+
+Las migraciones son fijas: para cambiar el esquema se agrega una versión
+nueva al final de MIGRATIONS (y el cambio equivalente en los modelos), nunca
+se edita una ya publicada.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+# Tabla de control en un MetaData propio para que create_all de los modelos no la toque
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+# (versión, nombre, sentencias); CREATE INDEX IF NOT EXISTS funciona en SQLite y PostgreSQL
+MIGRATIONS = [
+    (1, "indices_consultas_frecuentes", [
+        # Los listados paginados por cursor ordenan por (clave, id): el id al
+        # final del índice evita la ordenación en memoria al desempatar
+        # GET /cv/my: CVs de un usuario por fecha
+        "CREATE INDEX IF NOT EXISTS idx_cv_user_created_id ON cvs (user_id, created_at, id)",
+        # GET /cv/browse: publicados ordenados por fecha, likes o visitas
+        "CREATE INDEX IF NOT EXISTS idx_cv_published_created_id ON cvs (is_published, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_cv_published_likes_id ON cvs (is_published, total_likes, id)",
+        "CREATE INDEX IF NOT EXISTS idx_cv_published_visits_id ON cvs (is_published, total_visits, id)",
+        # GET /cv/{id}/comments: comentarios raíz por fecha
+        "CREATE INDEX IF NOT EXISTS idx_comment_cv_parent_date_id ON comments (cv_id, parent_id, created_at, id)",
+        # Historial de puntos de un usuario
+        "CREATE INDEX IF NOT EXISTS idx_point_history_user_date ON point_history (user_id, created_at)",
+        # Leaderboard global
+        "CREATE INDEX IF NOT EXISTS idx_profile_points_user ON user_profiles (total_points, user_id)",
+        # Deduplicación de visitas (misma IP en la última hora)
+        "CREATE INDEX IF NOT EXISTS idx_visit_dedup ON visits (cv_id, visitor_ip, created_at)",
+    ]),
+    (2, "mejor_puntuacion_por_juego", [
+        # Una fila por usuario y juego: ranking de juegos y "mis puntuaciones"
+        # dejan de recorrer todas las partidas
+        "CREATE TABLE IF NOT EXISTS user_game_best ("
+        " user_id VARCHAR NOT NULL REFERENCES users (id),"
+        " game_id VARCHAR NOT NULL,"
+        " best_score INTEGER NOT NULL,"
+        " session_id INTEGER REFERENCES game_sessions (id),"
+        " games_played INTEGER NOT NULL,"
+        " updated_at TIMESTAMP,"
+        " PRIMARY KEY (user_id, game_id))",
+        "CREATE INDEX IF NOT EXISTS idx_game_best_rank ON user_game_best (game_id, best_score DESC, session_id)",
+        # Carga inicial con una sola consulta de ventana: la mejor partida de
+        # cada usuario (a igual puntuación, la primera) y cuántas jugó
+        "INSERT INTO user_game_best (user_id, game_id, best_score, session_id, games_played, updated_at)"
+        " SELECT user_id, game_id, score, id, games_played, created_at FROM ("
+        "  SELECT user_id, game_id, COALESCE(score, 0) AS score, id, created_at,"
+        "   ROW_NUMBER() OVER (PARTITION BY user_id, game_id ORDER BY COALESCE(score, 0) DESC, id) AS position,"
+        "   COUNT(*) OVER (PARTITION BY user_id, game_id) AS games_played"
+        "  FROM game_sessions WHERE user_id IS NOT NULL"
+        " ) AS ranked WHERE position = 1"
+        " ON CONFLICT (user_id, game_id) DO NOTHING",
+    ]),
+]
+
+
+def current_version(engine: Engine) -> int:
+    """Última versión aplicada (0 si la base nunca se migró)"""
+    migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Aplica en orden las migraciones pendientes y devuelve las versiones aplicadas"""
+    applied = []
+    version = current_version(engine)
+    for number, name, statements in MIGRATIONS:
+        if number <= version:
+            continue
+        try:
+            with engine.begin() as conn:
+                for statement in statements:
+                    conn.exec_driver_sql(statement)
+                conn.execute(schema_migrations.insert().values(
+                    version=number, name=name, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Otro worker la registró primero; el DDL es idempotente
+            print(f"[Migrations] Versión {number} ya aplicada por otro proceso")
+            continue
+        print(f"[Migrations] Aplicada versión {number}: {name}")
+        applied.append(number)
+    return applied
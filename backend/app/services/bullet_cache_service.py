@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Caché de sugerencias por bullet individual.
+
+Muchos usuarios envían highlights casi idénticos ("Trabajé en equipo",
+"Desarrollé aplicaciones web"). Cada bullet mejorado se guarda con la clave
+texto normalizado + modelo + instrucción (+ versión de prompt), de modo que
+en la siguiente petición solo se envían al LLM los bullets nuevos y el resto
+se completa desde aquí. LRU acotado con TTL, en memoria del proceso.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+BULLET_CACHE_SIZE = int(os.getenv("BULLET_CACHE_SIZE", "5000"))
+BULLET_CACHE_TTL = int(os.getenv("BULLET_CACHE_TTL", "86400"))  # segundos
+
+_SPACES = re.compile(r"\s+")
+_EDGES = re.compile(r"^[\s\-•*·–—]+|[\s.;:,!]+$")
+
+
+def normalize_bullet(text: str) -> str:
+    """Minúsculas, sin tildes, espacios colapsados y sin viñetas ni puntuación final"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _SPACES.sub(" ", text.lower())
+    return _EDGES.sub("", text)
+
+
+class BulletCache:
+    """LRU de bullet normalizado → bullet mejorado"""
+
+    def __init__(self, max_size: int = BULLET_CACHE_SIZE, ttl: float = BULLET_CACHE_TTL):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(bullet: str, model: str, instruction: Optional[str], version: Optional[str] = None) -> str:
+        instruction = normalize_bullet(instruction) if instruction else ""
+        raw = "\x1f".join([model or "", instruction, version or "", normalize_bullet(bullet)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, improved: str):
+        with self._lock:
+            self._entries[key] = (improved, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+bullet_cache = BulletCache()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Circuit breaker para el cliente de Ollama.
+
+Tras varios fallos o timeouts consecutivos el circuito se abre y las
+peticiones fallan al instante (sin esperar OLLAMA_TIMEOUT). Pasado el tiempo
+de recuperación se deja pasar una petición de prueba (half-open): si tiene
+éxito el circuito se cierra, si falla vuelve a abrirse.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+OLLAMA_BREAKER_RESET = int(os.getenv("OLLAMA_BREAKER_RESET", "30"))  # segundos en estado abierto
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: Ollama se considera caído temporalmente"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, int(round(retry_after)))
+        super().__init__(
+            f"Servicio de IA no disponible temporalmente. Reintenta en {self.retry_after}s."
+        )
+
+
+class CircuitBreaker:
+    """Circuit breaker con estados closed → open → half_open"""
+
+    def __init__(self, failure_threshold: int = OLLAMA_BREAKER_FAILURES, reset_timeout: float = OLLAMA_BREAKER_RESET):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._last_error: Optional[str] = None
+        self._total_rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Lanza CircuitOpenError si la petición no debe llegar a Ollama"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self._state == OPEN and elapsed >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                # Esta petición es la prueba; el resto sigue fallando rápido
+                self._probe_in_flight = True
+                return
+            self._total_rejected += 1
+            raise CircuitOpenError(self.reset_timeout - elapsed if self._state == OPEN else self.reset_timeout)
+
+    def release_probe(self):
+        """Libera la prueba half-open si la petición no llegó a enviarse"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print("[Ollama] Circuito cerrado: el servicio de IA respondió de nuevo")
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error else None
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    print(f"[Ollama] Circuito abierto tras {self._failures} fallos: {self._last_error}")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def get_status(self) -> dict:
+        state = self.state
+        with self._lock:
+            retry_after = None
+            if state == OPEN:
+                retry_after = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "retry_after_seconds": retry_after,
+                "rejected_requests": self._total_rejected,
+                "last_error": self._last_error,
+            }
+
+
+breaker = CircuitBreaker()
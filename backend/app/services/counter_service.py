@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Contadores desnormalizados actualizados de forma atómica en la base.
+
+`cv.total_likes += 1` en Python lee la fila, suma en el proceso y escribe el
+valor absoluto: cuesta un SELECT extra, alarga el tiempo con la fila tomada
+y, con dos peticiones a la vez, una de las dos sumas se pierde. Aquí cada
+cambio es un único `UPDATE ... SET col = col + :delta` (con RETURNING cuando
+el motor lo soporta: SQLite >= 3.35 y PostgreSQL), de modo que la base
+serializa los incrementos y devuelve los valores nuevos en el mismo viaje.
+
+Las instancias ya cargadas en la sesión se sincronizan con los valores
+devueltos, así que el código que después lee `cv.total_likes` ve el valor
+real.
+"""
+from typing import Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database import CV, UserProfile
+from app.services.leaderboard_service import leaderboard
+
+# Columnas que solo se modifican con esta API
+COUNTERS = {
+    CV: {"total_visits", "total_likes", "total_comments", "share_count"},
+    UserProfile: {
+        "total_points", "experience", "cvs_created", "cvs_published", "total_visits_received",
+        "total_likes_given", "total_likes_received", "total_comments",
+    },
+}
+
+
+def _supports_returning(db: Session) -> bool:
+    return bool(getattr(db.get_bind().dialect, "update_returning", False))
+
+
+def increment(
+    db: Session,
+    model,
+    ident: str,
+    floor: Optional[int] = None,
+    returning: tuple = (),
+    where=None,
+    **deltas: int,
+) -> Optional[dict]:
+    """
+    Suma `deltas` a los contadores de la fila `ident` de `model` (CV o UserProfile).
+
+    Con `floor` ningún contador baja de ese valor (p.ej. 0 al quitar un like).
+    Con `where` la fila solo se actualiza si además cumple esa condición,
+    evaluada por la base en el mismo UPDATE.
+    Devuelve los valores nuevos de los contadores (y de las columnas de
+    `returning`), o None si la fila no existe o no cumple `where`.
+    """
+    allowed = COUNTERS.get(model, set())
+    unknown = set(deltas) - allowed
+    if unknown:
+        raise ValueError(f"{model.__name__} no tiene contadores {sorted(unknown)}")
+    if not deltas:
+        raise ValueError("increment() necesita al menos un contador")
+
+    values = {}
+    for name, delta in deltas.items():
+        column = getattr(model, name)
+        new_value = func.coalesce(column, 0) + delta
+        if floor is not None:
+            new_value = case((new_value < floor, floor), else_=new_value)
+        values[name] = new_value
+
+    pk = model.__mapper__.primary_key[0]
+    columns = [getattr(model, name) for name in (*deltas, *returning)]
+    statement = update(model).where(pk == ident).values(**values)
+    if where is not None:
+        statement = statement.where(where)
+
+    if _supports_returning(db):
+        row = db.execute(
+            statement.returning(*columns),
+            execution_options={"synchronize_session": "fetch"},
+        ).first()
+    else:
+        result = db.execute(statement, execution_options={"synchronize_session": "fetch"})
+        row = db.execute(select(*columns).where(pk == ident)).first() if result.rowcount else None
+    if row is None:
+        return None
+    values = dict(row._mapping)
+    if model is UserProfile and "total_points" in values:
+        # El ranking en memoria recibe el total nuevo cuando la sesión confirma
+        leaderboard.track(db, ident, values["total_points"])
+    return values
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Serialización compacta del CV para el prompt de revisión.
+
+json.dumps(cv, indent=2) mete en el prompt sangrías, llaves, campos vacíos y
+claves que solo usa el frontend (tema, ids, rutas), y en hosts sin GPU el
+prompt_eval de todo eso se nota. Aquí el CV se aplana a texto plano denso:
+se descartan campos vacíos e irrelevantes, los datos de contacto se reducen
+a qué canales hay y, si el resultado supera el presupuesto de tokens, se
+recortan primero las secciones menos importantes (idiomas, certificados,
+proyectos, educación...) elemento a elemento.
+"""
+import json
+import os
+import threading
+from typing import Optional
+
+CV_PROMPT_TOKEN_BUDGET = int(os.getenv("CV_PROMPT_TOKEN_BUDGET", "1200"))
+
+# Claves que no aportan nada a la revisión
+IGNORED_KEYS = {
+    "theme", "design", "model", "id", "user_id", "slug", "photo", "image", "avatar_url",
+    "pdf_path", "png_path", "html_path", "created_at", "updated_at", "is_published",
+}
+CONTACT_KEYS = {
+    "email": "email", "phone": "teléfono", "linkedin": "LinkedIn", "website": "web",
+    "url": "web", "github": "GitHub",
+}
+HEADER_KEYS = {"name": "Nombre", "label": "Título", "headline": "Título", "location": "Ubicación"}
+
+# Sección → (título, importancia); cuanto mayor la importancia, antes se recorta
+SECTIONS = {
+    "summary": ("RESUMEN", 1), "resumen": ("RESUMEN", 1),
+    "experience": ("EXPERIENCIA", 2), "experiencia": ("EXPERIENCIA", 2), "work": ("EXPERIENCIA", 2),
+    "skills": ("HABILIDADES", 3), "habilidades": ("HABILIDADES", 3),
+    "education": ("EDUCACIÓN", 4), "educacion": ("EDUCACIÓN", 4), "educación": ("EDUCACIÓN", 4),
+    "projects": ("PROYECTOS", 5), "proyectos": ("PROYECTOS", 5),
+    "certifications": ("CERTIFICACIONES", 6), "certificaciones": ("CERTIFICACIONES", 6),
+    "languages": ("IDIOMAS", 7), "idiomas": ("IDIOMAS", 7),
+}
+OTHER_IMPORTANCE = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximación habitual de ~4 caracteres por token"""
+    return (len(text) + 3) // 4
+
+
+def _clean(value) -> str:
+    return " ".join(str(value).split()) if value not in (None, "") else ""
+
+
+def _highlights(value) -> list[str]:
+    """Logros como lista: acepta lista o texto con un logro por línea"""
+    if isinstance(value, str):
+        value = value.splitlines()
+    if not isinstance(value, list):
+        return []
+    return [_clean(h).lstrip("-•* ").strip() for h in value if _clean(h)]
+
+
+def _dates(entry: dict) -> str:
+    if entry.get("dates"):
+        return _clean(entry["dates"])
+    start, end = _clean(entry.get("start_date") or entry.get("startDate")), _clean(entry.get("end_date") or entry.get("endDate"))
+    return f"{start}-{end or 'actual'}" if start else ""
+
+
+def _entry_line(entry) -> str:
+    """Una línea por elemento de sección: 'Cargo @ Empresa (fechas, lugar): logro; logro'"""
+    if not isinstance(entry, dict):
+        return _clean(entry)
+    title = _clean(entry.get("position") or entry.get("degree") or entry.get("studyType") or entry.get("name") or entry.get("title"))
+    area = _clean(entry.get("area"))
+    if area:
+        title = f"{title}, {area}" if title else area
+    place = _clean(entry.get("company") or entry.get("institution") or entry.get("issuer"))
+    line = f"{title} @ {place}" if title and place else title or place
+    details = ", ".join(d for d in (_dates(entry), _clean(entry.get("location"))) if d)
+    if details:
+        line += f" ({details})"
+    highlights = _highlights(entry.get("highlights") or entry.get("summary") or entry.get("description"))
+    if highlights:
+        line += ": " + "; ".join(highlights)
+    return line.strip()
+
+
+def _section_lines(value) -> list[str]:
+    if isinstance(value, list):
+        if all(not isinstance(v, (dict, list)) for v in value):
+            joined = ", ".join(_clean(v) for v in value if _clean(v))
+            return [joined] if joined else []
+        return [f"- {line}" for line in (_entry_line(v) for v in value) if line]
+    if isinstance(value, dict):
+        return [f"- {k}: {_clean(v)}" for k, v in value.items() if _clean(v)]
+    text = _clean(value)
+    return [text] if text else []
+
+
+def _render(header: list[str], sections: list[dict]) -> str:
+    parts = list(header)
+    for section in sections:
+        if not section["lines"]:
+            continue
+        if len(section["lines"]) == 1 and not section["lines"][0].startswith("- "):
+            parts.append(f"{section['title']}: {section['lines'][0]}")
+        else:
+            parts.append(f"{section['title']}:")
+            parts.extend(section["lines"])
+    return "\n".join(parts)
+
+
+def serialize_cv(cv_data: Optional[dict], budget: int = CV_PROMPT_TOKEN_BUDGET) -> tuple[str, dict]:
+    """
+    Convierte el CV en texto compacto dentro del presupuesto de tokens.
+
+    Devuelve (texto, reporte) con los tokens estimados del JSON original y
+    del texto compacto, el ahorro y las secciones recortadas.
+    """
+    original = estimate_tokens(json.dumps(cv_data or {}, indent=2, ensure_ascii=False, default=str))
+    cv_data = dict(cv_data or {})
+    nested = cv_data.pop("sections", None)
+    if isinstance(nested, dict):
+        for key, value in nested.items():
+            cv_data.setdefault(key, value)
+
+    header, sections, contacts = [], {}, []
+    header_fields = []
+    for key, value in cv_data.items():
+        lowered = key.lower()
+        if lowered in IGNORED_KEYS or value in (None, "", [], {}):
+            continue
+        if lowered in CONTACT_KEYS:
+            if CONTACT_KEYS[lowered] not in contacts:
+                contacts.append(CONTACT_KEYS[lowered])
+        elif lowered in HEADER_KEYS:
+            header_fields.append(f"{HEADER_KEYS[lowered]}: {_clean(value)}")
+        else:
+            title, importance = SECTIONS.get(lowered, (lowered.replace("_", " ").upper(), OTHER_IMPORTANCE))
+            section = sections.setdefault(title, {"title": title, "importance": importance, "lines": []})
+            section["lines"].extend(_section_lines(value))
+    if header_fields:
+        header.append(" | ".join(header_fields))
+    if contacts:
+        header.append("Contacto: " + ", ".join(contacts))
+
+    ordered = sorted(sections.values(), key=lambda s: s["importance"])
+    text = _render(header, ordered)
+    truncated = []
+    # Recorta elemento a elemento empezando por la sección menos importante
+    while estimate_tokens(text) > budget:
+        candidates = [s for s in ordered if s["lines"]]
+        if not candidates:
+            break
+        section = candidates[-1]
+        section["lines"].pop()
+        if section["title"] not in truncated:
+            truncated.append(section["title"])
+        text = _render(header, ordered)
+
+    compact = estimate_tokens(text)
+    report = {
+        "original_tokens": original,
+        "compact_tokens": compact,
+        "saved_tokens": max(0, original - compact),
+        "savings_ratio": round(1 - compact / original, 4) if original else 0.0,
+        "budget_tokens": budget,
+        "truncated_sections": truncated,
+    }
+    return text, report
+
+
+class PromptSavings:
+    """Ahorro acumulado de tokens de prompt (se muestra en /ollama/metrics)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.original_tokens = 0
+        self.compact_tokens = 0
+        self.truncated = 0
+
+    def record(self, report: dict):
+        with self._lock:
+            self.requests += 1
+            self.original_tokens += report["original_tokens"]
+            self.compact_tokens += report["compact_tokens"]
+            self.truncated += 1 if report["truncated_sections"] else 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            saved = self.original_tokens - self.compact_tokens
+            return {
+                "requests": self.requests,
+                "original_tokens": self.original_tokens,
+                "compact_tokens": self.compact_tokens,
+                "saved_tokens": saved,
+                "savings_ratio": round(saved / self.original_tokens, 4) if self.original_tokens else None,
+                "truncated_requests": self.truncated,
+            }
+
+
+prompt_savings = PromptSavings()
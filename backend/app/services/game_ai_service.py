@@ -20,6 +20,8 @@ import os
 import requests
 import random
 
+from app.services.model_registry_service import registry
+
 OLLAMA_BASE = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/api")
 # Modelos rápidos para juegos (en orden de preferencia según disponibilidad en el VPS)
 # Modelos reales disponibles: qwen3:0.6b, qwen3:1.7b, gemma3:1b, granite3.3:2b
@@ -73,10 +75,7 @@ def get_ollama_move(game_type: str, game_state: dict) -> dict:
 def _get_available_models() -> list[str]:
     """Retorna la lista de modelos disponibles, filtrados por los modelos rápidos."""
     try:
-        resp = requests.get(f"{OLLAMA_BASE}/tags", timeout=3)
-        resp.raise_for_status()
-        data = resp.json()
-        installed = [m["name"] for m in data.get("models", [])]
+        installed = registry.list_names()
 
         # Retornar modelos rápidos que estén instalados
         for fast_model in FAST_MODELS:
@@ -238,12 +237,8 @@ def _get_spaceinvaders_move(game_state: dict, model: str) -> dict:
 
 
 def check_ollama_health() -> bool:
-    """Verifica si Ollama está disponible y responde."""
-    try:
-        resp = requests.get(f"{OLLAMA_BASE}/tags", timeout=2)
-        return resp.status_code == 200
-    except:
-        return False
+    """Verifica si Ollama está disponible según la última consulta del registro de modelos."""
+    return registry.is_available()
 
 
 def warmup_model() -> bool:
@@ -18,11 +18,24 @@ import requests
 from app.models.database import GameTrainingData, GameSession, User
 from app.services.game_parameters_service import GameParametersService
 from app.services.ollama_service import generate_text
+from app.services.llm_scheduler_service import TRAINING
 
 
 OLLAMA_BASE = "http://localhost:11434/api"
 OLLAMA_TIMEOUT = 120  # 2 minutos para análisis offline (sin restricción de 5s)
 
+# JSON schema para el parámetro `format` de Ollama en el análisis de partidas
+INSIGHTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "player_patterns": {"type": "array", "items": {"type": "string"}},
+        "ai_weaknesses": {"type": "array", "items": {"type": "string"}},
+        "suggested_adjustments": {"type": "object"},
+        "reasoning": {"type": "string"},
+    },
+    "required": ["player_patterns", "ai_weaknesses", "suggested_adjustments", "reasoning"],
+}
+
 
 class GameTrainingService:
     """Servicio de entrenamiento offline de IA usando Ollama"""
@@ -118,10 +131,16 @@ class GameTrainingService:
 
         try:
             # Llamar a Ollama sin restricciones de tiempo
+            # Las peticiones idénticas en vuelo comparten una sola generación;
+            # la prioridad de entrenamiento cede el paso a las interactivas
             insights_text = generate_text(
                 prompt,
                 model=model,
-                max_tokens=500
+                options={"num_predict": 500},
+                priority=TRAINING,
+                user_key="training",
+                task="game_analysis",
+                response_format=INSIGHTS_SCHEMA
             )
 
             # Parsear respuesta
@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
 """Servicio de Gamificación - Sistema de puntos, niveles y badges"""
+from sqlalchemy import case, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from app.models.database import User, UserProfile, CV, PointHistory, Visit, Comment, Like, GameSession
+from app.models.database import User, UserProfile, CV, PointHistory, Comment, Like, GameSession, UserGameBest
 from app.models.database import LEVEL_THRESHOLDS, POINT_VALUES, BADGES
-from datetime import datetime, timedelta
-from typing import Optional, List
+from app.models.db import retry_on_lock
+from app.services.pagination_service import approx_counts, decode_cursor, encode_cursor, page_size
+from app.services import counter_service as counters
+from app.services.leaderboard_service import leaderboard
+from app.services.response_cache_service import response_cache
+from datetime import datetime
+from uuid import uuid4
+from typing import Optional, List, Tuple
 
 
 class GamificationService:
@@ -19,43 +27,116 @@ class GamificationService:
         related_cv_id: str = None
     ) -> UserProfile:
         """
-        Agrega puntos a un usuario y actualiza su perfil
+        Agrega puntos a un usuario y actualiza su perfil (una sola acción, con commit)
         """
-        points = POINT_VALUES.get(action, 0)
-        if points == 0:
-            return db.query(UserProfile).filter_by(user_id=user_id).first()
+        return GamificationService.award_many(db, user_id, [{
+            'action': action,
+            'description': description,
+            'related_cv_id': related_cv_id,
+        }])
+    
+    @staticmethod
+    def award_many(
+        db: Session,
+        user_id: str,
+        awards: List[dict],
+        badges: tuple = (),
+        counters_delta: Optional[dict] = None,
+        commit: bool = True
+    ) -> Optional[UserProfile]:
+        """
+        Otorga varias acciones de puntos a un usuario en una sola unidad de trabajo.
         
-        profile = db.query(UserProfile).filter_by(user_id=user_id).first()
-        if not profile:
-            profile = UserProfile(user_id=user_id)
-            db.add(profile)
+        awards: [{'action', 'description', 'related_cv_id'?}]; los puntos salen de POINT_VALUES.
+        badges: badges a otorgar además de los que correspondan por contadores.
+        counters_delta: contadores del perfil a sumar en el mismo UPDATE (p.ej. total_comments).
+        
+        Un UPDATE atómico con puntos y contadores (crea el perfil si no existe),
+        un INSERT masivo del historial, nivel/rango/badges calculados una vez
+        y, con commit=True, un único commit. Con commit=False el llamador
+        confirma la transacción junto con el resto de la petición.
+        """
+        rows = []
+        for award in awards:
+            points = POINT_VALUES.get(award['action'], 0)
+            if points == 0:
+                continue
+            rows.append({
+                'user_id': user_id,
+                'user_profile_id': user_id,
+                'points': points,
+                'action': award['action'],
+                'description': award.get('description') or f"Puntos por {award['action']}",
+                'related_cv_id': award.get('related_cv_id'),
+                'created_at': datetime.utcnow(),
+            })
+        total = sum(row['points'] for row in rows)
+        
+        deltas = dict(counters_delta or {})
+        if total:
+            deltas['total_points'] = deltas.get('total_points', 0) + total
+            deltas['experience'] = deltas.get('experience', 0) + total
+        if deltas and counters.increment(db, UserProfile, user_id, **deltas) is None:
+            # Perfil nuevo con los valores ya sumados
+            db.add(UserProfile(user_id=user_id, **deltas))
             db.flush()
+            leaderboard.track(db, user_id, deltas.get('total_points'))
         
-        history = PointHistory(
-            user_id=user_id,
-            user_profile_id=profile.user_id,
-            points=points,
-            action=action,
-            description=description or f"Puntos por {action}",
-            related_cv_id=related_cv_id
-        )
-        db.add(history)
+        profile = db.get(UserProfile, user_id)
+        if profile is None:
+            return None
+        rows.extend(GamificationService.update_progress(db, profile, badges))
+        if rows:
+            db.execute(PointHistory.__table__.insert(), rows)
         
-        profile.total_points += points
-        profile.experience += points
+        if commit:
+            db.commit()
+            db.refresh(profile)
+        return profile
+    
+    @staticmethod
+    def update_progress(db: Session, profile: UserProfile, badges: tuple = ()) -> List[dict]:
+        """
+        Recalcula badges, nivel y rango del perfil una sola vez, sin commit.
+        
+        Suma los puntos de los badges nuevos con un UPDATE atómico y devuelve
+        sus filas de historial para que el llamador las inserte en bloque.
+        """
+        owned = list(profile.badges or [])
+        candidates = list(badges) + GamificationService.check_badges(profile)
+        new_badges = [b for b in dict.fromkeys(candidates) if b not in owned]
         
-        new_level = GamificationService.calculate_level(profile.experience)
+        bonus = POINT_VALUES['badge_earned']
+        experience = (profile.experience or 0) + bonus * len(new_badges)
+        new_level = GamificationService.calculate_level(experience)
+        if new_level == 5 and 'legend' not in owned and 'legend' not in new_badges:
+            new_badges.append('legend')
         if new_level != profile.level:
             profile.level = new_level
             profile.rank_title = GamificationService.get_rank_title(new_level)
-            if new_level == 5:
-                GamificationService.add_badge(db, profile, 'legend')
         
-        GamificationService.check_badges(db, profile, action)
-        
-        db.commit()
-        db.refresh(profile)
-        return profile
+        if not new_badges:
+            return []
+        # Lista nueva: la columna JSON no detecta cambios in situ
+        profile.badges = owned + new_badges
+        counters.increment(
+            db, UserProfile, profile.user_id,
+            total_points=bonus * len(new_badges),
+            experience=bonus * len(new_badges)
+        )
+        now = datetime.utcnow()
+        return [
+            {
+                'user_id': profile.user_id,
+                'user_profile_id': profile.user_id,
+                'points': bonus,
+                'action': 'badge_earned',
+                'description': f"¡Ganaste el badge: {BADGES[badge_key]['name']}",
+                'related_cv_id': None,
+                'created_at': now,
+            }
+            for badge_key in new_badges
+        ]
     
     @staticmethod
     def calculate_level(experience: int) -> int:
@@ -71,129 +152,77 @@ class GamificationService:
         return titles.get(level, "Novato")
     
     @staticmethod
-    def add_badge(db: Session, profile: UserProfile, badge_key: str) -> bool:
-        if not profile.badges:
-            profile.badges = []
-        
-        if badge_key not in profile.badges:
-            profile.badges.append(badge_key)
-            history = PointHistory(
-                user_id=profile.user_id,
-                user_profile_id=profile.user_id,
-                points=POINT_VALUES['badge_earned'],
-                action='badge_earned',
-                description=f"¡Ganaste el badge: {BADGES[badge_key]['name']}"
-            )
-            db.add(history)
-            profile.total_points += POINT_VALUES['badge_earned']
-            profile.experience += POINT_VALUES['badge_earned']
-            db.commit()
-            return True
-        return False
-    
-    @staticmethod
-    def check_badges(db: Session, profile: UserProfile, action: str):
+    def check_badges(profile: UserProfile) -> List[str]:
+        """Badges que corresponden por los contadores del perfil"""
         badges_to_check = []
-        if profile.cvs_published >= 10:
+        if (profile.cvs_published or 0) >= 10:
             badges_to_check.append('top_creator')
-        if profile.total_comments >= 50:
+        if (profile.total_comments or 0) >= 50:
             badges_to_check.append('social_butterfly')
-        if profile.total_likes_received >= 100:
+        if (profile.total_likes_received or 0) >= 100:
             badges_to_check.append('popular')
-        
-        for badge_key in badges_to_check:
-            GamificationService.add_badge(db, profile, badge_key)
+        return badges_to_check
     
     @staticmethod
-    def record_visit(
-        db: Session,
-        cv_id: str,
-        visitor_ip: str,
-        visitor_user_agent: str = None,
-        visitor_id: str = None,
-        referrer: str = None
-    ) -> tuple:
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        recent_visit = db.query(Visit).filter(
-            Visit.cv_id == cv_id,
-            Visit.visitor_ip == visitor_ip,
-            Visit.created_at >= one_hour_ago
-        ).first()
-        
-        if recent_visit:
-            cv = db.query(CV).filter_by(id=cv_id).first()
-            return cv, None
-        
-        visit = Visit(
-            cv_id=cv_id,
-            visitor_id=visitor_id,
-            visitor_ip=visitor_ip,
-            visitor_user_agent=visitor_user_agent,
-            referrer=referrer
-        )
-        db.add(visit)
-        
-        cv = db.query(CV).filter_by(id=cv_id).first()
-        if cv:
-            cv.total_visits += 1
-        
-        profile = GamificationService.add_points(
-            db=db,
-            user_id=cv.user_id,
-            action='visit_received',
-            description="Tu CV recibió una visita",
-            related_cv_id=cv_id
-        )
-        
-        if profile:
-            profile.total_visits_received += 1
-            if cv.total_visits >= 1000:
-                GamificationService.add_badge(db, profile, 'viral')
-        
-        db.commit()
-        return cv, profile
+    def toggle_like(db: Session, cv_id: str, user_id: str) -> tuple:
+        """
+        Da o quita un like; devuelve (cv, perfil del dueño) o (None, None) si el CV no existe.
+
+        Quitar un like resta total_likes_given a quien lo dio (simétrico al
+        like) y al dueño le resta el like recibido y sus puntos solo si tenía
+        likes recibidos, como antes.
+        """
+        return retry_on_lock(db, lambda: GamificationService._toggle_like(db, cv_id, user_id))
     
     @staticmethod
-    def toggle_like(db: Session, cv_id: str, user_id: str) -> tuple:
-        cv = db.query(CV).filter_by(id=cv_id).first()
-        if not cv:
-            return None, None
-        
-        existing_like = db.query(Like).filter(
+    def _toggle_like(db: Session, cv_id: str, user_id: str) -> tuple:
+        # Primero se escribe: en SQLite la transacción toma el lock de escritura
+        # desde el inicio y no choca con otra que escribió después de leer
+        removed = db.query(Like).filter(
             Like.cv_id == cv_id,
             Like.user_id == user_id
-        ).first()
+        ).delete(synchronize_session=False)
         
-        if existing_like:
-            db.delete(existing_like)
-            cv.total_likes -= 1
-            owner_profile = db.query(UserProfile).filter_by(user_id=cv.user_id).first()
-            if owner_profile and owner_profile.total_likes_received > 0:
-                owner_profile.total_likes_received -= 1
-                owner_profile.total_points -= POINT_VALUES['like_received']
-                owner_profile.experience -= POINT_VALUES['like_received']
+        cv_counts = counters.increment(
+            db, CV, cv_id, floor=0, returning=("user_id",), total_likes=-1 if removed else 1
+        )
+        if cv_counts is None:
+            db.rollback()
+            return None, None
+        owner_id = cv_counts["user_id"]
+        
+        if removed:
+            counters.increment(db, UserProfile, user_id, floor=0, total_likes_given=-1)
+            # Puntos y contador en un solo UPDATE condicionado: sin like recibido
+            # que restar tampoco se restan puntos
+            counters.increment(
+                db, UserProfile, owner_id,
+                where=UserProfile.total_likes_received > 0,
+                total_likes_received=-1,
+                total_points=-POINT_VALUES['like_received'],
+                experience=-POINT_VALUES['like_received']
+            )
+            owner_profile = db.get(UserProfile, owner_id)
         else:
-            new_like = Like(cv_id=cv_id, user_id=user_id)
-            db.add(new_like)
-            cv.total_likes += 1
-            owner_profile = GamificationService.add_points(
-                db=db,
-                user_id=cv.user_id,
-                action='like_received',
-                description="Tu CV recibió un like",
-                related_cv_id=cv_id
+            db.add(Like(cv_id=cv_id, user_id=user_id))
+            # El badge 'popular' sale de total_likes_received al calcular el progreso
+            owner_profile = GamificationService.award_many(
+                db,
+                owner_id,
+                [{'action': 'like_received', 'description': "Tu CV recibió un like", 'related_cv_id': cv_id}],
+                counters_delta={'total_likes_received': 1},
+                commit=False
             )
-            liker_profile = GamificationService.add_points(
-                db=db,
-                user_id=user_id,
-                action='like_given',
-                description="Diste un like"
+            GamificationService.award_many(
+                db,
+                user_id,
+                [{'action': 'like_given', 'description': "Diste un like"}],
+                counters_delta={'total_likes_given': 1},
+                commit=False
             )
-            if owner_profile and owner_profile.total_likes_received >= 100:
-                GamificationService.add_badge(db, owner_profile, 'popular')
         
         db.commit()
-        return cv, owner_profile if owner_profile else None
+        return db.get(CV, cv_id), owner_profile
     
     @staticmethod
     def add_comment(
@@ -203,39 +232,50 @@ class GamificationService:
         content: str,
         parent_id: str = None
     ) -> tuple:
-        cv = db.query(CV).filter_by(id=cv_id).first()
-        if not cv:
+        """Comenta un CV; devuelve (comentario, perfil del dueño) o (None, None) si el CV no existe"""
+        return retry_on_lock(
+            db, lambda: GamificationService._add_comment(db, cv_id, user_id, content, parent_id)
+        )
+    
+    @staticmethod
+    def _add_comment(
+        db: Session,
+        cv_id: str,
+        user_id: str,
+        content: str,
+        parent_id: str = None
+    ) -> tuple:
+        cv_counts = counters.increment(db, CV, cv_id, returning=("user_id",), total_comments=1)
+        if cv_counts is None:
+            db.rollback()
             return None, None
         
         comment = Comment(
-            id=str(datetime.utcnow().timestamp()),
+            id=uuid4().hex,  # el timestamp chocaba con comentarios simultáneos
             cv_id=cv_id,
             user_id=user_id,
             content=content,
             parent_id=parent_id
         )
         db.add(comment)
-        cv.total_comments += 1
         
-        commenter_profile = GamificationService.add_points(
-            db=db,
-            user_id=user_id,
-            action='comment_posted',
-            description="Comentaste en un CV",
-            related_cv_id=cv_id
+        # 'social_butterfly' sale de total_comments al calcular el progreso
+        GamificationService.award_many(
+            db,
+            user_id,
+            [{'action': 'comment_posted', 'description': "Comentaste en un CV", 'related_cv_id': cv_id}],
+            counters_delta={'total_comments': 1},
+            commit=False
         )
-        commenter_profile.total_comments += 1
-        
-        owner_profile = GamificationService.add_points(
-            db=db,
-            user_id=cv.user_id,
-            action='comment_received',
-            description="Tu CV recibió un comentario",
-            related_cv_id=cv_id
+        owner_profile = GamificationService.award_many(
+            db,
+            cv_counts["user_id"],
+            [{'action': 'comment_received', 'description': "Tu CV recibió un comentario", 'related_cv_id': cv_id}],
+            commit=False
         )
-        
-        if commenter_profile.total_comments >= 50:
-            GamificationService.add_badge(db, commenter_profile, 'social_butterfly')
+        if parent_id is None:
+            # El total de /comments solo cuenta comentarios raíz
+            approx_counts.invalidate_on_commit(db, f"comments:{cv_id}")
         
         db.commit()
         db.refresh(comment)
@@ -243,12 +283,71 @@ class GamificationService:
     
     @staticmethod
     def get_leaderboard(db: Session, limit: int = 100) -> List[dict]:
-        query = db.query(User, UserProfile).join(UserProfile).filter(
-            UserProfile.total_points > 0
-        ).order_by(UserProfile.total_points.desc()).limit(limit)
+        return GamificationService.get_leaderboard_page(db, limit)[0]
+    
+    @staticmethod
+    def get_leaderboard_page(
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Página del ranking por puntos ordenada por (total_points, user_id).
+        Devuelve (resultados, next_cursor); lanza InvalidCursor si el cursor no es válido.
+        
+        El orden sale del ranking en memoria; la base solo carga los datos de
+        los usuarios de la página (una consulta por clave primaria).
+        """
+        board = leaderboard.ensure_built(db)
+        size = page_size(limit)
+        after = decode_cursor(cursor, [UserProfile.total_points, UserProfile.user_id]) if cursor else None
+        entries = board.page(size + 1, after)
+        
+        next_cursor = None
+        if len(entries) > size:
+            entries = entries[:size]
+            user_id, points = entries[-1]
+            next_cursor = encode_cursor([points, user_id])
+        
+        return GamificationService._leaderboard_rows(db, [user_id for user_id, _ in entries]), next_cursor
+    
+    @staticmethod
+    def get_user_rank(db: Session, user_id: str, radius: int = 5) -> Optional[dict]:
+        """
+        Puesto de un usuario y sus vecinos en el ranking (radius puestos antes y después).
+        None si el usuario no tiene puntos.
+        """
+        board = leaderboard.ensure_built(db)
+        around = board.around(user_id, radius)
+        if not around:
+            return None
+        rows = GamificationService._leaderboard_rows(db, [member for _, member, _ in around])
+        ranks = {member: rank for rank, member, _ in around}
+        for row in rows:
+            row['rank'] = ranks[row['user_id']]
+        return {
+            'user_id': user_id,
+            'rank': ranks[user_id],
+            'total_points': board.score(user_id),
+            'total_ranked': len(board),
+            'around': rows
+        }
+    
+    @staticmethod
+    def _leaderboard_rows(db: Session, user_ids: List[str]) -> List[dict]:
+        """Datos públicos de los usuarios, en el orden de user_ids"""
+        if not user_ids:
+            return []
+        rows = db.query(User, UserProfile).join(UserProfile).filter(
+            UserProfile.user_id.in_(user_ids)
+        ).all()
+        by_id = {user.id: (user, profile) for user, profile in rows}
         
         results = []
-        for user, profile in query.all():
+        for user_id in user_ids:
+            if user_id not in by_id:
+                continue
+            user, profile = by_id[user_id]
             results.append({
                 'user_id': user.id,
                 'username': user.username,
@@ -260,7 +359,6 @@ class GamificationService:
                 'cvs_published': profile.cvs_published,
                 'badges': profile.badges or []
             })
-        
         return results
     
     @staticmethod
@@ -318,8 +416,24 @@ class GamificationService:
         """
         Registra una sesión de juego y calcula los puntos ganados.
 
-        Si user_id es None, es un juego de demo (sin puntos).
+        Si user_id es None, es un juego de demo (sin puntos). Si la partida
+        choca con un lock se repite completa, con una GameSession nueva.
         """
+        return retry_on_lock(db, lambda: GamificationService._record_game_session(
+            db, user_id, game_id, score, won, moves, time_seconds, game_data
+        ))
+
+    @staticmethod
+    def _record_game_session(
+        db: Session,
+        user_id: Optional[str],
+        game_id: str,
+        score: int,
+        won: bool,
+        moves: int,
+        time_seconds: int,
+        game_data: Optional[dict]
+    ) -> GameSession:
         # Crear sesión de juego
         session = GameSession(
             user_id=user_id,
@@ -354,56 +468,43 @@ class GamificationService:
             total_points = points + score_points
             session.points_earned = total_points
 
-            # Agregar puntos al usuario
-            GamificationService.add_points(
-                db=db,
-                user_id=user_id,
-                action='game_completed',
-                description=f"Jugaste {game_id} - Score: {score}",
-            )
+            # La partida se escribe primero: necesita id para el récord y así
+            # en SQLite la lectura del récord anterior ya va con el lock tomado
+            db.add(session)
+            db.flush()
+            previous_best = GamificationService._update_best_score(db, session)
+
+            # Todas las acciones de la partida en una sola unidad de trabajo
+            awards = [{
+                'action': 'game_completed',
+                'description': f"Jugaste {game_id} - Score: {score}",
+            }]
 
             # Puntos por victoria/derrota
             if won:
-                GamificationService.add_points(
-                    db=db,
-                    user_id=user_id,
-                    action='game_won',
-                    description=f"Ganaste en {game_id}",
-                )
+                awards.append({'action': 'game_won', 'description': f"Ganaste en {game_id}"})
             else:
-                GamificationService.add_points(
-                    db=db,
-                    user_id=user_id,
-                    action='game_lost',
-                    description=f"Perdiste en {game_id}",
-                )
+                awards.append({'action': 'game_lost', 'description': f"Perdiste en {game_id}"})
 
             # Puntos por rendimiento
             if score_points > 0:
-                GamificationService.add_points(
-                    db=db,
-                    user_id=user_id,
-                    action=f'game_score_{game_id}',
-                    description=f"Rendimiento en {game_id}: +{score_points} puntos",
-                )
+                awards.append({
+                    'action': f'game_score_{game_id}',
+                    'description': f"Rendimiento en {game_id}: +{score_points} puntos",
+                })
 
             # Verificar achievements
-            achievements = GamificationService._check_game_achievements(
-                db=db,
-                user_id=user_id,
+            awards.extend(GamificationService._check_game_achievements(
                 game_id=game_id,
                 score=score,
                 won=won,
                 moves=moves,
-                game_data=game_data or {}
-            )
-            for achievement in achievements:
-                GamificationService.add_points(
-                    db=db,
-                    user_id=user_id,
-                    action=achievement['action'],
-                    description=achievement['description'],
-                )
+                game_data=game_data or {},
+                previous_best=previous_best
+            ))
+            GamificationService.award_many(db, user_id, awards, commit=False)
+            # Las partidas anónimas no aparecen en el ranking del juego
+            response_cache.invalidate_on_commit(db, f"games:{game_id}")
 
         db.add(session)
         db.commit()
@@ -494,27 +595,61 @@ class GamificationService:
         else:
             return 0
 
+    @staticmethod
+    def _update_best_score(db: Session, session: GameSession) -> int:
+        """
+        Actualiza user_game_best con la partida (ya con id) y devuelve el récord anterior (0 si no había).
+
+        Un único INSERT ... ON CONFLICT DO UPDATE: la base serializa las
+        partidas simultáneas del mismo usuario y el récord solo cambia si la
+        puntuación nueva es estrictamente mayor (a igual puntuación se conserva
+        la primera partida).
+        """
+        table = UserGameBest.__table__
+        key = (table.c.user_id == session.user_id) & (table.c.game_id == session.game_id)
+        # FOR UPDATE solo tiene efecto en PostgreSQL (SQLite lo ignora): allí
+        # bloquea la fila del récord hasta el commit. En SQLite no hace falta
+        # porque el INSERT de la partida ya tomó el lock de escritura.
+        previous_best = db.execute(select(table.c.best_score).where(key).with_for_update()).scalar()
+
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        score = session.score or 0
+        statement = insert(table).values(
+            user_id=session.user_id,
+            game_id=session.game_id,
+            best_score=score,
+            session_id=session.id,
+            games_played=1,
+            updated_at=session.created_at or datetime.utcnow()
+        )
+        better = statement.excluded.best_score > table.c.best_score
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.game_id],
+            set_={
+                'games_played': table.c.games_played + 1,
+                'best_score': case((better, statement.excluded.best_score), else_=table.c.best_score),
+                'session_id': case((better, statement.excluded.session_id), else_=table.c.session_id),
+                'updated_at': case((better, statement.excluded.updated_at), else_=table.c.updated_at),
+            }
+        ))
+        return previous_best or 0
+
     @staticmethod
     def _check_game_achievements(
-        db: Session,
-        user_id: str,
         game_id: str,
         score: int,
         won: bool,
         moves: int,
-        game_data: dict
+        game_data: dict,
+        previous_best: int = 0
     ) -> List[dict]:
-        """Verifica achievements desbloqueados en el juego."""
+        """
+        Verifica achievements desbloqueados en el juego.
+        previous_best: mejor puntuación del usuario antes de esta partida.
+        """
         achievements = []
 
-        # Buscar mejor puntuación anterior del usuario en este juego
-        best_score = db.query(GameSession).filter(
-            GameSession.user_id == user_id,
-            GameSession.game_id == game_id
-        ).order_by(GameSession.score.desc()).first()
-
-        previous_best = best_score.score if best_score else 0
-
         if game_id == 'pong':
             # Perfect: ganar sin recibir puntos (game_data['opponent_score'] == 0)
             if won and game_data.get('opponent_score', 1) == 0:
@@ -733,23 +868,51 @@ class GamificationService:
 
         return achievements
 
+    @staticmethod
+    def get_user_best_scores(db: Session, user_id: str) -> List[dict]:
+        """Mejor puntuación del usuario en cada juego (una consulta por clave primaria)"""
+        rows = db.query(UserGameBest, GameSession).join(
+            GameSession, GameSession.id == UserGameBest.session_id
+        ).filter(UserGameBest.user_id == user_id).all()
+        best_by_game = {best.game_id: (best, session) for best, session in rows}
+
+        scores = []
+        for game in GamificationService.get_games_list():
+            if game['id'] not in best_by_game:
+                continue
+            best, session = best_by_game[game['id']]
+            scores.append({
+                'game_id': game['id'],
+                'game_name': game['name'],
+                'game_icon': game['icon'],
+                'best_score': best.best_score,
+                'won': session.won,
+                'moves': session.moves,
+                'time_seconds': session.time_seconds,
+                'points_earned': session.points_earned,
+                'games_played': best.games_played,
+                'played_at': session.created_at.isoformat()
+            })
+        return scores
+
     @staticmethod
     def get_game_leaderboard(db: Session, game_id: str, limit: int = 50) -> List[dict]:
         """
-        Obtiene el ranking de un juego específico.
+        Obtiene el ranking de un juego específico: la mejor partida de cada usuario.
         Solo incluye usuarios registrados (user_id not null).
         """
-        query = db.query(User, UserProfile, GameSession).join(
+        query = db.query(User, UserProfile, UserGameBest, GameSession).select_from(UserGameBest).join(
+            User, User.id == UserGameBest.user_id
+        ).join(
             UserProfile, User.id == UserProfile.user_id
         ).join(
-            GameSession, User.id == GameSession.user_id
+            GameSession, GameSession.id == UserGameBest.session_id
         ).filter(
-            GameSession.game_id == game_id,
-            GameSession.user_id.isnot(None)
-        ).order_by(GameSession.score.desc()).limit(limit)
+            UserGameBest.game_id == game_id
+        ).order_by(UserGameBest.best_score.desc(), UserGameBest.session_id).limit(limit)
 
         results = []
-        for user, profile, session in query.all():
+        for user, profile, best, session in query.all():
             results.append({
                 'user_id': user.id,
                 'username': user.username,
@@ -760,6 +923,7 @@ class GamificationService:
                 'won': session.won,
                 'moves': session.moves,
                 'time_seconds': session.time_seconds,
+                'games_played': best.games_played,
                 'created_at': session.created_at.isoformat()
             })
 
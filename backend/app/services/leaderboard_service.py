@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Ranking por puntos mantenido en memoria de forma incremental.
+
+El leaderboard hacía `ORDER BY total_points DESC LIMIT n` con JOIN en cada
+petición y "¿en qué puesto voy?" solo se podía responder contando toda la
+tabla. Aquí cada ranking es un arreglo ordenado de claves (puntos, user_id)
+más un diccionario user_id -> puntos:
+
+- puesto de un usuario, top-N, vecinos y páginas por cursor: una búsqueda
+  binaria (O(log n)) más el corte pedido,
+- actualizar un usuario: sacar su clave vieja e insertar la nueva (búsqueda
+  O(log n); el desplazamiento del arreglo es un memmove, despreciable para
+  el tamaño de la comunidad).
+
+Consistencia con la base: counter_service anota en la sesión los nuevos
+total_points que devuelve cada UPDATE y aquí se aplican solo cuando esa
+sesión hace commit (un rollback los descarta); en ese momento se invalidan
+también las respuestas cacheadas del leaderboard. Los hooks after_commit de
+dos sesiones pueden ejecutarse en cualquier orden, así que cada total lleva un
+número de secuencia tomado al anotarlo: la base serializa los UPDATE de una
+misma fila (el segundo no devuelve su RETURNING hasta que el primero confirma),
+por lo que la secuencia sigue el orden de los commits y un total más viejo
+que el ya aplicado se descarta. El ranking se construye desde
+la base al arrancar y se reconstruye cada LEADERBOARD_REBUILD_SECONDS para
+recoger los cambios de otros procesos; rebuild() también se puede llamar a
+demanda.
+"""
+import os
+import itertools
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, UserProfile
+from app.services.response_cache_service import response_cache
+
+LEADERBOARD_REBUILD_SECONDS = float(os.getenv("LEADERBOARD_REBUILD_SECONDS", "300"))
+
+_PENDING_KEY = "leaderboard_pending"
+LEADERBOARD_CACHE = "leaderboard"  # espacio de nombres en response_cache
+
+
+class RankedBoard:
+    """Ranking ordenado por (puntuación DESC, miembro DESC); solo puntuaciones > 0"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: list[tuple] = []  # (puntuación, miembro) ascendente
+        self._scores: dict = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+    def load(self, pairs):
+        """Reemplaza el contenido por los pares (miembro, puntuación)"""
+        scores = {member: score for member, score in pairs if score and score > 0}
+        with self._lock:
+            self._scores = scores
+            self._keys = sorted((score, member) for member, score in scores.items())
+
+    def set(self, member, score: Optional[int]):
+        """Actualiza la puntuación; con 0 o menos el miembro sale del ranking"""
+        with self._lock:
+            old = self._scores.pop(member, None)
+            if old is not None:
+                del self._keys[bisect_left(self._keys, (old, member))]
+            if score and score > 0:
+                self._scores[member] = score
+                insort(self._keys, (score, member))
+
+    def score(self, member) -> Optional[int]:
+        with self._lock:
+            return self._scores.get(member)
+
+    def rank(self, member) -> Optional[int]:
+        """Puesto (1 = primero) o None si no está en el ranking"""
+        with self._lock:
+            score = self._scores.get(member)
+            if score is None:
+                return None
+            return len(self._keys) - bisect_left(self._keys, (score, member))
+
+    def page(self, limit: int, after: Optional[tuple] = None) -> list[tuple]:
+        """
+        Hasta `limit` entradas (miembro, puntuación) en orden de ranking,
+        empezando por la primera o justo después de la clave (puntuación, miembro).
+        """
+        with self._lock:
+            end = len(self._keys) if after is None else bisect_left(self._keys, tuple(after))
+            start = max(0, end - limit)
+            return [(member, score) for score, member in reversed(self._keys[start:end])]
+
+    def top(self, n: int, offset: int = 0) -> list[tuple]:
+        with self._lock:
+            end = max(0, len(self._keys) - offset)
+            start = max(0, end - n)
+            return [(member, score) for score, member in reversed(self._keys[start:end])]
+
+    def around(self, member, radius: int = 5) -> list[tuple]:
+        """Entradas (puesto, miembro, puntuación) desde `radius` puestos antes hasta `radius` después"""
+        with self._lock:
+            rank = self.rank(member)
+            if rank is None:
+                return []
+            first = max(1, rank - radius)
+            entries = self.top(rank + radius - first + 1, offset=first - 1)
+            return [(first + i, m, s) for i, (m, s) in enumerate(entries)]
+
+
+class PointsLeaderboard:
+    """Ranking global por total_points, sincronizado con los commits de la base"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        rebuild_seconds: float = LEADERBOARD_REBUILD_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.rebuild_seconds = rebuild_seconds
+        self.board = RankedBoard()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._bind = None
+        self._built_at: Optional[float] = None
+        self._replay: Optional[dict] = None
+        self._sequence = itertools.count()
+        self._versions: dict = {}  # user_id -> secuencia del último total aplicado
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"rebuilds": 0, "updates": 0, "stale_updates": 0, "last_rebuild_ms": None}
+
+    def rebuild(self, db: Optional[Session] = None) -> int:
+        """Reconstruye el ranking desde la base; devuelve cuántos usuarios tiene"""
+        with self._rebuild_lock:
+            own_session = db is None
+            db = db or self.session_factory()
+            start = time.perf_counter()
+            with self._lock:
+                # Los commits que lleguen durante la consulta se reaplican después
+                self._replay = {}
+            try:
+                pairs = db.execute(
+                    select(UserProfile.user_id, UserProfile.total_points)
+                    .where(UserProfile.total_points > 0)
+                ).all()
+                bind = db.get_bind()
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+            finally:
+                if own_session:
+                    db.close()
+            with self._lock:
+                self.board.load(pairs)
+                self._set_newer(self._replay)
+                self._replay = None
+                self._bind = bind
+                self._built_at = time.monotonic()
+                self.stats["rebuilds"] += 1
+                self.stats["last_rebuild_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return len(self.board)
+
+    def ensure_built(self, db: Session) -> RankedBoard:
+        """Ranking listo para la base de `db` (lo construye la primera vez)"""
+        with self._lock:
+            ready = self._built_at is not None and self._bind is db.get_bind()
+        if not ready:
+            self.rebuild(db)
+        return self.board
+
+    def track(self, db: Session, user_id: str, total_points: Optional[int]):
+        """
+        Anota el nuevo total de un usuario; se aplica cuando `db` hace commit.
+
+        Llamar justo después del UPDATE/INSERT que lo produjo, dentro de la
+        transacción: así la secuencia respeta el orden de la base.
+        """
+        with self._lock:
+            sequence = next(self._sequence)
+        db.info.setdefault(_PENDING_KEY, {})[user_id] = (sequence, total_points)
+
+    def _set_newer(self, changes: dict):
+        """Aplica los (secuencia, total) más nuevos que los ya aplicados (con el lock tomado)"""
+        for user_id, (sequence, points) in changes.items():
+            if sequence < self._versions.get(user_id, -1):
+                self.stats["stale_updates"] += 1
+                continue
+            self._versions[user_id] = sequence
+            self.board.set(user_id, points)
+            self.stats["updates"] += 1
+
+    def _apply(self, session: Session):
+        changes = session.info.pop(_PENDING_KEY, None)
+        if not changes:
+            return
+        with self._lock:
+            if self._replay is not None:
+                for user_id, change in changes.items():
+                    if change[0] > self._replay.get(user_id, (-1, None))[0]:
+                        self._replay[user_id] = change
+            if self._built_at is not None and self._bind is session.get_bind():
+                self._set_newer(changes)
+        # Después de actualizar el ranking: una respuesta calculada antes ya no se guarda
+        response_cache.invalidate(LEADERBOARD_CACHE)
+
+    def reset(self):
+        """Vacía el ranking; se reconstruye en la siguiente consulta"""
+        with self._lock:
+            self.board.load([])
+            self._versions.clear()
+            self._bind = None
+            self._built_at = None
+
+    def start(self):
+        """Construye el ranking e inicia la reconstrucción periódica"""
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"[Leaderboard] Error construyendo el ranking: {e}")
+        if self.rebuild_seconds <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.rebuild_seconds):
+                try:
+                    self.rebuild()
+                except Exception as e:
+                    print(f"[Leaderboard] Error reconstruyendo el ranking: {e}")
+
+        self._thread = threading.Thread(target=loop, name="leaderboard-rebuild", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            age = None if self._built_at is None else round(time.monotonic() - self._built_at, 1)
+            return {**self.stats, "users": len(self.board), "age_seconds": age}
+
+
+leaderboard = PointsLeaderboard()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    leaderboard._apply(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
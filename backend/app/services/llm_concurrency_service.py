@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Límites de concurrencia para las llamadas a Ollama.
+
+Acota cuántas generaciones corren a la vez en el host de Ollama, tanto en
+total como por modelo, y permite ejecutar varias llamadas en paralelo
+conservando el orden de los resultados.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("OLLAMA_MAX_CONCURRENCY_PER_MODEL", "2"))
+
+
+class ConcurrencyLimiter:
+    """Semáforo global más un semáforo por modelo"""
+
+    def __init__(self, global_limit: int, per_model_limit: int):
+        self.global_limit = max(1, global_limit)
+        self.per_model_limit = max(1, per_model_limit)
+        self._global = threading.BoundedSemaphore(self.global_limit)
+        self._per_model: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _model_semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._per_model.get(model)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_model_limit)
+                self._per_model[model] = sem
+            return sem
+
+    @contextmanager
+    def slot(self, model: str):
+        """
+        Reserva un cupo del modelo y luego uno global mientras dura la llamada.
+
+        Se toma primero el cupo del modelo para no retener un cupo global
+        mientras se espera a un modelo saturado.
+        """
+        with self._model_semaphore(model or ""):
+            with self._global:
+                yield
+
+
+limiter = ConcurrencyLimiter(OLLAMA_MAX_CONCURRENCY, OLLAMA_MAX_CONCURRENCY_PER_MODEL)
+
+
+def map_concurrently(
+    fn: Callable,
+    items: Iterable,
+    fallback: Callable,
+    max_workers: Optional[int] = None
+) -> list:
+    """
+    Ejecuta fn(item) en paralelo y devuelve los resultados en el mismo orden.
+
+    Si una llamada lanza una excepción se usa fallback(item) en su lugar, de
+    modo que un fallo parcial no invalida el resto de resultados.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if len(items) == 1:
+        try:
+            return [fn(items[0])]
+        except Exception as e:
+            print(f"[Ollama] Error en llamada concurrente: {e}")
+            return [fallback(items[0])]
+
+    workers = max_workers or min(len(items), limiter.global_limit)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, item) for item in items]
+        results = []
+        for item, future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"[Ollama] Error en llamada concurrente: {e}")
+                results.append(fallback(item))
+        return results
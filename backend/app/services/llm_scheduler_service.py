@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Planificador de generaciones LLM con prioridades y control de admisión.
+
+Todas las llamadas a Ollama pasan por aquí antes de llegar al host:
+- Clases de prioridad: interactive > review > training. Cuando se libera
+  un cupo se atiende primero la clase más prioritaria con peticiones en cola.
+- Cada clase tiene su propio máximo de generaciones simultáneas, de modo que
+  un entrenamiento largo nunca ocupa todos los cupos.
+- Si la cola de una clase está llena la petición se rechaza al momento con
+  una estimación de Retry-After.
+- Dentro de una clase los cupos se reparten por turnos entre usuarios, para
+  que nadie acapare el host enviando muchas peticiones seguidas.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Optional
+
+from app.services.llm_concurrency_service import OLLAMA_MAX_CONCURRENCY
+
+INTERACTIVE = "interactive"
+REVIEW = "review"
+TRAINING = "training"
+PRIORITIES = (INTERACTIVE, REVIEW, TRAINING)  # de mayor a menor prioridad
+
+DEFAULT_CLASS_LIMITS = {
+    INTERACTIVE: {
+        "max_concurrent": int(os.getenv("OLLAMA_SLOTS_INTERACTIVE", "3")),
+        "max_queue": int(os.getenv("OLLAMA_QUEUE_INTERACTIVE", "32")),
+    },
+    REVIEW: {
+        "max_concurrent": int(os.getenv("OLLAMA_SLOTS_REVIEW", "2")),
+        "max_queue": int(os.getenv("OLLAMA_QUEUE_REVIEW", "16")),
+    },
+    TRAINING: {
+        "max_concurrent": int(os.getenv("OLLAMA_SLOTS_TRAINING", "1")),
+        "max_queue": int(os.getenv("OLLAMA_QUEUE_TRAINING", "4")),
+    },
+}
+OLLAMA_QUEUE_TIMEOUT = int(os.getenv("OLLAMA_QUEUE_TIMEOUT", "120"))  # segundos máximos en cola
+DEFAULT_SERVICE_TIME = 10.0  # segundos estimados por generación hasta tener mediciones
+
+
+class SchedulerBusyError(Exception):
+    """La cola de la clase está llena o la espera superó el máximo"""
+
+    def __init__(self, priority: str, retry_after: float, reason: str = "cola llena"):
+        self.priority = priority
+        self.retry_after = max(1, int(round(retry_after)))
+        super().__init__(
+            f"Servicio de IA ocupado ({reason}). Reintenta en {self.retry_after}s."
+        )
+
+
+class _Ticket:
+    def __init__(self, priority: str, user_key: str):
+        self.priority = priority
+        self.user_key = user_key
+        self.granted = False
+
+
+class LLMScheduler:
+    """Cola por prioridad con cupos por clase y reparto justo entre usuarios"""
+
+    def __init__(
+        self,
+        max_concurrent: int = OLLAMA_MAX_CONCURRENCY,
+        class_limits: dict = None,
+        queue_timeout: float = OLLAMA_QUEUE_TIMEOUT,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.class_limits = class_limits or DEFAULT_CLASS_LIMITS
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._queues: dict[str, OrderedDict] = {p: OrderedDict() for p in PRIORITIES}
+        self._waiting = {p: 0 for p in PRIORITIES}
+        self._running = {p: 0 for p in PRIORITIES}
+        self._running_by_user: dict[tuple, int] = {}
+        self._service_time = {p: DEFAULT_SERVICE_TIME for p in PRIORITIES}
+        self._completed = {p: 0 for p in PRIORITIES}
+        self._rejected = {p: 0 for p in PRIORITIES}
+
+    # ---------- Selección ----------
+
+    def _pick_ticket(self, priority: str) -> Optional[_Ticket]:
+        """Siguiente ticket de la clase: el usuario con menos generaciones en curso, por turnos"""
+        queue = self._queues[priority]
+        best_user = None
+        best_running = None
+        for user_key in queue:
+            running = self._running_by_user.get((priority, user_key), 0)
+            if best_running is None or running < best_running:
+                best_user, best_running = user_key, running
+        if best_user is None:
+            return None
+        tickets = queue[best_user]
+        ticket = tickets.popleft()
+        if tickets:
+            queue.move_to_end(best_user)
+        else:
+            del queue[best_user]
+        return ticket
+
+    def _dispatch(self):
+        """Concede cupos libres en orden de prioridad (llamar con el lock tomado)"""
+        granted = False
+        while sum(self._running.values()) < self.max_concurrent:
+            for priority in PRIORITIES:
+                if self._waiting[priority] and self._running[priority] < self.class_limits[priority]["max_concurrent"]:
+                    ticket = self._pick_ticket(priority)
+                    ticket.granted = True
+                    self._waiting[priority] -= 1
+                    self._running[priority] += 1
+                    key = (priority, ticket.user_key)
+                    self._running_by_user[key] = self._running_by_user.get(key, 0) + 1
+                    granted = True
+                    break
+            else:
+                break
+        if granted:
+            self._cond.notify_all()
+
+    def _remove(self, ticket: _Ticket):
+        queue = self._queues[ticket.priority]
+        tickets = queue.get(ticket.user_key)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            self._waiting[ticket.priority] -= 1
+            if not tickets:
+                del queue[ticket.user_key]
+
+    def _retry_after(self, priority: str) -> float:
+        slots = max(1, self.class_limits[priority]["max_concurrent"])
+        pending = self._waiting[priority] + self._running[priority]
+        return max(1.0, pending / slots * self._service_time[priority])
+
+    # ---------- API pública ----------
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, user_key: Optional[str] = None):
+        """
+        Espera un cupo para la clase indicada y lo libera al terminar.
+
+        Lanza SchedulerBusyError si la cola está llena o la espera supera
+        queue_timeout.
+        """
+        if priority not in self._queues:
+            priority = INTERACTIVE
+        user_key = user_key or "anonymous"
+        ticket = _Ticket(priority, user_key)
+
+        with self._cond:
+            if self._waiting[priority] >= self.class_limits[priority]["max_queue"]:
+                self._rejected[priority] += 1
+                raise SchedulerBusyError(priority, self._retry_after(priority))
+            self._queues[priority].setdefault(user_key, deque()).append(ticket)
+            self._waiting[priority] += 1
+            self._dispatch()
+            deadline = time.monotonic() + self.queue_timeout
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    self._rejected[priority] += 1
+                    raise SchedulerBusyError(priority, self._retry_after(priority), "tiempo de espera agotado")
+                self._cond.wait(remaining)
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._running[priority] -= 1
+                key = (priority, user_key)
+                self._running_by_user[key] -= 1
+                if not self._running_by_user[key]:
+                    del self._running_by_user[key]
+                # Media móvil del tiempo de servicio para estimar Retry-After
+                self._service_time[priority] = 0.8 * self._service_time[priority] + 0.2 * elapsed
+                self._completed[priority] += 1
+                self._dispatch()
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        with self._cond:
+            if priority:
+                return self._waiting.get(priority, 0)
+            return sum(self._waiting.values())
+
+    def get_status(self) -> dict:
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "classes": {
+                    p: {
+                        "running": self._running[p],
+                        "waiting": self._waiting[p],
+                        "users_waiting": len(self._queues[p]),
+                        "max_concurrent": self.class_limits[p]["max_concurrent"],
+                        "max_queue": self.class_limits[p]["max_queue"],
+                        "avg_service_seconds": round(self._service_time[p], 2),
+                        "completed": self._completed[p],
+                        "rejected": self._rejected[p],
+                    }
+                    for p in PRIORITIES
+                },
+            }
+
+
+scheduler = LLMScheduler()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Coalescencia de peticiones idénticas en vuelo hacia Ollama (single-flight).
+
+Si llegan varias peticiones con el mismo modelo, prompt y opciones mientras
+la primera sigue generando, solo esa llega a Ollama y el resto espera y
+recibe el mismo resultado (o la misma excepción).
+"""
+import hashlib
+import json
+import threading
+from typing import Callable
+
+
+class _Call:
+    """Llamada en curso compartida entre los solicitantes"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+            }
+
+
+def request_key(endpoint: str, payload: dict) -> str:
+    """Clave estable para una petición: endpoint, modelo, prompt/mensajes y opciones"""
+    relevant = {
+        "endpoint": endpoint,
+        "model": payload.get("model"),
+        "messages": payload.get("messages"),
+        "prompt": payload.get("prompt"),
+        "system": payload.get("system"),
+        "options": payload.get("options"),
+        "format": payload.get("format"),
+    }
+    raw = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+singleflight = SingleFlight()
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Telemetría de tokens y latencia de las respuestas de Ollama.
+
+Ollama devuelve en cada respuesta eval_count, eval_duration,
+prompt_eval_count, prompt_eval_duration, load_duration y total_duration
+(duraciones en nanosegundos). Aquí se capturan en cada llamada y se agregan
+por modelo y tarea (improve_bullets, review_cv, game_analysis...) para
+elegir modelos con datos de producción. Si OLLAMA_TELEMETRY_PATH está
+definido, cada llamada se añade además como una línea JSON a ese archivo.
+
+La escritura en disco la hace un hilo propio: record() solo agrega bajo el
+lock y encola la línea, así que las llamadas a Ollama nunca esperan al disco.
+La cola es acotada (OLLAMA_TELEMETRY_QUEUE); si se llena, las líneas se
+descartan y se cuentan en dropped_lines.
+"""
+import json
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+OLLAMA_TELEMETRY_PATH = os.getenv("OLLAMA_TELEMETRY_PATH", "")
+OLLAMA_TELEMETRY_QUEUE = int(os.getenv("OLLAMA_TELEMETRY_QUEUE", "10000"))  # líneas pendientes de escribir
+RECENT_SAMPLES = 200  # latencias recientes guardadas para percentiles
+
+NS = 1e9
+
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Percentil por rango más cercano (pct entre 0 y 100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class _Aggregate:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.eval_count = 0
+        self.eval_duration = 0
+        self.prompt_eval_count = 0
+        self.prompt_eval_duration = 0
+        self.load_duration = 0
+        self.total_duration = 0
+        self.latency_total = 0.0
+        self.latencies = deque(maxlen=RECENT_SAMPLES)
+        self.parses = {"ok": 0, "repaired": 0, "failed": 0}
+
+    def add(self, data: dict, latency: float):
+        self.calls += 1
+        self.eval_count += data.get("eval_count") or 0
+        self.eval_duration += data.get("eval_duration") or 0
+        self.prompt_eval_count += data.get("prompt_eval_count") or 0
+        self.prompt_eval_duration += data.get("prompt_eval_duration") or 0
+        self.load_duration += data.get("load_duration") or 0
+        self.total_duration += data.get("total_duration") or 0
+        self.latency_total += latency
+        self.latencies.append(latency)
+
+    def to_dict(self) -> dict:
+        def ratio(a, b):
+            return round(a / b, 4) if b else None
+
+        latencies = list(self.latencies)
+        parses = sum(self.parses.values())
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": ratio(self.errors, self.calls + self.errors),
+            "eval_tokens": self.eval_count,
+            "prompt_tokens": self.prompt_eval_count,
+            "tokens_per_second": ratio(self.eval_count, self.eval_duration / NS),
+            "prompt_tokens_per_second": ratio(self.prompt_eval_count, self.prompt_eval_duration / NS),
+            "avg_prompt_tokens": ratio(self.prompt_eval_count, self.calls),
+            "avg_prompt_eval_seconds": ratio(self.prompt_eval_duration / NS, self.calls),
+            "prompt_eval_share": ratio(self.prompt_eval_duration, self.total_duration),
+            "load_share": ratio(self.load_duration, self.total_duration),
+            "avg_latency_seconds": ratio(self.latency_total, self.calls),
+            "p50_latency_seconds": percentile(latencies, 50),
+            "p95_latency_seconds": percentile(latencies, 95),
+            "parse_ok": self.parses["ok"],
+            "parse_repaired": self.parses["repaired"],
+            "parse_failed": self.parses["failed"],
+            "parse_failure_rate": ratio(self.parses["failed"], parses),
+            "parse_repair_rate": ratio(self.parses["repaired"], parses),
+        }
+
+
+class LLMTelemetry:
+    """Agregados por (modelo, tarea, versión de prompt)"""
+
+    def __init__(self, path: str = OLLAMA_TELEMETRY_PATH, max_pending: int = OLLAMA_TELEMETRY_QUEUE):
+        self.path = path
+        self._aggregates: dict[tuple, _Aggregate] = {}
+        self._lock = threading.Lock()
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.dropped_lines = 0
+
+    def _aggregate(self, model: str, task: str, prompt_version: Optional[str]) -> _Aggregate:
+        key = (model, task, prompt_version)
+        agg = self._aggregates.get(key)
+        if agg is None:
+            agg = _Aggregate()
+            self._aggregates[key] = agg
+        return agg
+
+    def _persist(self, record: dict):
+        """Encola la línea para el hilo escritor (llamar sin el lock de agregados)"""
+        if not self.path:
+            return
+        self._ensure_writer()
+        try:
+            self._pending.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped_lines += 1
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="llm-telemetry", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            # Todo lo acumulado mientras se escribía va en la misma apertura del archivo
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def _write(self, records: list[dict]):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        except OSError as e:
+            print(f"[Telemetry] No se pudieron guardar {len(records)} métricas: {e}")
+
+    def flush(self):
+        """Espera a que las líneas encoladas estén escritas en el archivo"""
+        if self._writer is not None:
+            self._pending.join()
+
+    def record(self, model: str, task: str, data: dict, latency: float, prompt_version: str = None):
+        """Registra una respuesta correcta de Ollama"""
+        record = {
+            "ts": time.time(),
+            "model": model,
+            "task": task,
+            "prompt_version": prompt_version,
+            "latency": round(latency, 4),
+            "ok": True,
+        }
+        for field in ("eval_count", "eval_duration", "prompt_eval_count",
+                      "prompt_eval_duration", "load_duration", "total_duration"):
+            record[field] = data.get(field)
+        with self._lock:
+            self._aggregate(model, task, prompt_version).add(data, latency)
+        self._persist(record)
+
+    def record_error(self, model: str, task: str, latency: float, error: str = None, prompt_version: str = None):
+        with self._lock:
+            self._aggregate(model, task, prompt_version).errors += 1
+        self._persist({
+            "ts": time.time(),
+            "model": model,
+            "task": task,
+            "prompt_version": prompt_version,
+            "latency": round(latency, 4),
+            "ok": False,
+            "error": error,
+        })
+
+    def record_parse(self, model: str, task: str, status: str, prompt_version: str = None):
+        """Resultado de validar una salida estructurada: ok, repaired o failed"""
+        with self._lock:
+            self._aggregate(model, task, prompt_version).parses[status] += 1
+
+    def get_stats(self, model: str, task: str = None) -> Optional[dict]:
+        """Agregado de un modelo (opcionalmente de una sola tarea)"""
+        with self._lock:
+            merged = _Aggregate()
+            found = False
+            for (m, t, _), agg in self._aggregates.items():
+                if m != model or (task and t != task):
+                    continue
+                found = True
+                merged.calls += agg.calls
+                merged.errors += agg.errors
+                merged.eval_count += agg.eval_count
+                merged.eval_duration += agg.eval_duration
+                merged.prompt_eval_count += agg.prompt_eval_count
+                merged.prompt_eval_duration += agg.prompt_eval_duration
+                merged.load_duration += agg.load_duration
+                merged.total_duration += agg.total_duration
+                merged.latency_total += agg.latency_total
+                merged.latencies.extend(agg.latencies)
+                for status, count in agg.parses.items():
+                    merged.parses[status] += count
+            return merged.to_dict() if found else None
+
+    def get_summary(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"model": model, "task": task, "prompt_version": version, **agg.to_dict()}
+                for (model, task, version), agg in sorted(
+                    self._aggregates.items(), key=lambda item: tuple(str(k) for k in item[0])
+                )
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._aggregates.clear()
+
+
+telemetry = LLMTelemetry()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Registro en caché de los modelos instalados en Ollama.
+
+Evita consultar /api/tags en cada petición: la lista se guarda con un TTL,
+se refresca en segundo plano cuando vence y, si Ollama no responde, se sigue
+sirviendo la última lista conocida. También guarda metadatos por modelo
+(tamaño, cuantización, familia) para decidir a qué modelo enrutar.
+"""
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+import requests
+
+OLLAMA_BASE = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/api")
+OLLAMA_MODELS_TTL = int(os.getenv("OLLAMA_MODELS_TTL", "60"))  # segundos
+OLLAMA_MODELS_RETRY = int(os.getenv("OLLAMA_MODELS_RETRY", "5"))  # segundos tras un fallo
+OLLAMA_TAGS_TIMEOUT = 5
+
+
+def _parse_parameter_size(value: Optional[str]) -> Optional[float]:
+    """Convierte '3.8B' o '270M' en número de parámetros"""
+    if not value:
+        return None
+    match = re.match(r'^\s*([\d.]+)\s*([KMB]?)', str(value).upper())
+    if not match:
+        return None
+    multiplier = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9}[match.group(2)]
+    return float(match.group(1)) * multiplier
+
+
+def _model_metadata(raw: dict) -> dict:
+    """Extrae los metadatos útiles de una entrada de /api/tags"""
+    details = raw.get("details") or {}
+    return {
+        "name": raw.get("name"),
+        "size_bytes": raw.get("size"),
+        "digest": raw.get("digest"),
+        "modified_at": raw.get("modified_at"),
+        "family": details.get("family"),
+        "families": details.get("families") or [],
+        "format": details.get("format"),
+        "parameter_size": details.get("parameter_size"),
+        "parameter_count": _parse_parameter_size(details.get("parameter_size")),
+        "quantization_level": details.get("quantization_level"),
+    }
+
+
+class ModelRegistry:
+    """Caché de modelos instalados con refresco en segundo plano"""
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_BASE,
+        ttl: int = OLLAMA_MODELS_TTL,
+        retry_interval: int = OLLAMA_MODELS_RETRY,
+    ):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._models: dict[str, dict] = {}
+        self._fetched_at: Optional[float] = None
+        self._next_refresh = 0.0
+        self._last_ok: Optional[bool] = None
+        self._last_error: Optional[str] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fetch(self) -> dict[str, dict]:
+        resp = requests.get(f"{self.base_url}/tags", timeout=OLLAMA_TAGS_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+        return {m["name"]: _model_metadata(m) for m in data.get("models", [])}
+
+    def refresh(self) -> bool:
+        """Consulta /api/tags; si falla conserva la lista anterior"""
+        with self._refresh_lock:
+            try:
+                models = self._fetch()
+            except Exception as e:
+                with self._lock:
+                    self._last_ok = False
+                    self._last_error = str(e)
+                    self._next_refresh = time.monotonic() + self.retry_interval
+                print(f"[ModelRegistry] Error listando modelos: {e}")
+                return False
+
+            with self._lock:
+                self._models = models
+                self._fetched_at = time.monotonic()
+                self._next_refresh = self._fetched_at + self.ttl
+                self._last_ok = True
+                self._last_error = None
+            return True
+
+    def _refresh_async(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="model-registry-refresh", daemon=True).start()
+
+    def get_models(self) -> dict[str, dict]:
+        """
+        Devuelve {nombre: metadatos}.
+
+        La primera carga es síncrona; después, si la caché venció se refresca
+        en segundo plano y mientras tanto se sirven los datos anteriores.
+        """
+        with self._lock:
+            has_data = self._fetched_at is not None
+            due = time.monotonic() >= self._next_refresh
+        if due:
+            if has_data:
+                self._refresh_async()
+            else:
+                self.refresh()
+        with self._lock:
+            return dict(self._models)
+
+    def list_names(self) -> list[str]:
+        return list(self.get_models().keys())
+
+    def get_metadata(self, name: str) -> Optional[dict]:
+        return self.get_models().get(name)
+
+    def is_available(self) -> bool:
+        """True si la última consulta a Ollama tuvo éxito"""
+        self.get_models()
+        with self._lock:
+            return bool(self._last_ok)
+
+    def invalidate(self):
+        """Fuerza un refresco en la siguiente consulta"""
+        with self._lock:
+            self._next_refresh = 0.0
+
+    def get_status(self) -> dict:
+        with self._lock:
+            age = time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+            return {
+                "models_count": len(self._models),
+                "age_seconds": round(age, 1) if age is not None else None,
+                "ttl_seconds": self.ttl,
+                "stale": age is None or age > self.ttl or not self._last_ok,
+                "last_refresh_ok": self._last_ok,
+                "last_error": self._last_error,
+            }
+
+    def start_background_refresh(self, interval: Optional[int] = None):
+        """Inicia un hilo que refresca la lista periódicamente"""
+        if self._thread and self._thread.is_alive():
+            return
+        interval = interval or self.ttl
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                self.refresh()
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+
+
+registry = ModelRegistry()
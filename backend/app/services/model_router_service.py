@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Enrutado de modelos por tarea y presupuesto de latencia.
+
+Cuando el cliente no elige modelo, en lugar de usar siempre
+OLLAMA_DEFAULT_MODEL se elige el mejor modelo instalado que cumpla el
+presupuesto de latencia de la tarea:
+- La latencia estimada sale de la telemetría en producción (p50 por modelo y
+  tarea) cuando hay suficientes muestras; si no, de benchmark_results.json
+  (generado con python -m app.benchmark.harness --write-baseline).
+- Al presupuesto se le resta la espera estimada en la cola del planificador,
+  así que con la cola llena se acaba eligiendo un modelo más pequeño.
+- Entre los modelos que caben gana el de mayor calidad (quality_score del
+  benchmark, penalizado por fallos de parseo) y, a igualdad, el más grande.
+  Si ninguno cabe se usa el más rápido.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from app.services.model_registry_service import registry
+from app.services.llm_telemetry_service import telemetry
+from app.services.llm_scheduler_service import scheduler, INTERACTIVE, REVIEW, TRAINING
+
+OLLAMA_MODEL = os.getenv("OLLAMA_DEFAULT_MODEL", "phi3.5:latest")
+OLLAMA_ROUTER_ENABLED = os.getenv("OLLAMA_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+BENCHMARK_RESULTS_PATH = os.getenv(
+    "BENCHMARK_RESULTS_PATH", str(Path(__file__).resolve().parents[3] / "benchmark_results.json")
+)
+ROUTER_MIN_SAMPLES = int(os.getenv("OLLAMA_ROUTER_MIN_SAMPLES", "3"))
+
+# tarea → (prueba de benchmark equivalente, clase de prioridad, presupuesto por defecto en segundos)
+TASKS = {
+    "improve_bullets": ("improve-bullets", INTERACTIVE, float(os.getenv("OLLAMA_BUDGET_BULLETS", "15"))),
+    "review_cv": ("review-cv", REVIEW, float(os.getenv("OLLAMA_BUDGET_REVIEW", "60"))),
+    "game_analysis": ("improve-bullets", TRAINING, float(os.getenv("OLLAMA_BUDGET_GAME_ANALYSIS", "30"))),
+}
+MAX_QUALITY = 5
+
+
+def load_benchmark_priors(path: str = BENCHMARK_RESULTS_PATH) -> dict[tuple, dict]:
+    """Lee benchmark_results.json como {(modelo, prueba): {success, seconds, quality}}"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[Router] Sin resultados de benchmark ({e})")
+        return {}
+    priors = {}
+    for result in results:
+        if not result.get("model") or not result.get("test"):
+            continue
+        success = bool(result.get("success"))
+        quality = result.get("quality_score")
+        if quality is None:
+            quality = MAX_QUALITY if success else 0
+        priors[(result["model"], result["test"])] = {
+            "success": success,
+            "seconds": result.get("time_seconds"),
+            "quality": quality,
+        }
+    return priors
+
+
+class ModelRouter:
+    """Elige modelo para una tarea según latencia estimada, calidad y carga"""
+
+    def __init__(self, priors: Optional[dict] = None, default_model: str = OLLAMA_MODEL):
+        self.priors = load_benchmark_priors() if priors is None else priors
+        self.default_model = default_model
+
+    def _estimate(self, model: str, task: str) -> Optional[dict]:
+        """Latencia y calidad estimadas; None si no hay datos o el modelo no es apto"""
+        test = TASKS[task][0]
+        prior = self.priors.get((model, test))
+        stats = telemetry.get_stats(model, task)
+        if stats and stats["calls"] >= ROUTER_MIN_SAMPLES:
+            quality = prior["quality"] if prior and prior["success"] else MAX_QUALITY
+            failure_rate = max(stats["error_rate"] or 0, stats["parse_failure_rate"] or 0)
+            return {
+                "seconds": stats["p50_latency_seconds"],
+                "quality": quality * (1 - failure_rate),
+                "source": "telemetry",
+            }
+        if prior and prior["success"] and prior["seconds"] is not None:
+            return {"seconds": prior["seconds"], "quality": prior["quality"], "source": "benchmark"}
+        return None
+
+    def _queue_wait(self, priority: str) -> float:
+        """Espera estimada en la cola de la clase: en cola / cupos × tiempo medio de servicio"""
+        status = scheduler.get_status()["classes"][priority]
+        return status["waiting"] / max(1, status["max_concurrent"]) * status["avg_service_seconds"]
+
+    def route(self, task: str, budget: Optional[float] = None) -> dict:
+        """Decisión completa con los candidatos evaluados (para depurar en /ollama/route)"""
+        if task not in TASKS or not OLLAMA_ROUTER_ENABLED:
+            return {"model": self.default_model, "reason": "default", "candidates": []}
+        test, priority, default_budget = TASKS[task]
+        budget = default_budget if budget is None else budget
+        queue_wait = self._queue_wait(priority)
+        available = budget - queue_wait
+
+        candidates = []
+        for model in registry.list_names():
+            estimate = self._estimate(model, task)
+            if estimate is None:
+                continue
+            metadata = registry.get_metadata(model) or {}
+            candidates.append({
+                "model": model,
+                "estimated_seconds": estimate["seconds"],
+                "quality": round(estimate["quality"], 2),
+                "source": estimate["source"],
+                "parameter_count": metadata.get("parameter_count") or 0,
+                "fits": estimate["seconds"] <= available,
+            })
+
+        decision = {"budget_seconds": budget, "queue_wait_seconds": round(queue_wait, 2), "candidates": candidates}
+        fitting = [c for c in candidates if c["fits"]]
+        if fitting:
+            best = max(fitting, key=lambda c: (c["quality"], c["parameter_count"], -c["estimated_seconds"]))
+            return {"model": best["model"], "reason": "within_budget", **decision}
+        if candidates:
+            fastest = min(candidates, key=lambda c: c["estimated_seconds"])
+            return {"model": fastest["model"], "reason": "fastest_over_budget", **decision}
+        return {"model": self.default_model, "reason": "default", **decision}
+
+    def choose_model(self, task: str, budget: Optional[float] = None) -> str:
+        return self.route(task, budget)["model"]
+
+
+router = ModelRouter()
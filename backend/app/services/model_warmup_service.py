@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""Precarga de modelos en Ollama y gestión de keep_alive.
+
+- Al arrancar (y periódicamente) carga en memoria los modelos configurados
+  para que la primera petición tras un periodo inactivo no pague la carga.
+- Asigna keep_alive por modelo según su tráfico reciente; los modelos
+  fijados (pinned) se mantienen en memoria indefinidamente.
+- Distingue latencias de peticiones en frío (con carga de modelo) y en
+  caliente a partir del load_duration que devuelve Ollama.
+
+La precarga pasa por ollama_service._send como cualquier otra llamada
+(circuit breaker, planificador con la prioridad más baja y límite de
+concurrencia), así que nunca ocupa un cupo que el limitador crea libre. Si el
+circuito no está cerrado se salta el ciclo entero.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from app.services.circuit_breaker_service import CLOSED
+from app.services.llm_scheduler_service import TRAINING
+from app.services.model_registry_service import registry
+
+OLLAMA_MODEL = os.getenv("OLLAMA_DEFAULT_MODEL", "phi3.5:latest")
+
+
+def _env_list(name: str, default: str = "") -> list[str]:
+    return [m.strip() for m in os.getenv(name, default).split(",") if m.strip()]
+
+
+OLLAMA_WARMUP_MODELS = _env_list("OLLAMA_WARMUP_MODELS", OLLAMA_MODEL)
+OLLAMA_PINNED_MODELS = _env_list("OLLAMA_PINNED_MODELS")
+OLLAMA_PIN_MOST_USED = os.getenv("OLLAMA_PIN_MOST_USED", "false").lower() == "true"
+OLLAMA_WARMUP_INTERVAL = int(os.getenv("OLLAMA_WARMUP_INTERVAL", "240"))  # segundos
+OLLAMA_KEEP_ALIVE_DEFAULT = os.getenv("OLLAMA_KEEP_ALIVE_DEFAULT", "5m")
+OLLAMA_KEEP_ALIVE_HOT = os.getenv("OLLAMA_KEEP_ALIVE_HOT", "30m")
+OLLAMA_HOT_REQUESTS = int(os.getenv("OLLAMA_HOT_REQUESTS", "10"))  # peticiones por ventana
+TRAFFIC_WINDOW = 15 * 60  # segundos
+COLD_LOAD_THRESHOLD = 0.5  # segundos de load_duration para considerar la petición "en frío"
+WARMUP_TIMEOUT = 120  # 2 minutos para cargar un modelo
+WARMUP_TASK = "warmup"  # tarea en la telemetría; no cuenta como tráfico del modelo
+
+
+class _LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_seconds": round(self.total / self.count, 3) if self.count else None,
+            "max_seconds": round(self.max, 3) if self.count else None,
+        }
+
+
+class ModelWarmupManager:
+    """Mantiene los modelos más usados cargados en la memoria de Ollama"""
+
+    def __init__(
+        self,
+        warmup_models: list[str] = None,
+        pinned_models: list[str] = None,
+        pin_most_used: bool = OLLAMA_PIN_MOST_USED,
+        interval: int = OLLAMA_WARMUP_INTERVAL,
+    ):
+        self.warmup_models = list(warmup_models if warmup_models is not None else OLLAMA_WARMUP_MODELS)
+        self.pinned_models = set(pinned_models if pinned_models is not None else OLLAMA_PINNED_MODELS)
+        self.pin_most_used = pin_most_used
+        self.interval = interval
+        self._requests: dict[str, deque] = {}
+        self._cold: dict[str, _LatencyStats] = {}
+        self._warm: dict[str, _LatencyStats] = {}
+        self._warmed_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- Tráfico y keep_alive ----------
+
+    def _recent_count(self, model: str, now: float) -> int:
+        timestamps = self._requests.get(model)
+        if not timestamps:
+            return 0
+        while timestamps and timestamps[0] < now - TRAFFIC_WINDOW:
+            timestamps.popleft()
+        return len(timestamps)
+
+    def most_used_model(self) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            counts = {m: self._recent_count(m, now) for m in list(self._requests)}
+        counts = {m: c for m, c in counts.items() if c > 0}
+        return max(counts, key=counts.get) if counts else None
+
+    def is_pinned(self, model: str) -> bool:
+        if model in self.pinned_models:
+            return True
+        return self.pin_most_used and model == self.most_used_model()
+
+    def keep_alive_for(self, model: str):
+        """keep_alive a enviar a Ollama para este modelo según su tráfico"""
+        if self.is_pinned(model):
+            return -1
+        with self._lock:
+            recent = self._recent_count(model, time.time())
+        return OLLAMA_KEEP_ALIVE_HOT if recent >= OLLAMA_HOT_REQUESTS else OLLAMA_KEEP_ALIVE_DEFAULT
+
+    def record_request(self, model: str, latency_seconds: float, load_duration_ns: Optional[int] = None):
+        """Registra una petición y la clasifica en frío/caliente según load_duration"""
+        cold = bool(load_duration_ns) and load_duration_ns / 1e9 >= COLD_LOAD_THRESHOLD
+        with self._lock:
+            self._requests.setdefault(model, deque()).append(time.time())
+            stats = self._cold if cold else self._warm
+            stats.setdefault(model, _LatencyStats()).add(latency_seconds)
+
+    # ---------- Precarga ----------
+
+    def warmup(self, model: str) -> bool:
+        """Carga el modelo en memoria (petición sin prompt) con su keep_alive"""
+        # Import diferido: ollama_service importa este módulo
+        from app.services import ollama_service
+
+        try:
+            start = time.time()
+            ollama_service._send(
+                "generate",
+                {"model": model, "prompt": "", "stream": False, "keep_alive": self.keep_alive_for(model)},
+                timeout=WARMUP_TIMEOUT,
+                priority=TRAINING,
+                user_key=WARMUP_TASK,
+                task=WARMUP_TASK,
+            )
+            with self._lock:
+                self._warmed_at[model] = time.time()
+            print(f"[Warmup] Modelo {model} cargado en {time.time() - start:.1f}s")
+            return True
+        except Exception as e:
+            print(f"[Warmup] No se pudo cargar {model}: {e}")
+            return False
+
+    def models_to_warm(self) -> list[str]:
+        """Modelos configurados, fijados y con tráfico alto que estén instalados"""
+        candidates = list(self.warmup_models) + sorted(self.pinned_models)
+        now = time.time()
+        with self._lock:
+            hot = [m for m in list(self._requests) if self._recent_count(m, now) >= OLLAMA_HOT_REQUESTS]
+        candidates += hot
+        if self.pin_most_used:
+            most_used = self.most_used_model()
+            if most_used:
+                candidates.append(most_used)
+
+        installed = registry.list_names()
+        selected = []
+        for model in candidates:
+            if model in selected:
+                continue
+            if installed and model not in installed:
+                continue
+            selected.append(model)
+        return selected
+
+    def warmup_all(self) -> dict:
+        """Precarga los modelos elegidos; con el circuito abierto o en prueba no hace nada"""
+        from app.services import ollama_service
+
+        state = ollama_service.breaker.get_status()["state"]
+        if state != CLOSED:
+            print(f"[Warmup] Circuito {state}: se omite la precarga")
+            return {}
+        return {model: self.warmup(model) for model in self.models_to_warm()}
+
+    def start(self):
+        """Precarga en segundo plano al arrancar y repite cada `interval` segundos"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                self.warmup_all()
+                self._stop.wait(self.interval)
+
+        self._thread = threading.Thread(target=loop, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_status(self) -> dict:
+        now = time.time()
+        with self._lock:
+            models = set(self._requests) | set(self._warmed_at) | set(self.warmup_models) | self.pinned_models
+            snapshot = {
+                model: {
+                    "recent_requests": self._recent_count(model, now),
+                    "warmed_at": self._warmed_at.get(model),
+                    "cold": self._cold.get(model, _LatencyStats()).to_dict(),
+                    "warm": self._warm.get(model, _LatencyStats()).to_dict(),
+                }
+                for model in models
+            }
+        for model, data in snapshot.items():
+            data["pinned"] = self.is_pinned(model)
+            data["keep_alive"] = self.keep_alive_for(model)
+        return {"interval_seconds": self.interval, "models": snapshot}
+
+
+warmup_manager = ModelWarmupManager()
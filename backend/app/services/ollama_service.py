@@ -1,165 +1,372 @@
 # -*- coding: utf-8 -*-
 """Cliente simple para la API de Ollama (chat/generación)."""
-import os, json, requests, re
+import os, json, requests, time
+from typing import Optional
+
+from app.services.llm_concurrency_service import limiter, map_concurrently
+from app.services.llm_singleflight_service import singleflight, request_key
+from app.services.model_registry_service import registry
+from app.services.model_warmup_service import warmup_manager, WARMUP_TASK
+from app.services.circuit_breaker_service import breaker, CircuitOpenError
+from app.services.llm_scheduler_service import scheduler, SchedulerBusyError, INTERACTIVE, REVIEW
+from app.services.llm_telemetry_service import telemetry
+from app.services.bullet_cache_service import bullet_cache
+from app.services.model_router_service import router
+from app.services.cv_prompt_service import serialize_cv, prompt_savings
 
 OLLAMA_BASE = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/api")
 OLLAMA_MODEL = os.getenv("OLLAMA_DEFAULT_MODEL", "phi3.5:latest")
 OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "300"))
+OLLAMA_CONNECT_TIMEOUT = int(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+
+# Los prompts de sistema son fijos y van siempre primero: así el prefijo es
+# idéntico en todas las llamadas y Ollama reutiliza su caché KV en lugar de
+# reevaluar las instrucciones. Todo lo variable (instrucción del usuario,
+# textos, CV) va en el mensaje de usuario. Si se cambian, subir PROMPT_VERSION
+# para comparar el tiempo de prompt_eval en /ollama/metrics.
+PROMPT_VERSION = "v3-compact-cv"
+
+BULLETS_SYSTEM_PROMPT = (
+    "Eres un experto consultor de carrera. Tu tarea es reescribir los textos "
+    "que te envíe el usuario para que suenen más profesionales y de alto impacto. "
+    "Usa verbos de acción fuertes y agrega marcadores de métricas [X] si faltan datos. "
+    "No te limites a corregir, REESCRIBE para impresionar. "
+    "Si el usuario incluye una instrucción específica, síguela por encima de estas pautas.\n"
+    "RESPONDE ÚNICAMENTE CON UN JSON VÁLIDO. Sin explicaciones.\n"
+    "Formato: {\"bullets\": [\"Texto mejorado 1\", \"Texto mejorado 2\"]}\n"
+    "Devuelve exactamente un texto mejorado por cada texto original, en el mismo orden."
+)
+
+REVIEW_SYSTEM_PROMPT = (
+    "Eres un RECLUTADOR TÉCNICO SENIOR con 20 años de experiencia en selección de talento.\n"
+    "TAREA: Analiza el CV que te envíe el usuario (en texto resumido) y genera un REPORTE CRÍTICO DE CALIDAD.\n"
+    "REGLAS ESTRICTAS:\n"
+    "1. NO repitas los datos del CV tal cual.\n"
+    "2. NO inventes experiencia que no existe.\n"
+    "3. USA FORMATO MARKDOWN PROFESIONAL.\n"
+    "4. Responde SIEMPRE en ESPAÑOL.\n\n"
+    "ESTRUCTURA DEL REPORTE:\n"
+    "### 🌟 Fortalezas\n"
+    "(Lista de lo que destaca positivamente)\n\n"
+    "### 🛠️ Áreas de Mejora\n"
+    "(Crítica constructiva sobre verbos de acción, métricas faltantes, claridad o diseño)\n\n"
+    "### 📈 Veredicto Profesional\n"
+    "(Conclusión breve sobre el impacto del perfil y qué tan 'contratable' parece)"
+)
+
+def _send(
+    endpoint: str,
+    payload: dict,
+    timeout: int,
+    priority: str,
+    user_key: str = None,
+    task: str = None,
+    prompt_version: str = None
+) -> dict:
+    """
+    POST a la API de Ollama respetando los límites de concurrencia.
+
+    Pasa por el circuit breaker: si Ollama viene fallando lanza
+    CircuitOpenError al instante; los errores de red, timeouts y 5xx cuentan
+    como fallos. Después espera turno en el planificador según la prioridad
+    (puede lanzar SchedulerBusyError). Cada respuesta alimenta la telemetría
+    de tokens y latencia por modelo, tarea y versión de prompt.
+    """
+    model = payload.get("model")
+    task = task or endpoint
+    payload.setdefault("keep_alive", warmup_manager.keep_alive_for(model))
+    breaker.before_call()
+    start = time.time()
+    try:
+        with scheduler.slot(priority, user_key):
+            with limiter.slot(model):
+                start = time.time()
+                resp = requests.post(
+                    f"{OLLAMA_BASE}/{endpoint}", json=payload, timeout=(OLLAMA_CONNECT_TIMEOUT, timeout)
+                )
+                latency = time.time() - start
+    except SchedulerBusyError:
+        breaker.release_probe()
+        raise
+    except requests.exceptions.RequestException as e:
+        breaker.record_failure(e)
+        telemetry.record_error(model, task, time.time() - start, str(e), prompt_version)
+        raise
+    if resp.status_code >= 500:
+        breaker.record_failure(RuntimeError(f"HTTP {resp.status_code}"))
+    else:
+        breaker.record_success()
+    if resp.status_code >= 400:
+        telemetry.record_error(model, task, latency, f"HTTP {resp.status_code}", prompt_version)
+    resp.raise_for_status()
+    data = resp.json()
+    if task != WARMUP_TASK:
+        warmup_manager.record_request(model, latency, data.get("load_duration"))
+    telemetry.record(model, task, data, latency, prompt_version)
+    return data
+
+def _post(
+    endpoint: str,
+    payload: dict,
+    timeout: int = OLLAMA_TIMEOUT,
+    priority: str = INTERACTIVE,
+    user_key: str = None,
+    task: str = None,
+    prompt_version: str = None
+) -> dict:
+    """
+    Envía una petición a Ollama.
+
+    Las peticiones idénticas en vuelo (mismo modelo, prompt y opciones)
+    comparten una única generación; todas reciben la misma respuesta, que
+    debe tratarse como de solo lectura.
+    """
+    key = request_key(endpoint, payload)
+    return singleflight.do(key, lambda: _send(endpoint, payload, timeout, priority, user_key, task, prompt_version))
+
+def improve_bullets(
+    model: str = None,
+    bullets: list[str] = None,
+    instruction: str = None,
+    priority: str = INTERACTIVE,
+    user_key: str = None
+) -> list[str]:
+    """
+    Mejora bullets de experiencia usando Ollama.
 
-def improve_bullets(model: str = None, bullets: list[str] = None, instruction: str = None) -> list[str]:
-    """Mejora bullets de experiencia usando Ollama"""
+    Cada bullet se busca antes en la caché por bullet: solo los que no
+    están (o están repetidos una única vez) se envían al modelo. Si la
+    generación falla se devuelven los originales y no se cachea nada.
+    """
     if model is None:
-        model = OLLAMA_MODEL
+        model = router.choose_model("improve_bullets")
     if bullets is None or len(bullets) == 0:
         return []
-    
-    url = f"{OLLAMA_BASE}/chat"
-    
-    base_instruction = (
-        "Eres un experto consultor de carrera. Tu tarea es reescribir los siguientes textos "
-        "para que suenen más profesionales y de alto impacto. "
-    )
-    
-    if instruction:
-        base_instruction += f"\nIMPORTANTE - Sigue esta instrucción específica del usuario: '{instruction}'.\n"
-    else:
-        base_instruction += (
-            "Usa verbos de acción fuertes y agrega marcadores de métricas [X] si faltan datos. "
-            "No te limites a corregir, REESCRIBE para impresionar.\n"
-        )
 
-    prompt = (
-        f"{base_instruction}\n"
-        "RESPONDE ÚNICAMENTE CON UN JSON VÁLIDO. Sin explicaciones.\n"
-        "Formato: {\"bullets\": [\"Texto mejorado 1\", \"Texto mejorado 2\"]}\n\n"
+    keys = [bullet_cache.key(b, model, instruction, PROMPT_VERSION) for b in bullets]
+    improved = [bullet_cache.get(k) for k in keys]
+    pending = {}
+    for key, bullet, cached in zip(keys, bullets, improved):
+        if cached is None:
+            pending.setdefault(key, bullet)
+    if not pending:
+        return improved
+
+    try:
+        generated = _generate_bullets(model, list(pending.values()), instruction, priority, user_key)
+    except (CircuitOpenError, SchedulerBusyError):
+        raise
+    except Exception as e:
+        print(f"Error en Ollama: {e}")
+        generated = None
+
+    if generated is None:
+        return [c if c is not None else b for b, c in zip(bullets, improved)]  # Fallback al original
+    fresh = dict(zip(pending, generated))
+    for key, text in fresh.items():
+        bullet_cache.set(key, text)
+    return [c if c is not None else fresh[k] for k, c in zip(keys, improved)]
+
+def _generate_bullets(
+    model: str,
+    bullets: list[str],
+    instruction: str,
+    priority: str,
+    user_key: str
+) -> Optional[list[str]]:
+    """Pide al modelo los bullets mejorados; None si la respuesta no es válida tras reparar"""
+    user_content = ""
+    if instruction:
+        user_content += f"IMPORTANTE - Sigue esta instrucción específica: '{instruction}'.\n\n"
+    user_content += (
+        f"Devuelve exactamente {len(bullets)} textos, en el mismo orden.\n"
         "Textos originales:\n" +
         "\n".join(f"- {b}" for b in bullets)
     )
 
+    messages = [
+        {"role": "system", "content": BULLETS_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+    schema = bullets_schema(len(bullets))
+
+    content = _chat_json(model, messages, schema, priority, user_key)
+    try:
+        improved = validate_bullets(content, len(bullets))
+        telemetry.record_parse(model, "improve_bullets", "ok", PROMPT_VERSION)
+        return improved
+    except ValueError as e:
+        print(f"[Ollama] Respuesta inválida ({e}). Solicitando una reparación...")
+
+    # Un único intento de reparación: se devuelve al modelo su respuesta y el error
+    repair_messages = messages + [
+        {"role": "assistant", "content": content},
+        {"role": "user", "content": (
+            f"Tu respuesta no es válida. Devuelve SOLO el objeto JSON "
+            f"{{\"bullets\": [...]}} con exactamente {len(bullets)} textos, "
+            f"uno por cada texto original y en el mismo orden."
+        )},
+    ]
+    content = _chat_json(model, repair_messages, schema, priority, user_key)
+    try:
+        improved = validate_bullets(content, len(bullets))
+        telemetry.record_parse(model, "improve_bullets", "repaired", PROMPT_VERSION)
+        return improved
+    except ValueError as e:
+        telemetry.record_parse(model, "improve_bullets", "failed", PROMPT_VERSION)
+        print(f"Advertencia: No se pudo parsear respuesta de Ollama ({e}): {content[:100]}...")
+        return None
+
+def bullets_schema(count: int) -> dict:
+    """JSON schema para el parámetro `format` de Ollama: {"bullets": [count textos]}"""
+    return {
+        "type": "object",
+        "properties": {
+            "bullets": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": count,
+                "maxItems": count,
+            }
+        },
+        "required": ["bullets"],
+    }
+
+def validate_bullets(content: str, expected: int) -> list[str]:
+    """Valida estrictamente la respuesta; lanza ValueError con el motivo si no cumple"""
+    try:
+        parsed = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        raise ValueError("no es JSON válido")
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("bullets"), list):
+        raise ValueError("falta la lista 'bullets'")
+    improved = parsed["bullets"]
+    if len(improved) != expected:
+        raise ValueError(f"se esperaban {expected} bullets y llegaron {len(improved)}")
+    if not all(isinstance(b, str) and b.strip() for b in improved):
+        raise ValueError("todos los bullets deben ser textos no vacíos")
+    return [b.strip() for b in improved]
+
+def _chat_json(model: str, messages: list, schema: dict, priority: str, user_key: str) -> str:
+    """Chat con salida restringida al JSON schema; devuelve el contenido en texto"""
     payload = {
         "model": model,
-        "messages": [{"role": "user", "content": prompt}],
+        "messages": messages,
         "stream": False,
+        "format": schema,
         "options": {"temperature": 0.7}
     }
-    
-    try:
-        resp = requests.post(url, json=payload, timeout=OLLAMA_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("message", {}).get("content", "")
-        
-        # Log discreto de actividad
-        print(f"[Ollama] Respuesta recibida ({len(content)} caracteres). Procesando sugerencias...")
-        
-        # Intentar parsear JSON directo
-        try:
-            parsed = json.loads(content)
-            if "bullets" in parsed and isinstance(parsed["bullets"], list):
-                return parsed["bullets"]
-        except json.JSONDecodeError:
-            pass
-            
-        # Buscar bloques JSON (usando non-greedy para encontrar objetos individuales)
-        # Esto maneja casos donde el modelo devuelve múltiples JSONs o texto entre ellos
-        json_matches = re.finditer(r'\{.*?\}', content, re.DOTALL)
-        for match in json_matches:
-            try:
-                candidate = match.group(0)
-                parsed = json.loads(candidate)
-                if "bullets" in parsed and isinstance(parsed["bullets"], list):
-                    return parsed["bullets"]
-            except:
-                continue
-
-        # Si todo falla, intentar devolver bullets si el modelo devolvió una lista markdown
-        lines = [line.strip().lstrip('-•*').strip() for line in content.split('\n') if line.strip().startswith(('- ', '* ', '• '))]
-        if lines:
-            return lines
-
-        print(f"Advertencia: No se pudo parsear respuesta de Ollama: {content[:100]}...")
-        return bullets # Fallback al original
+    data = _post(
+        "chat", payload, priority=priority, user_key=user_key,
+        task="improve_bullets", prompt_version=PROMPT_VERSION
+    )
+    content = data.get("message", {}).get("content", "")
+    # Log discreto de actividad
+    print(f"[Ollama] Respuesta recibida ({len(content)} caracteres, {data.get('eval_count', '?')} tokens). Procesando sugerencias...")
+    return content
 
-    except Exception as e:
-        print(f"Error en Ollama: {e}")
-        return bullets
+def improve_bullets_many(
+    model: str = None,
+    bullets_lists: list[list[str]] = None,
+    instruction: str = None,
+    user_key: str = None
+) -> list[list[str]]:
+    """
+    Mejora varias listas de bullets en paralelo (una llamada por lista).
+
+    Conserva el orden de entrada; si una llamada falla se devuelven los
+    bullets originales de esa lista. La concurrencia real la acotan los
+    límites global y por modelo de llm_concurrency_service.
+    """
+    if not bullets_lists:
+        return []
+    return map_concurrently(
+        lambda bullets: improve_bullets(model, bullets, instruction, user_key=user_key),
+        bullets_lists,
+        fallback=lambda bullets: bullets
+    )
 
-def review_cv(model: str = None, cv_data: dict = None) -> str:
-    """Revisa el CV completo y devuelve feedback en Markdown"""
+def review_error_message(error: Exception) -> str:
+    """Mensaje para el usuario cuando la revisión del CV falla"""
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return "⚠️ La IA está tomando demasiado tiempo para responder (Timeout). Por favor, intenta de nuevo en unos momentos o con un modelo más ligero."
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "❌ No se pudo conectar con el servicio de IA (Ollama). Asegúrate de que el servidor de IA esté activo."
+    return f"Ocurrió un error inesperado al generar la revisión: {str(error)}"
+
+def review_cv(model: str = None, cv_data: dict = None, user_key: str = None, raise_errors: bool = False) -> str:
+    """
+    Revisa el CV completo y devuelve feedback en Markdown.
+
+    Con raise_errors=False los fallos de Ollama se devuelven como un aviso en
+    el texto; con raise_errors=True se propagan (los trabajos en segundo plano
+    no deben guardar ese aviso como una revisión terminada).
+    """
     if model is None:
-        model = OLLAMA_MODEL
+        model = router.choose_model("review_cv")
     
-    url = f"{OLLAMA_BASE}/chat"
-    
-    # Convertir datos relevantes a texto
-    cv_text = json.dumps(cv_data, indent=2, ensure_ascii=False)
-    
-    prompt = (
-        "SISTEMA: Eres un RECLUTADOR TÉCNICO SENIOR con 20 años de experiencia en selección de talento.\n"
-        "TAREA: Analiza el siguiente CV proporcionado en formato JSON y genera un REPORTE CRÍTICO DE CALIDAD.\n"
-        "REGLAS ESTRICTAS:\n"
-        "1. NO devuelvas el JSON original.\n"
-        "2. NO inventes experiencia que no existe.\n"
-        "3. USA FORMATO MARKDOWN PROFESIONAL.\n"
-        "4. Responde SIEMPRE en ESPAÑOL.\n\n"
-        "ESTRUCTURA DEL REPORTE:\n"
-        "### 🌟 Fortalezas\n"
-        "(Lista de lo que destaca positivamente)\n\n"
-        "### 🛠️ Áreas de Mejora\n"
-        "(Crítica constructiva sobre verbos de acción, métricas faltantes, claridad o diseño)\n\n"
-        "### 📈 Veredicto Profesional\n"
-        "(Conclusión breve sobre el impacto del perfil y qué tan 'contratable' parece)\n\n"
-        f"--- DATOS DEL CV A ANALIZAR ---\n{cv_text}"
+    # Texto compacto dentro del presupuesto de tokens (en lugar del JSON indentado)
+    cv_text, savings = serialize_cv(cv_data)
+    prompt_savings.record(savings)
+    print(
+        f"[Ollama] Prompt del CV: {savings['original_tokens']} → {savings['compact_tokens']} tokens "
+        f"(-{savings['savings_ratio']:.0%})"
+        + (f", recortado: {', '.join(savings['truncated_sections'])}" if savings["truncated_sections"] else "")
     )
-
+    
     payload = {
         "model": model,
-        "messages": [{"role": "user", "content": prompt}],
+        "messages": [
+            {"role": "system", "content": REVIEW_SYSTEM_PROMPT},
+            {"role": "user", "content": f"--- DATOS DEL CV A ANALIZAR ---\n{cv_text}"},
+        ],
         "stream": False,
         "options": {"temperature": 0.4}
     }
     
     try:
-        resp = requests.post(url, json=payload, timeout=OLLAMA_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
+        data = _post(
+            "chat", payload, priority=REVIEW, user_key=user_key,
+            task="review_cv", prompt_version=PROMPT_VERSION
+        )
         return data.get("message", {}).get("content", "No se pudo generar la revisión.")
-    except requests.exceptions.ReadTimeout:
-        return "⚠️ La IA está tomando demasiado tiempo para responder (Timeout). Por favor, intenta de nuevo en unos momentos o con un modelo más ligero."
-    except requests.exceptions.ConnectionError:
-        return "❌ No se pudo conectar con el servicio de IA (Ollama). Asegúrate de que el servidor de IA esté activo."
+    except (CircuitOpenError, SchedulerBusyError):
+        raise
     except Exception as e:
         print(f"Error revisando CV: {e}")
-        return f"Ocurrió un error inesperado al generar la revisión: {str(e)}"
+        if raise_errors:
+            raise
+        return review_error_message(e)
 
 def list_models() -> list[str]:
-    """Obtiene la lista de modelos disponibles en Ollama"""
-    try:
-        resp = requests.get(f"{OLLAMA_BASE}/tags", timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        models = [m["name"] for m in data.get("models", [])]
-        return models
-    except Exception as e:
-        print(f"Error listando modelos: {e}")
-        return []
+    """Obtiene la lista de modelos disponibles en Ollama (cacheada con TTL)"""
+    return registry.list_names()
 
-def generate_text(prompt: str, model: str = None) -> str:
-    """Genera texto usando Ollama"""
+def generate_text(
+    prompt: str,
+    model: str = None,
+    options: dict = None,
+    priority: str = INTERACTIVE,
+    user_key: str = None,
+    task: str = "generate_text",
+    response_format: dict = None
+) -> str:
+    """Genera texto usando Ollama (response_format: JSON schema opcional para `format`)"""
     if model is None:
-        model = OLLAMA_MODEL
+        model = router.choose_model(task)
     
-    url = f"{OLLAMA_BASE}/generate"
     payload = {
         "model": model,
         "prompt": prompt,
         "stream": False,
     }
+    if options:
+        payload["options"] = options
+    if response_format:
+        payload["format"] = response_format
     
     try:
-        resp = requests.post(url, json=payload, timeout=OLLAMA_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
+        data = _post("generate", payload, priority=priority, user_key=user_key, task=task)
         return data.get("response", "")
     except Exception as e:
         print(f"Error generando texto: {e}")
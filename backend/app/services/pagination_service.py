@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""Paginación por cursor (keyset) y conteos aproximados cacheados.
+
+offset(n) obliga a la base a recorrer y descartar n filas, así que las
+páginas profundas son cada vez más lentas. Con keyset cada página continúa
+desde la última fila vista usando una clave de orden estable que termina en
+la clave primaria (p.ej. total_likes DESC, id DESC): con el índice compuesto
+correspondiente cada página es una búsqueda O(log n) + limit filas.
+
+El cursor es opaco para el cliente (base64 de los valores de la última fila).
+El total ya no sale de la página: se calcula aparte con COUNT y se cachea
+unos segundos, porque para mostrar "~1.234 CVs" no hace falta exactitud.
+Las rutas que crean, publican o borran filas invalidan sus claves cuando la
+sesión hace commit (invalidate_on_commit), así que el TTL solo cubre lo que
+cambie en otros procesos. La caché es LRU con APPROX_COUNT_MAX_ENTRIES claves.
+"""
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Query, Session
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "20"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "100"))
+APPROX_COUNT_TTL = float(os.getenv("APPROX_COUNT_TTL", "60"))  # segundos
+APPROX_COUNT_MAX_ENTRIES = int(os.getenv("APPROX_COUNT_MAX_ENTRIES", "10000"))
+
+_PENDING_KEY = "approx_counts_invalidate"
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no es válido para este listado"""
+
+
+def encode_cursor(values: list) -> str:
+    data = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """Valores de la última fila, convertidos al tipo de cada columna"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Cursor inválido") from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor("Cursor inválido")
+    decoded = []
+    for column, value in zip(columns, values):
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = None
+        try:
+            if python_type is datetime and value is not None:
+                value = datetime.fromisoformat(value)
+            elif python_type in (int, str) and value is not None:
+                value = python_type(value)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor("Cursor inválido") from e
+        decoded.append(value)
+    return decoded
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Tamaño de página acotado a [1, PAGE_SIZE_MAX]"""
+    return max(1, min(limit or PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX))
+
+
+def _after(columns: list, values: list, descending: bool):
+    """Filas estrictamente posteriores a `values` en el orden (columns...)
+
+    Se expresa como `a <= x AND (a < x OR (a = x AND (b < y ...)))` para que
+    la primera condición sea un rango sobre el índice.
+    """
+    column, value = columns[0], values[0]
+    strict = column < value if descending else column > value
+    if len(columns) == 1:
+        return strict
+    inclusive = column <= value if descending else column >= value
+    return and_(inclusive, or_(strict, and_(column == value, _after(columns[1:], values[1:], descending))))
+
+
+def paginate(query: Query, columns: list, limit: Optional[int] = None,
+             cursor: Optional[str] = None, descending: bool = True,
+             offset: int = 0) -> tuple[list, Optional[str]]:
+    """
+    Página de `query` ordenada por `columns` (la última debe ser única).
+
+    Devuelve (filas, next_cursor); next_cursor es None en la última página.
+    La consulta puede devolver entidades o tuplas de entidades. `offset`
+    solo existe por compatibilidad con clientes antiguos (skip) y se ignora
+    si llega un cursor.
+    """
+    size = page_size(limit)
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+    elif offset > 0:
+        query = query.offset(offset)
+    rows = query.limit(size + 1).all()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor([_row_value(rows[-1], c) for c in columns])
+    return rows, next_cursor
+
+
+def _row_value(row, column):
+    """Valor de `column` en una fila que puede ser una entidad o una tupla de entidades"""
+    entities = row if hasattr(row, "_fields") else (row,)
+    for entity in entities:
+        table = getattr(entity, "__table__", None)
+        if table is column.table:
+            return getattr(entity, column.key)
+    raise ValueError(f"La fila no contiene la columna {column}")
+
+
+class ApproximateCounter:
+    """COUNT(*) por clave cacheado con TTL (totales para la UI), LRU acotado"""
+
+    def __init__(self, ttl: float = APPROX_COUNT_TTL, max_entries: int = APPROX_COUNT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._values: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+    def count(self, key: str, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get(key)
+            if cached and now - cached[1] < self.ttl:
+                self._values.move_to_end(key)
+                return cached[0]
+        value = compute()
+        with self._lock:
+            self._values[key] = (value, now)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+        return value
+
+    def invalidate(self, *keys: str):
+        """Olvida las claves indicadas (todas si no se indica ninguna)"""
+        with self._lock:
+            if not keys:
+                self._values.clear()
+            for key in keys:
+                self._values.pop(key, None)
+
+    def invalidate_on_commit(self, db: Session, *keys: str):
+        """Invalida las claves cuando `db` haga commit (nada si hace rollback)"""
+        db.info.setdefault(_PENDING_KEY, set()).update(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._values)
+
+
+approx_counts = ApproximateCounter()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    keys = session.info.pop(_PENDING_KEY, None)
+    if keys:
+        approx_counts.invalidate(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
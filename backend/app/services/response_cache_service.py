@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Caché de respuestas JSON ya serializadas para los endpoints más consultados.
+
+El dashboard consulta `/gamification/leaderboard` y `/games/leaderboard/{id}`
+cada pocos segundos y cada petición repetía consultas y serialización. Aquí
+la respuesta se guarda como bytes JSON con un TTL corto y se sirve tal cual.
+
+Invalidación por eventos: quien cambia los datos marca el espacio de nombres
+en la sesión (invalidate_on_commit) y las entradas se borran cuando esa
+sesión hace commit; un rollback no invalida nada. Cada espacio lleva además
+una generación: una respuesta calculada mientras llegaba una invalidación no
+se guarda, así que no puede quedar en caché un ranking anterior al commit.
+
+El almacenamiento es un backend intercambiable (get/set/delete_prefix/clear).
+Por ahora MemoryBackend, por proceso; RESPONSE_CACHE_BACKEND=none desactiva
+la caché.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory | none
+RESPONSE_CACHE_MAX = int(os.getenv("RESPONSE_CACHE_MAX", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "5"))  # segundos
+
+_PENDING_KEY = "response_cache_invalidate"
+
+
+class MemoryBackend:
+    """LRU con TTL en memoria del proceso"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX):
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[1]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class NullBackend:
+    """Sin caché: cada petición se calcula"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        pass
+
+    def delete_prefix(self, prefix: str) -> int:
+        return 0
+
+    def clear(self):
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+def create_backend(name: str = RESPONSE_CACHE_BACKEND):
+    if name == "none":
+        return NullBackend()
+    if name != "memory":
+        print(f"[ResponseCache] Backend desconocido '{name}', usando memoria")
+    return MemoryBackend()
+
+
+def serialize(payload: Any) -> bytes:
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseCache:
+    """Respuestas JSON por espacio de nombres, con métricas de aciertos"""
+
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend if backend is not None else create_backend()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generations: dict[str, int] = {}
+        self._stats: dict[str, dict] = {}
+
+    def _count(self, namespace: str, field: str, n: int = 1):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "invalidations": 0})
+        stats[field] += n
+
+    def get_or_render(
+        self,
+        namespace: str,
+        key: str,
+        render: Callable[[], Any],
+        ttl: Optional[float] = None
+    ) -> tuple[bytes, bool]:
+        """Devuelve (bytes JSON, acierto); en un fallo calcula render() y lo guarda"""
+        full_key = f"{namespace}:{key}"
+        body = self.backend.get(full_key)
+        with self._lock:
+            self._count(namespace, "hits" if body is not None else "misses")
+            generation = self._generations.get(namespace, 0)
+        if body is not None:
+            return body, True
+
+        body = serialize(render())
+        with self._lock:
+            # Si se invalidó mientras se calculaba, la respuesta ya es vieja
+            if self._generations.get(namespace, 0) == generation:
+                self.backend.set(full_key, body, self.ttl if ttl is None else ttl)
+        return body, False
+
+    def invalidate(self, *namespaces: str):
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+                self.backend.delete_prefix(f"{namespace}:")
+                self._count(namespace, "invalidations")
+
+    def invalidate_on_commit(self, db: Session, *namespaces: str):
+        """Invalida los espacios cuando `db` haga commit (nada si hace rollback)"""
+        db.info.setdefault(_PENDING_KEY, set()).update(namespaces)
+
+    def clear(self):
+        with self._lock:
+            self.backend.clear()
+            self._generations.clear()
+            self._stats.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            namespaces = {}
+            for namespace, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                namespaces[namespace] = {
+                    **stats, "hit_rate": round(stats["hits"] / lookups, 4) if lookups else None
+                }
+            return {
+                "backend": type(self.backend).__name__,
+                "entries": len(self.backend),
+                "ttl_seconds": self.ttl,
+                "namespaces": namespaces,
+            }
+
+
+def cached_json(body: bytes, hit: bool) -> Response:
+    """Respuesta con los bytes ya serializados (X-Cache: HIT/MISS)"""
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT" if hit else "MISS"})
+
+
+response_cache = ResponseCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    namespaces = session.info.pop(_PENDING_KEY, None)
+    if namespaces:
+        response_cache.invalidate(*namespaces)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
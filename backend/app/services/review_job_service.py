@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""Revisiones de CV en segundo plano.
+
+Una revisión completa puede tardar minutos en CPUs pequeñas y los proxies la
+cortan antes de que termine. Aquí la revisión se encola como un trabajo que
+devuelve un id al instante; el resultado se consulta después (polling o SSE)
+y se conserva durante REVIEW_JOB_TTL segundos. Los trabajos se deduplican por
+contenido: el mismo CV con el mismo modelo reutiliza el trabajo en curso o ya
+terminado, de modo que cerrar y reabrir el modal no lanza otra generación.
+
+La cola es acotada: con REVIEW_JOB_MAX_PENDING trabajos sin terminar un envío
+nuevo se rechaza con SchedulerBusyError (503 + Retry-After, como la ruta
+síncrona) y los trabajos que llevan más de REVIEW_JOB_QUEUE_TIMEOUT segundos
+en cola sin empezar se dan por fallidos.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.services.circuit_breaker_service import CircuitOpenError
+from app.services.llm_scheduler_service import DEFAULT_SERVICE_TIME, REVIEW, SchedulerBusyError
+
+REVIEW_JOB_TTL = int(os.getenv("REVIEW_JOB_TTL", "3600"))  # segundos que se guarda el resultado
+REVIEW_JOB_WORKERS = int(os.getenv("REVIEW_JOB_WORKERS", "2"))
+REVIEW_JOB_MAX_PENDING = int(os.getenv("REVIEW_JOB_MAX_PENDING", "32"))  # trabajos sin terminar
+REVIEW_JOB_QUEUE_TIMEOUT = int(os.getenv("REVIEW_JOB_QUEUE_TIMEOUT", "600"))  # segundos máximos en cola
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+
+class ReviewJob:
+    def __init__(self, key: str, model: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.model = model
+        self.status = QUEUED
+        self.review: Optional[str] = None
+        self.error: Optional[str] = None
+        self.retry_after: Optional[int] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "model": self.model,
+            "review": self.review,
+            "error": self.error,
+            "retry_after": self.retry_after,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def job_key(model: Optional[str], cv_data: dict) -> str:
+    """Clave de deduplicación: modelo + contenido canónico del CV"""
+    raw = json.dumps({"model": model, "cv": cv_data}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReviewJobManager:
+    """Ejecuta revisiones en un pool propio y guarda los resultados con TTL"""
+
+    def __init__(
+        self,
+        ttl: float = REVIEW_JOB_TTL,
+        max_workers: int = REVIEW_JOB_WORKERS,
+        max_pending: int = REVIEW_JOB_MAX_PENDING,
+        queue_timeout: float = REVIEW_JOB_QUEUE_TIMEOUT,
+    ):
+        self.ttl = ttl
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="review-job")
+        self._jobs: dict[str, ReviewJob] = {}
+        self._by_key: dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Tareas entregadas al executor que aún no terminaron (incluye las
+        # expiradas que siguen en su cola): es lo que ocupa memoria
+        self._backlog = 0
+        self._service_time = DEFAULT_SERVICE_TIME
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def _retry_after(self) -> float:
+        """Estimación de cuándo habrá sitio en la cola (llamar con el lock tomado)"""
+        return max(1.0, self._backlog / self.max_workers * self._service_time)
+
+    def _expire(self, job: ReviewJob):
+        """Da por fallido un trabajo que esperó demasiado (llamar con el lock tomado)"""
+        job.status = ERROR
+        job.error = "La revisión esperó demasiado en la cola. Inténtalo de nuevo."
+        job.retry_after = int(round(self._retry_after()))
+        job.finished_at = time.time()
+        job.done.set()
+        self.expired += 1
+
+    def _purge(self):
+        """Expira los trabajos atascados en cola y elimina los terminados cuyo TTL venció (con el lock tomado)"""
+        now = time.time()
+        for job in self._jobs.values():
+            if job.status == QUEUED and now - job.created_at > self.queue_timeout:
+                self._expire(job)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.ttl
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def _run(self, job: ReviewJob, cv_data: dict, user_key: Optional[str]):
+        from app.services import ollama_service
+
+        with self._lock:
+            if job.status == QUEUED and time.time() - job.created_at > self.queue_timeout:
+                self._expire(job)
+            if job.status != QUEUED:
+                # Expiró mientras esperaba: solo se descarta
+                self._backlog -= 1
+                return
+            job.status = RUNNING
+        started = time.monotonic()
+        try:
+            job.review = ollama_service.review_cv(
+                model=job.model, cv_data=cv_data, user_key=user_key, raise_errors=True
+            )
+            job.status = DONE
+        except (CircuitOpenError, SchedulerBusyError) as e:
+            job.error = str(e)
+            job.retry_after = e.retry_after
+            job.status = ERROR
+        except Exception as e:
+            # Timeout, Ollama caído, etc.: ERROR para que un nuevo envío lo reintente
+            print(f"[ReviewJobs] Error en el trabajo {job.id}: {e}")
+            job.error = ollama_service.review_error_message(e)
+            job.status = ERROR
+        finally:
+            with self._lock:
+                self._backlog -= 1
+                # Media móvil de la duración para estimar Retry-After
+                self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started)
+            job.finished_at = time.time()
+            job.done.set()
+
+    def submit(self, model: Optional[str], cv_data: dict, user_key: Optional[str] = None) -> ReviewJob:
+        """
+        Encola una revisión o devuelve el trabajo existente para el mismo contenido.
+
+        Lanza SchedulerBusyError si ya hay max_pending trabajos sin terminar.
+        """
+        key = job_key(model, cv_data)
+        with self._lock:
+            self._purge()
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            # Un trabajo fallido no se reutiliza: se vuelve a intentar
+            if existing is not None and existing.status != ERROR:
+                self.deduplicated += 1
+                return existing
+            if self._backlog >= self.max_pending:
+                self.rejected += 1
+                raise SchedulerBusyError(REVIEW, self._retry_after(), "demasiadas revisiones en cola")
+            job = ReviewJob(key, model)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self.submitted += 1
+            self._backlog += 1
+        self._executor.submit(self._run, job, cv_data, user_key)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[ReviewJob]:
+        """Espera hasta `timeout` segundos a que el trabajo termine"""
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._purge()
+            by_status = {QUEUED: 0, RUNNING: 0, DONE: 0, ERROR: 0}
+            for job in self._jobs.values():
+                by_status[job.status] += 1
+            return {
+                "jobs": by_status,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "backlog": self._backlog,
+                "max_pending": self.max_pending,
+                "ttl_seconds": self.ttl,
+            }
+
+
+review_jobs = ReviewJobManager()
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""Buffer write-behind para el registro de visitas.
+
+Registrar una visita de forma síncrona costaba una consulta de
+deduplicación, el INSERT, cargar el CV, add_points (con su commit y refresh),
+a veces add_badge (otro commit) y un commit final: con tráfico real las
+visitas eran la mayor parte de las escrituras. Ahora el endpoint solo deja la
+visita en memoria y un hilo la vuelca por lotes cada VISIT_FLUSH_INTERVAL_MS:
+
+- una consulta de deduplicación para todo el lote (misma IP y CV en la
+  última hora, contra lo ya guardado),
+- un INSERT por lote de las visitas,
+- un UPDATE `col = col + n` por CV (total_visits) y por dueño
+  (total_visits_received, total_points, experience),
+- niveles y badges de los perfiles afectados (update_progress),
+- un INSERT del historial de puntos: una fila por CV y lote más los badges,
+- los nuevos totales al ranking en memoria (al confirmar el lote).
+
+La memoria está acotada: con VISIT_BUFFER_MAX visitas pendientes el propio
+hilo que registra vuelca el lote (contrapresión en lugar de perder visitas).
+stop() vuelca lo pendiente, así que un apagado limpio no pierde nada. Si la
+base falla, el lote vuelve a la cola hasta VISIT_BUFFER_MAX; lo que no cabe
+se descarta y se cuenta en stats["dropped"].
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, CV, PointHistory, UserProfile, Visit, POINT_VALUES
+from app.services.gamification_service import GamificationService
+from app.services.leaderboard_service import leaderboard
+
+VISIT_FLUSH_INTERVAL_MS = int(os.getenv("VISIT_FLUSH_INTERVAL_MS", "500"))
+VISIT_BUFFER_MAX = int(os.getenv("VISIT_BUFFER_MAX", "10000"))
+VISIT_DEDUP_WINDOW = int(os.getenv("VISIT_DEDUP_WINDOW", "3600"))  # segundos
+VISIT_DEDUP_MAX = int(os.getenv("VISIT_DEDUP_MAX", "50000"))  # pares (cv, ip) recordados
+
+
+class VisitBuffer:
+    """Cola de visitas en memoria con volcado periódico por lotes"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval_ms: int = VISIT_FLUSH_INTERVAL_MS,
+        max_pending: int = VISIT_BUFFER_MAX,
+        dedup_window: int = VISIT_DEDUP_WINDOW,
+        dedup_max: int = VISIT_DEDUP_MAX,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max(1, max_pending)
+        self.dedup_window = timedelta(seconds=dedup_window)
+        self.dedup_max = max(1, dedup_max)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: list[dict] = []
+        self._recent: OrderedDict[tuple, datetime] = OrderedDict()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            "recorded": 0, "duplicates": 0, "flushed": 0, "batches": 0,
+            "forced_flushes": 0, "failed_batches": 0, "dropped": 0, "last_flush_ms": None,
+        }
+
+    def record(
+        self,
+        cv_id: str,
+        visitor_ip: Optional[str],
+        visitor_user_agent: str = None,
+        visitor_id: str = None,
+        referrer: str = None
+    ) -> bool:
+        """Encola una visita; False si es un duplicado reciente de la misma IP"""
+        now = datetime.utcnow()
+        with self._lock:
+            if visitor_ip is not None:
+                key = (cv_id, visitor_ip)
+                seen = self._recent.get(key)
+                if seen and now - seen < self.dedup_window:
+                    self.stats["duplicates"] += 1
+                    return False
+                self._recent[key] = now
+                self._recent.move_to_end(key)
+                while len(self._recent) > self.dedup_max:
+                    self._recent.popitem(last=False)
+            self._pending.append({
+                "cv_id": cv_id,
+                "visitor_id": visitor_id,
+                "visitor_ip": visitor_ip,
+                "visitor_user_agent": visitor_user_agent,
+                "referrer": referrer,
+                "created_at": now,
+            })
+            self.stats["recorded"] += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            # Contrapresión: quien llena el buffer espera al volcado
+            with self._lock:
+                self.stats["forced_flushes"] += 1
+            self.flush()
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Vuelca las visitas pendientes; devuelve cuántas se guardaron"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._prune_recent()
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            db = self.session_factory()
+            try:
+                saved = self._write(db, batch)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    # Se reintenta en el siguiente volcado, sin pasar del máximo
+                    room = max(0, self.max_pending - len(self._pending))
+                    self._pending[:0] = batch[:room]
+                    dropped = batch[room:]
+                    # Las descartadas no cuentan como vistas: la próxima visita de esa IP se registra
+                    for v in dropped:
+                        self._recent.pop((v["cv_id"], v["visitor_ip"]), None)
+                    self.stats["failed_batches"] += 1
+                    self.stats["dropped"] += len(dropped)
+                print(f"[VisitBuffer] Error volcando {len(batch)} visitas: {e}")
+                if dropped:
+                    print(f"[VisitBuffer] {len(dropped)} visitas descartadas: el buffer está lleno")
+                return 0
+            finally:
+                db.close()
+            with self._lock:
+                self.stats["flushed"] += saved
+                self.stats["duplicates"] += len(batch) - saved
+                self.stats["batches"] += 1
+                self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return saved
+
+    def _prune_recent(self):
+        cutoff = datetime.utcnow() - self.dedup_window
+        while self._recent:
+            key, seen = next(iter(self._recent.items()))
+            if seen >= cutoff:
+                break
+            self._recent.popitem(last=False)
+
+    def _write(self, db: Session, batch: list[dict]) -> int:
+        cv_ids = {v["cv_id"] for v in batch}
+        owners = dict(db.execute(select(CV.id, CV.user_id).where(CV.id.in_(cv_ids))).all())
+
+        # Deduplicación contra lo ya guardado (otros procesos o antes de reiniciar)
+        ips = {v["visitor_ip"] for v in batch if v["visitor_ip"] is not None}
+        stored = set()
+        if ips:
+            stored = {tuple(row) for row in db.execute(select(Visit.cv_id, Visit.visitor_ip).where(
+                Visit.cv_id.in_(cv_ids),
+                Visit.visitor_ip.in_(ips),
+                Visit.created_at >= datetime.utcnow() - self.dedup_window,
+            ))}
+        visits = [
+            v for v in batch
+            if v["cv_id"] in owners and (v["cv_id"], v["visitor_ip"]) not in stored
+        ]
+        if not visits:
+            return 0
+        db.execute(Visit.__table__.insert(), visits)
+
+        per_cv: dict[str, int] = {}
+        for v in visits:
+            per_cv[v["cv_id"]] = per_cv.get(v["cv_id"], 0) + 1
+        per_owner: dict[str, int] = {}
+        for cv_id, count in per_cv.items():
+            per_owner[owners[cv_id]] = per_owner.get(owners[cv_id], 0) + count
+
+        db.execute(
+            update(CV.__table__)
+            .where(CV.__table__.c.id == bindparam("cv_id"))
+            .values(total_visits=func.coalesce(CV.__table__.c.total_visits, 0) + bindparam("n")),
+            [{"cv_id": cv_id, "n": n} for cv_id, n in per_cv.items()],
+        )
+
+        existing = set(db.scalars(select(UserProfile.user_id).where(UserProfile.user_id.in_(per_owner))))
+        for user_id in per_owner.keys() - existing:
+            db.add(UserProfile(user_id=user_id))
+        db.flush()
+
+        points = POINT_VALUES['visit_received']
+        profiles = UserProfile.__table__
+        db.execute(
+            update(profiles)
+            .where(profiles.c.user_id == bindparam("owner"))
+            .values(
+                total_visits_received=func.coalesce(profiles.c.total_visits_received, 0) + bindparam("n"),
+                total_points=func.coalesce(profiles.c.total_points, 0) + bindparam("n") * points,
+                experience=func.coalesce(profiles.c.experience, 0) + bindparam("n") * points,
+            ),
+            [{"owner": owner, "n": n} for owner, n in per_owner.items()],
+        )
+        now = datetime.utcnow()
+        history = [
+            {
+                "user_id": owners[cv_id],
+                "user_profile_id": owners[cv_id],
+                "points": n * points,
+                "action": 'visit_received',
+                "description": "Tu CV recibió una visita" if n == 1 else f"Tu CV recibió {n} visitas",
+                "related_cv_id": cv_id,
+                "created_at": now,
+            }
+            for cv_id, n in per_cv.items()
+        ]
+
+        # Niveles y badges con los contadores ya actualizados
+        db.expire_all()
+        viral = set(db.scalars(select(CV.user_id).where(CV.id.in_(per_cv), CV.total_visits >= 1000)))
+        for profile in db.scalars(select(UserProfile).where(UserProfile.user_id.in_(per_owner))).all():
+            history.extend(GamificationService.update_progress(
+                db, profile, badges=('viral',) if profile.user_id in viral else ()
+            ))
+            leaderboard.track(db, profile.user_id, profile.total_points)
+        db.execute(PointHistory.__table__.insert(), history)
+        return len(visits)
+
+    def start(self):
+        """Inicia el hilo de volcado periódico"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.flush_interval):
+                self.flush()
+
+        self._thread = threading.Thread(target=loop, name="visit-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo y vuelca lo pendiente (apagado limpio)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending), "max_pending": self.max_pending}
+
+
+visit_buffer = VisitBuffer()
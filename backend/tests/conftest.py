@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Fixtures compartidas por los tests del backend"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.models.database import Base, get_db
+from app.services import ollama_service
+from app.services.circuit_breaker_service import CircuitBreaker
+from app.services.bullet_cache_service import BulletCache
+from app.services.pagination_service import approx_counts
+from app.services.leaderboard_service import leaderboard
+from app.services.response_cache_service import response_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_circuit_breaker(monkeypatch):
+    """Cada test empieza con el circuito hacia Ollama cerrado"""
+    monkeypatch.setattr(ollama_service, "breaker", CircuitBreaker())
+
+
+@pytest.fixture(autouse=True)
+def fresh_bullet_cache(monkeypatch):
+    """La caché de bullets no se comparte entre tests"""
+    monkeypatch.setattr(ollama_service, "bullet_cache", BulletCache())
+
+
+@pytest.fixture(autouse=True)
+def fresh_approx_counts():
+    """Los totales cacheados no se comparten entre tests"""
+    approx_counts.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def fresh_leaderboard():
+    """El ranking en memoria se reconstruye desde la base de cada test"""
+    leaderboard.reset()
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache():
+    """Las respuestas cacheadas no se comparten entre tests"""
+    response_cache.clear()
+
+
+@pytest.fixture
+def memory_db():
+    """
+    Fábrica de bases SQLite en memoria con el esquema completo.
+
+    memory_db(seed, override=True, **session_kw) crea la base, llama a
+    seed(db) y hace commit; con override los endpoints usan esa base hasta
+    el final del test. Devuelve el sessionmaker (el engine está en
+    Session.kw["bind"]).
+    """
+    def make(seed=None, override=True, **session_kw):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, **session_kw)
+        if seed:
+            with Session() as db:
+                seed(db)
+                db.commit()
+
+        if override:
+            def override_get_db():
+                session = Session()
+                try:
+                    yield session
+                finally:
+                    session.close()
+
+            app.dependency_overrides[get_db] = override_get_db
+        return Session
+
+    yield make
+    app.dependency_overrides.pop(get_db, None)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Tests para la unidad de trabajo de puntos (GamificationService.award_many)"""
+import pytest
+from sqlalchemy import event, func, select
+
+from app.models.database import GameSession, PointHistory, User, UserProfile, POINT_VALUES
+from app.services.gamification_service import GamificationService
+
+
+def _seed(db):
+    db.add(User(id="ana", username="ana", email="ana@x.com", hashed_password="x"))
+
+
+@pytest.fixture
+def Session(memory_db):
+    return memory_db(_seed, override=False, autoflush=False)
+
+
+@pytest.fixture
+def engine(Session):
+    return Session.kw["bind"]
+
+
+@pytest.fixture
+def activity(engine):
+    """Commits y sentencias SQL emitidas durante el test"""
+    seen = {"commits": 0, "history_inserts": 0}
+
+    @event.listens_for(engine, "commit")
+    def on_commit(conn):
+        seen["commits"] += 1
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO point_history"):
+            seen["history_inserts"] += 1
+
+    return seen
+
+
+def test_game_session_awards_in_one_commit(Session, activity):
+    with Session() as db:
+        session = GamificationService.record_game_session(
+            db, "ana", "pong", score=7, won=True, game_data={"opponent_score": 0}
+        )
+        assert session.id is not None
+
+    assert activity["commits"] == 1
+    assert activity["history_inserts"] == 1
+    with Session() as db:
+        actions = db.scalars(select(PointHistory.action).order_by(PointHistory.id)).all()
+        assert actions == ["game_completed", "game_won", "game_score_pong", "game_perfect"]
+        profile = db.get(UserProfile, "ana")
+        assert profile.total_points == profile.experience == sum(POINT_VALUES[a] for a in actions)
+        assert profile.level == GamificationService.calculate_level(profile.experience)
+
+
+def test_award_many_applies_counters_and_badges_once(Session, activity):
+    with Session() as db:
+        db.add(UserProfile(user_id="ana", total_likes_received=99, experience=4900, total_points=4900))
+        db.commit()
+    activity["commits"] = 0
+
+    with Session() as db:
+        profile = GamificationService.award_many(
+            db, "ana",
+            [{"action": "like_received", "description": "like", "related_cv_id": None}],
+            counters_delta={"total_likes_received": 1},
+        )
+        assert profile.total_likes_received == 100
+        # 'popular' por contador + 'legend' al llegar a nivel 5 con esos puntos
+        assert profile.badges == ["popular", "legend"]
+        assert profile.level == 5 and profile.rank_title == "Leyenda"
+        assert profile.total_points == 4900 + 20 + 2 * POINT_VALUES["badge_earned"]
+
+    assert activity["commits"] == 1
+    assert activity["history_inserts"] == 1
+
+    with Session() as db:
+        # Volver a otorgar no repite badges
+        profile = GamificationService.award_many(db, "ana", [{"action": "like_given"}])
+        assert profile.badges == ["popular", "legend"]
+        badge_rows = db.scalar(select(func.count()).select_from(PointHistory).where(PointHistory.action == "badge_earned"))
+        assert badge_rows == 2
+
+
+def test_award_many_creates_missing_profile_and_respects_commit_flag(Session):
+    with Session() as db:
+        profile = GamificationService.award_many(
+            db, "ana", [{"action": "cv_created"}], counters_delta={"cvs_created": 1}, commit=False
+        )
+        assert profile.cvs_created == 1 and profile.total_points == POINT_VALUES["cv_created"]
+        db.rollback()
+
+    with Session() as db:
+        assert db.get(UserProfile, "ana") is None
+        assert GamificationService.award_many(db, "ana", [{"action": "accion_sin_puntos"}]) is None
+        assert db.scalar(select(func.count(GameSession.id))) == 0
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Tests para el benchmark de modelos (contra el servidor falso de Ollama)"""
+import json
+
+from app.benchmark import harness
+from app.benchmark.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+
+
+def test_report_has_percentiles_tokens_and_parse_rate():
+    config = FakeOllamaConfig(time_scale=0, tokens_per_second=50)
+    with FakeOllamaServer(config) as server:
+        report = harness.run_benchmark(server.base_url, ["gemma3:1b"], iterations=4, warmup=1, concurrency=2)
+
+    assert report["schema_version"] == harness.SCHEMA_VERSION
+    by_task = {r["test"]: r for r in report["results"]}
+    assert set(by_task) == {"improve-bullets", "review-cv"}
+    bullets = by_task["improve-bullets"]
+    assert bullets["iterations"] == 4
+    assert bullets["success_rate"] == 1.0
+    assert bullets["p50_seconds"] <= bullets["p95_seconds"] <= bullets["p99_seconds"]
+    assert bullets["tokens_per_second"] == 50
+    assert by_task["review-cv"]["quality_score"] == 5
+    # 1 de calentamiento + 4 iteraciones por tarea
+    assert server.fake.requests["chat"] == 10
+
+
+def test_failures_lower_success_rate():
+    with FakeOllamaServer(FakeOllamaConfig(time_scale=0, failure_rate=1.0)) as server:
+        report = harness.run_benchmark(server.base_url, ["gemma3:1b"], tasks=("review-cv",), iterations=2, warmup=0)
+    result = report["results"][0]
+    assert result["success_rate"] == 0
+    assert result["errors"] == 2
+    assert "500" in result["last_error"]
+
+
+def test_legacy_baseline_and_regressions(tmp_path):
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(json.dumps([
+        {"model": "gemma3:1b", "test": "improve-bullets", "success": True, "time_seconds": 6.5},
+        {"model": "qwen3:4b", "test": "review-cv", "success": False, "time_seconds": 120, "error": "TIMEOUT"},
+    ]))
+    baseline = harness.load_baseline(str(legacy))
+    assert baseline[("gemma3:1b", "improve-bullets")] == {"p50_seconds": 6.5, "success_rate": 1.0}
+
+    report = {"results": [
+        {"model": "gemma3:1b", "test": "improve-bullets", "p50_seconds": 7.5, "success_rate": 1.0},
+        {"model": "qwen3:4b", "test": "review-cv", "p50_seconds": 90, "success_rate": 0.5},
+    ]}
+    assert harness.find_regressions(report, baseline, threshold=0.2) == []
+    report["results"][0].update(p50_seconds=8.0, success_rate=0.5)
+    regressions = harness.find_regressions(report, baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert all(r.startswith("gemma3:1b · improve-bullets") for r in regressions)
+
+
+def test_cli_fails_on_regression_against_saved_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    common = ["--models", "gemma3:1b", "--tasks", "improve-bullets", "--iterations", "3",
+              "--warmup", "0", "--output-dir", str(tmp_path / "runs")]
+
+    fast = FakeOllamaConfig(base_latency=0.01, tokens_per_second=10_000, prompt_tokens_per_second=100_000)
+    with FakeOllamaServer(fast) as server:
+        assert harness.main(common + ["--base-url", server.base_url, "--baseline", "",
+                                      "--write-baseline", str(baseline)]) == 0
+    saved = json.loads(baseline.read_text())
+    assert saved[0]["success"] is True and saved[0]["time_seconds"] == saved[0]["p50_seconds"]
+    assert len(list((tmp_path / "runs").iterdir())) == 1
+
+    slow = FakeOllamaConfig(base_latency=0.2, tokens_per_second=10_000, prompt_tokens_per_second=100_000)
+    with FakeOllamaServer(slow) as server:
+        assert harness.main(common + ["--base-url", server.base_url, "--baseline", str(baseline)]) == 1
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Tests para la caché de sugerencias por bullet"""
+import json as jsonlib
+
+from app.services import ollama_service
+from app.services.bullet_cache_service import BulletCache, normalize_bullet
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self._content = content
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"message": {"content": self._content}}
+
+
+def _fake_ollama(monkeypatch):
+    """Devuelve cada bullet en mayúsculas y registra los textos enviados"""
+    sent = []
+
+    def fake_post(url, json=None, timeout=None):
+        lines = json["messages"][-1]["content"].split("\n- ")[1:]
+        sent.append(lines)
+        return FakeResponse(jsonlib.dumps({"bullets": [line.upper() for line in lines]}))
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+    return sent
+
+
+def test_normalize_bullet():
+    assert normalize_bullet("  - Trabajé   en EQUIPO. ") == "trabaje en equipo"
+    assert normalize_bullet("• Desarrollé aplicaciones web") == normalize_bullet("desarrolle aplicaciones web")
+
+
+def test_lru_and_ttl():
+    cache = BulletCache(max_size=2, ttl=60)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")  # expulsa "b", el menos usado
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+
+    expired = BulletCache(ttl=-1)
+    expired.set("a", "A")
+    assert expired.get("a") is None
+
+
+def test_only_new_bullets_are_sent(monkeypatch):
+    """Los bullets ya vistos salen de la caché; solo los nuevos llegan al modelo"""
+    sent = _fake_ollama(monkeypatch)
+
+    first = ollama_service.improve_bullets("gemma3:1b", ["Trabajé en equipo", "Desarrollé apps"])
+    second = ollama_service.improve_bullets(
+        "gemma3:1b", ["trabajé en equipo.", "Lideré un equipo", "Lideré un equipo"]
+    )
+
+    assert first == ["TRABAJÉ EN EQUIPO", "DESARROLLÉ APPS"]
+    assert second == ["TRABAJÉ EN EQUIPO", "LIDERÉ UN EQUIPO", "LIDERÉ UN EQUIPO"]
+    assert sent == [["Trabajé en equipo", "Desarrollé apps"], ["Lideré un equipo"]]
+
+    # Otra instrucción u otro modelo no reutilizan las sugerencias
+    ollama_service.improve_bullets("gemma3:1b", ["Trabajé en equipo"], instruction="Hazlo breve")
+    ollama_service.improve_bullets("qwen3:0.6b", ["Trabajé en equipo"])
+    assert len(sent) == 4
+    assert ollama_service.improve_bullets("gemma3:1b", ["Desarrollé apps"]) == ["DESARROLLÉ APPS"]
+    assert len(sent) == 4
+
+
+def test_failed_generation_is_not_cached(monkeypatch):
+    calls = []
+
+    def fake_post(url, json=None, timeout=None):
+        calls.append(1)
+        return FakeResponse("sin JSON")
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+
+    assert ollama_service.improve_bullets("gemma3:1b", ["Trabajé en equipo"]) == ["Trabajé en equipo"]
+    assert ollama_service.improve_bullets("gemma3:1b", ["Trabajé en equipo"]) == ["Trabajé en equipo"]
+    assert len(calls) == 4  # generación + reparación en cada llamada
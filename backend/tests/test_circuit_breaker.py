@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Tests para el circuit breaker del cliente de Ollama"""
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ollama_service
+from app.services.circuit_breaker_service import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+client = TestClient(app)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"message": {"content": '{"bullets": ["Lideré el equipo"]}'}}
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    breaker.before_call()
+    breaker.record_failure(RuntimeError("timeout"))
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    breaker.record_failure(RuntimeError("timeout"))
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.12)
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # petición de prueba
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # solo una prueba a la vez
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure(RuntimeError("caído"))
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure(RuntimeError("sigue caído"))
+    assert breaker.state == OPEN
+
+
+def test_open_circuit_fails_fast_and_is_reported(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    monkeypatch.setattr(ollama_service, "breaker", breaker)
+    monkeypatch.setattr("app.api.routes_ollama.breaker", breaker)
+    monkeypatch.setattr("app.main.breaker", breaker)
+    posts = []
+
+    def failing_post(url, json=None, timeout=None):
+        posts.append(url)
+        raise requests.exceptions.ConnectTimeout("sin conexión")
+
+    monkeypatch.setattr(ollama_service.requests, "post", failing_post)
+
+    # Los fallos siguen devolviendo los bullets originales hasta abrir el circuito
+    assert ollama_service.improve_bullets("phi3.5:latest", ["a"]) == ["a"]
+    assert ollama_service.improve_bullets("phi3.5:latest", ["b"]) == ["b"]
+    assert breaker.state == OPEN
+
+    start = time.time()
+    response = client.post("/ollama/improve-bullets", json={"bullets": ["c"], "model": "phi3.5:latest"})
+    assert time.time() - start < 1
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+    assert len(posts) == 2
+
+    assert client.post("/ollama/review-cv", json={"cv_data": {"name": "Ana"}}).status_code == 503
+    assert client.get("/health").json()["ollama"]["circuit"]["state"] == OPEN
+
+
+def test_client_errors_do_not_open_circuit(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(ollama_service, "breaker", breaker)
+
+    class NotFound(FakeResponse):
+        status_code = 404
+
+        def raise_for_status(self):
+            raise requests.exceptions.HTTPError("modelo no encontrado")
+
+    monkeypatch.setattr(ollama_service.requests, "post", lambda url, json=None, timeout=None: NotFound())
+    assert ollama_service.improve_bullets("no-existe:1b", ["a"]) == ["a"]
+    assert breaker.state == CLOSED
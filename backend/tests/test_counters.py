@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Tests para los contadores atómicos (UPDATE col = col + :delta)"""
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, CV, Like, PointHistory, User, UserProfile, POINT_VALUES
+from app.models.db import create_db_engine
+from app.services import counter_service as counters
+from app.services.gamification_service import GamificationService
+
+LIKERS = 2000
+THREADS = 16
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'counters.db'}", profile="tuned",
+                              pool_size=THREADS, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add(User(id="owner", username="owner", email="owner@x.com", hashed_password="x"))
+        db.add(UserProfile(user_id="owner"))
+        db.add(CV(id="cv1", user_id="owner", name="CV", slug="cv1", yaml_content="cv: {}", is_published=True))
+        db.commit()
+    yield Session
+    engine.dispose()
+
+
+def test_increment_returns_new_values_and_syncs_session(Session):
+    with Session() as db:
+        cv = db.get(CV, "cv1")
+        assert cv.total_likes == 0
+        result = counters.increment(db, CV, "cv1", returning=("user_id",), total_likes=3, total_visits=2)
+        assert result == {"total_likes": 3, "total_visits": 2, "user_id": "owner"}
+        assert cv.total_likes == 3  # la instancia cargada ve el valor nuevo
+        assert counters.increment(db, CV, "cv1", floor=0, total_likes=-10)["total_likes"] == 0
+        assert counters.increment(db, CV, "no-existe", total_likes=1) is None
+        with pytest.raises(ValueError):
+            counters.increment(db, CV, "cv1", name=1)
+        # Con where la fila que no cumple la condición no cambia
+        assert counters.increment(db, CV, "cv1", where=CV.total_likes > 0, total_likes=-1) is None
+        db.commit()
+
+
+def test_unlike_deducts_points_only_with_likes_received(Session):
+    with Session() as db:
+        db.add(User(id="fan", username="fan", email="fan@x.com", hashed_password="x"))
+        db.add(UserProfile(user_id="fan", total_likes_given=1))
+        db.get(UserProfile, "owner").total_points = 50
+        db.get(UserProfile, "owner").experience = 50
+        # Like heredado sin total_likes_received: quitarlo no resta puntos
+        db.add(Like(cv_id="cv1", user_id="fan"))
+        db.commit()
+
+    with Session() as db:
+        GamificationService.toggle_like(db, "cv1", "fan")
+        owner, fan = db.get(UserProfile, "owner"), db.get(UserProfile, "fan")
+        assert (owner.total_likes_received, owner.total_points, owner.experience) == (0, 50, 50)
+        assert fan.total_likes_given == 0
+
+    with Session() as db:
+        GamificationService.toggle_like(db, "cv1", "fan")  # like
+        GamificationService.toggle_like(db, "cv1", "fan")  # y se quita
+        owner = db.get(UserProfile, "owner")
+        assert (owner.total_likes_received, owner.total_points, owner.experience) == (0, 50, 50)
+        assert db.get(CV, "cv1").total_likes == 0
+
+
+def _run(Session, action, user_ids):
+    errors = []
+    chunks = [user_ids[i::THREADS] for i in range(THREADS)]
+    barrier = threading.Barrier(THREADS)
+
+    def worker(chunk):
+        db = Session()
+        barrier.wait()
+        try:
+            for user_id in chunk:
+                try:
+                    action(db, user_id)
+                except Exception as e:
+                    db.rollback()
+                    errors.append(repr(e))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_parallel_likes_keep_exact_totals(Session):
+    user_ids = [f"u-{uuid.uuid4().hex[:8]}" for _ in range(LIKERS)]
+    with Session() as db:
+        db.add_all(User(id=u, username=u, email=f"{u}@x.com", hashed_password="x") for u in user_ids)
+        # La mitad sin perfil: add_points lo crea
+        db.add_all(UserProfile(user_id=u) for u in user_ids[::2])
+        db.commit()
+
+    errors = _run(Session, lambda db, u: GamificationService.toggle_like(db, "cv1", u), user_ids)
+    assert errors == []
+
+    with Session() as db:
+        assert db.get(CV, "cv1").total_likes == LIKERS
+        assert db.scalar(select(func.count(Like.id))) == LIKERS
+        owner = db.get(UserProfile, "owner")
+        assert owner.total_likes_received == LIKERS
+        assert sorted(owner.badges) == ["legend", "popular"]  # 40.000 puntos: nivel 5
+        # El contador de puntos coincide con el historial
+        ledger = db.scalar(select(func.sum(PointHistory.points)).where(PointHistory.user_id == "owner"))
+        assert owner.total_points == owner.experience == ledger
+        assert ledger == LIKERS * POINT_VALUES['like_received'] + 2 * POINT_VALUES['badge_earned']
+        given = db.scalars(select(UserProfile.total_likes_given).where(UserProfile.user_id != "owner")).all()
+        assert len(given) == LIKERS and set(given) == {1}
+
+    # Quitar la mitad de los likes en paralelo
+    errors = _run(Session, lambda db, u: GamificationService.toggle_like(db, "cv1", u), user_ids[: LIKERS // 2])
+    assert errors == []
+    with Session() as db:
+        assert db.get(CV, "cv1").total_likes == LIKERS // 2
+        owner = db.get(UserProfile, "owner")
+        assert owner.total_likes_received == LIKERS // 2
+        assert owner.total_points == (LIKERS // 2) * POINT_VALUES['like_received'] + 2 * POINT_VALUES['badge_earned']
+
+
+def test_parallel_comments_count_exactly(Session):
+    user_ids = [f"c-{i}" for i in range(200)]
+    with Session() as db:
+        db.add_all(User(id=u, username=u, email=f"{u}@x.com", hashed_password="x") for u in user_ids)
+        db.commit()
+
+    errors = _run(Session, lambda db, u: GamificationService.add_comment(db, "cv1", u, "Buen CV"), user_ids)
+    assert errors == []
+    with Session() as db:
+        assert db.get(CV, "cv1").total_comments == len(user_ids)
+        commented = db.scalars(select(UserProfile.total_comments).where(UserProfile.user_id.in_(user_ids))).all()
+        assert len(commented) == len(user_ids) and set(commented) == {1}
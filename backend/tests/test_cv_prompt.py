@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Tests para la serialización compacta del CV en el prompt de revisión"""
+from app.services import ollama_service
+from app.services.cv_prompt_service import serialize_cv, estimate_tokens, PromptSavings
+
+WIZARD_CV = {
+    "name": "Ana Gómez", "email": "ana@correo.com", "phone": "+57 300", "location": "Bogotá", "linkedin": "",
+    "experience": [
+        {"company": "Acme", "position": "Backend Dev", "dates": "2021 - 2024", "location": "",
+         "highlights": "Diseñé APIs REST\n\n- Reduje la latencia un 30%"},
+        {"company": "Beta", "position": "Junior Dev", "dates": "2019 - 2021", "location": "Cali",
+         "highlights": "Mantuve scripts"},
+    ],
+    "education": [{"institution": "UNAL", "degree": "Ingeniería", "dates": "2014 - 2019", "location": ""}],
+    "skills": "Python, FastAPI", "summary": "", "theme": "classic",
+    "sections": {"idiomas": ["Español", "Inglés B2"], "certificaciones": [{"name": "AWS SA", "issuer": "AWS"}]},
+}
+
+
+def test_compact_text_drops_empty_and_frontend_fields():
+    text, report = serialize_cv(WIZARD_CV)
+
+    assert text.splitlines() == [
+        "Nombre: Ana Gómez | Ubicación: Bogotá",
+        "Contacto: email, teléfono",
+        "EXPERIENCIA:",
+        "- Backend Dev @ Acme (2021 - 2024): Diseñé APIs REST; Reduje la latencia un 30%",
+        "- Junior Dev @ Beta (2019 - 2021, Cali): Mantuve scripts",
+        "HABILIDADES: Python, FastAPI",
+        "EDUCACIÓN:",
+        "- Ingeniería @ UNAL (2014 - 2019)",
+        "CERTIFICACIONES:",
+        "- AWS SA @ AWS",
+        "IDIOMAS: Español, Inglés B2",
+    ]
+    assert "classic" not in text and "ana@correo.com" not in text
+    assert report["compact_tokens"] == estimate_tokens(text)
+    assert report["saved_tokens"] > 0 and report["savings_ratio"] > 0.4
+    assert report["truncated_sections"] == []
+
+
+def test_budget_truncates_least_important_sections_first():
+    full, _ = serialize_cv(WIZARD_CV)
+    text, report = serialize_cv(WIZARD_CV, budget=estimate_tokens(full) - 15)
+
+    assert estimate_tokens(text) <= estimate_tokens(full) - 15
+    assert report["truncated_sections"][0] == "IDIOMAS"
+    assert "EXPERIENCIA" not in report["truncated_sections"]
+    assert "Backend Dev @ Acme" in text
+
+
+def test_review_cv_sends_compact_text_and_reports_savings(monkeypatch):
+    sent = []
+
+    class FakeResponse:
+        status_code = 200
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"message": {"content": "### 🌟 Fortalezas"}}
+
+    def fake_post(url, json=None, timeout=None):
+        sent.append(json)
+        return FakeResponse()
+
+    savings = PromptSavings()
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+    monkeypatch.setattr(ollama_service, "prompt_savings", savings)
+
+    ollama_service.review_cv("gemma3:1b", WIZARD_CV)
+
+    user_content = sent[0]["messages"][1]["content"]
+    assert "Backend Dev @ Acme" in user_content
+    assert "{" not in user_content
+    stats = savings.get_stats()
+    assert stats["requests"] == 1 and stats["saved_tokens"] > 0
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Tests para el servidor falso de Ollama"""
+import json
+
+import pytest
+import requests
+
+from app.benchmark.fake_ollama import FakeOllama, FakeOllamaConfig, FakeOllamaServer
+from app.services import ollama_service
+from app.services.circuit_breaker_service import CircuitOpenError, OPEN
+from app.services.model_registry_service import ModelRegistry
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeOllamaServer(FakeOllamaConfig(time_scale=0)) as server:
+        monkeypatch.setattr(ollama_service, "OLLAMA_BASE", server.base_url)
+        yield server
+
+
+def test_tags_feed_the_model_registry(server):
+    registry = ModelRegistry(base_url=server.base_url)
+    assert registry.list_names() == ["phi3.5:latest", "gemma3:1b", "qwen3:0.6b"]
+    assert registry.get_metadata("gemma3:1b")["parameter_count"] == 1e9
+
+
+def test_services_run_end_to_end(server):
+    improved = ollama_service.improve_bullets("gemma3:1b", ["Trabajé en equipo", "Hice reportes"])
+    assert improved == [
+        "Lideré y optimicé: Trabajé en equipo con impacto medible [X]%",
+        "Lideré y optimicé: Hice reportes con impacto medible [X]%",
+    ]
+    assert "### 🌟 Fortalezas" in ollama_service.review_cv("gemma3:1b", {"name": "Ana"})
+    insights = ollama_service.generate_text(
+        "Analiza", model="qwen3:0.6b", response_format={
+            "type": "object",
+            "properties": {"reasoning": {"type": "string"}, "player_patterns": {"type": "array", "items": {"type": "string"}}},
+            "required": ["reasoning", "player_patterns"],
+        }
+    )
+    assert json.loads(insights) == {"reasoning": "texto", "player_patterns": ["texto"]}
+    assert server.fake.requests["chat"] == 2
+
+
+def test_streaming_and_token_stats(server):
+    resp = requests.post(
+        f"{server.base_url}/chat",
+        json={"model": "phi3.5:latest", "messages": [{"role": "user", "content": "hola"}]},
+        stream=True, timeout=5,
+    )
+    chunks = [json.loads(line) for line in resp.iter_lines() if line]
+    assert all(not c["done"] for c in chunks[:-1])
+    assert chunks[-1]["done"] and chunks[-1]["eval_count"] > 0
+    text = "".join(c["message"]["content"] for c in chunks)
+    assert text.startswith("### 🌟 Fortalezas")
+
+
+def test_latency_follows_tokens_per_second():
+    config = FakeOllamaConfig(tokens_per_second=100, base_latency=0.05, responses={"generate": "x" * 40})
+    with FakeOllamaServer(config) as server:
+        resp = requests.post(f"{server.base_url}/generate",
+                             json={"model": "gemma3:1b", "prompt": "", "stream": False}, timeout=5)
+    data = resp.json()
+    assert data["eval_count"] == 10
+    assert data["eval_duration"] == pytest.approx(0.1e9)
+    assert resp.elapsed.total_seconds() >= 0.15
+
+
+def test_unknown_model_is_not_marked_as_loaded():
+    fake = FakeOllama(FakeOllamaConfig(load_seconds=2.0))
+    payload = {"model": "nuevo:1b", "prompt": "hola"}
+    assert fake.generate("generate", payload)[0] == 404
+
+    # Si el modelo se instala después, su primera petición sigue siendo en frío
+    fake.config.models["nuevo:1b"] = 800_000_000
+    status, body, _ = fake.generate("generate", payload)
+    assert status == 200
+    assert body["load_duration"] == int(2.0 * 1e9)
+
+
+def test_failures_open_the_circuit(monkeypatch):
+    with FakeOllamaServer(FakeOllamaConfig(failure_rate=1.0, time_scale=0)) as server:
+        monkeypatch.setattr(ollama_service, "OLLAMA_BASE", server.base_url)
+        for _ in range(3):
+            assert ollama_service.generate_text("hola", model="gemma3:1b") == ""
+        assert ollama_service.breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            ollama_service.review_cv("gemma3:1b", {"name": "Ana"})
+        assert server.fake.requests["failed"] == 3
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Tests para la mejor puntuación por usuario y juego (user_game_best)"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, GameSession, PointHistory, User, UserGameBest
+from app.models.db import create_db_engine
+from app.services.gamification_service import GamificationService
+
+PLAYERS = [f"p{i}" for i in range(4)]
+
+
+@pytest.fixture
+def Session(tmp_path):
+    # Archivo con el perfil tuned (WAL + busy_timeout), como en producción
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'games.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        for user_id in PLAYERS:
+            db.add(User(id=user_id, username=user_id, email=f"{user_id}@x.com", hashed_password="x"))
+        db.commit()
+    return Session
+
+
+def _play(Session, user_id, game_id, score):
+    with Session() as db:
+        return GamificationService.record_game_session(db, user_id, game_id, score=score)
+
+
+def test_leaderboard_has_one_row_per_user(Session):
+    for score in range(40):
+        _play(Session, "p0", "snake", score)
+    _play(Session, "p1", "snake", 20)
+    _play(Session, "p2", "snake", 39)  # empata con p0, que llegó antes
+
+    with Session() as db:
+        board = GamificationService.get_game_leaderboard(db, "snake")
+    assert [(row["user_id"], row["score"]) for row in board] == [("p0", 39), ("p2", 39), ("p1", 20)]
+    assert board[0]["games_played"] == 40
+
+
+def test_concurrent_submissions_keep_the_best(Session):
+    rng = random.Random(50)
+    plays = [(rng.choice(PLAYERS), rng.choice(["snake", "tetris"]), rng.randint(0, 500)) for _ in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda play: _play(Session, *play), plays))
+
+    with Session() as db:
+        expected = {
+            (user_id, game_id): (best, played)
+            for user_id, game_id, best, played in db.execute(
+                select(GameSession.user_id, GameSession.game_id, func.max(GameSession.score), func.count())
+                .group_by(GameSession.user_id, GameSession.game_id)
+            )
+        }
+        rows = db.scalars(select(UserGameBest)).all()
+        assert {(r.user_id, r.game_id): (r.best_score, r.games_played) for r in rows} == expected
+        for row in rows:
+            assert db.get(GameSession, row.session_id).score == row.best_score
+
+
+def test_high_score_compares_with_previous_best(Session):
+    for score in (10, 8, 10, 11):
+        _play(Session, "p0", "snake", score)
+
+    with Session() as db:
+        records = db.scalars(
+            select(PointHistory.description).where(PointHistory.action == "game_high_score")
+        ).all()
+        assert records == ["¡Nuevo récord en Snake: 10 manzanas!", "¡Nuevo récord en Snake: 11 manzanas!"]
+
+        scores = GamificationService.get_user_best_scores(db, "p0")
+        assert [(s["game_id"], s["best_score"], s["games_played"]) for s in scores] == [("snake", 11, 4)]
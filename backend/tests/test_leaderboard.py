@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Tests para el ranking por puntos en memoria"""
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.models.database import CV, User, UserProfile, POINT_VALUES
+from app.services.gamification_service import GamificationService
+from app.services.leaderboard_service import RankedBoard, leaderboard
+
+client = TestClient(app)
+
+
+def _seed(db):
+    for u in range(20):
+        db.add(User(id=f"u{u:02d}", username=f"user{u}", email=f"u{u}@x.com", hashed_password="x"))
+        # u00 sin puntos: no aparece en el ranking
+        db.add(UserProfile(user_id=f"u{u:02d}", total_points=5 * (u % 6)))
+    db.add(CV(id="cv1", user_id="u01", name="CV", slug="cv", yaml_content="cv: {}", is_published=True))
+
+
+@pytest.fixture
+def Session(memory_db):
+    return memory_db(_seed)
+
+
+def _db_order(db) -> list:
+    """Orden de referencia calculado por la base"""
+    return [tuple(row) for row in db.execute(
+        select(UserProfile.user_id, UserProfile.total_points)
+        .where(UserProfile.total_points > 0)
+        .order_by(UserProfile.total_points.desc(), UserProfile.user_id.desc())
+    )]
+
+
+def test_ranked_board_orders_like_the_database():
+    board = RankedBoard()
+    board.load([("a", 10), ("b", 30), ("c", 10), ("d", 0)])
+    assert board.top(10) == [("b", 30), ("c", 10), ("a", 10)]
+    assert [board.rank(m) for m in "abcd"] == [3, 1, 2, None]
+
+    board.set("a", 40)
+    board.set("b", 0)
+    assert board.top(10) == [("a", 40), ("c", 10)]
+    assert board.page(5, after=(40, "a")) == [("c", 10)]
+    assert board.top(1, offset=1) == [("c", 10)]
+
+
+def test_around_returns_neighbours():
+    board = RankedBoard()
+    board.load([(f"m{i:02d}", 100 - i) for i in range(30)])
+    around = board.around("m10", radius=2)
+    assert around == [(9, "m08", 92), (10, "m09", 91), (11, "m10", 90), (12, "m11", 89), (13, "m12", 88)]
+    assert [rank for rank, _, _ in board.around("m00", radius=2)] == [1, 2, 3]
+    assert board.around("nadie") == []
+
+
+def test_points_reach_the_board_on_commit(Session):
+    with Session() as db:
+        leaderboard.ensure_built(db)
+        assert leaderboard.board.rank("u00") is None
+
+        GamificationService.add_points(db, "u00", "cv_created")
+        assert leaderboard.board.score("u00") == POINT_VALUES["cv_created"]
+
+        GamificationService.award_many(db, "u00", [{"action": "cv_published"}], commit=False)
+        db.rollback()
+        assert leaderboard.board.score("u00") == POINT_VALUES["cv_created"]
+
+        assert _db_order(db) == leaderboard.board.top(100)
+
+
+def test_older_total_committed_late_is_ignored(Session):
+    with Session() as first, Session() as second:
+        leaderboard.ensure_built(first)
+        # La base ordena los UPDATE: first anotó su total antes que second
+        leaderboard.track(first, "u05", 100)
+        leaderboard.track(second, "u05", 120)
+        # ...pero el hook after_commit de second corre primero
+        second.commit()
+        first.commit()
+
+    assert leaderboard.board.score("u05") == 120
+    assert leaderboard.get_stats()["stale_updates"] == 1
+
+
+def test_random_activity_stays_consistent_with_db(Session):
+    rng = random.Random(48)
+    users = [f"u{u:02d}" for u in range(20)]
+    with Session() as db:
+        leaderboard.ensure_built(db)
+    for _ in range(150):
+        with Session() as db:
+            op = rng.random()
+            if op < 0.6:
+                GamificationService.add_points(db, rng.choice(users), rng.choice(["cv_created", "like_given", "comment_posted"]))
+            else:
+                GamificationService.toggle_like(db, "cv1", rng.choice(users))
+
+    with Session() as db:
+        expected = _db_order(db)
+        assert leaderboard.board.top(100) == expected
+        leaderboard.rebuild(db)
+        assert leaderboard.board.top(100) == expected
+
+
+def test_rank_endpoint(Session):
+    with Session() as db:
+        expected = _db_order(db)
+
+    data = client.get("/gamification/leaderboard/rank/u07?radius=1").json()
+    position = [user_id for user_id, _ in expected].index("u07") + 1
+    assert data["rank"] == position
+    assert data["total_ranked"] == len(expected) == 16
+    assert [(u["rank"], u["user_id"]) for u in data["around"]] == [
+        (position + i, expected[position - 1 + i][0]) for i in (-1, 0, 1)
+    ]
+    assert client.get("/gamification/leaderboard/rank/u00").status_code == 404
+
+    page = client.get("/gamification/leaderboard?limit=5").json()
+    assert [u["user_id"] for u in page["leaderboard"]] == [user_id for user_id, _ in expected[:5]]
+    assert page["total"] == 16
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Tests para la mejora concurrente de bullets"""
+import threading
+import time
+
+from app.services import ollama_service
+from app.services.llm_concurrency_service import ConcurrencyLimiter, map_concurrently
+from app.api.routes_cv import improve_sections_highlights
+
+
+def test_map_concurrently_keeps_order_and_falls_back():
+    """Los resultados conservan el orden y un fallo usa el fallback"""
+    def fn(x):
+        time.sleep(0.01 * (5 - x))
+        if x == 2:
+            raise RuntimeError("fallo")
+        return x * 10
+
+    results = map_concurrently(fn, [0, 1, 2, 3, 4], fallback=lambda x: -x)
+    assert results == [0, 10, -2, 30, 40]
+
+
+def test_limiter_bounds_global_and_per_model():
+    """Nunca se superan los cupos global y por modelo"""
+    limiter = ConcurrencyLimiter(global_limit=3, per_model_limit=2)
+    lock = threading.Lock()
+    running = {"total": 0, "a": 0, "b": 0}
+    peak = {"total": 0, "a": 0, "b": 0}
+
+    def work(model):
+        with limiter.slot(model):
+            with lock:
+                running["total"] += 1
+                running[model] += 1
+                for key in ("total", model):
+                    peak[key] = max(peak[key], running[key])
+            time.sleep(0.02)
+            with lock:
+                running["total"] -= 1
+                running[model] -= 1
+
+    threads = [threading.Thread(target=work, args=("a" if i % 2 else "b",)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak["total"] <= 3
+    assert peak["a"] <= 2
+    assert peak["b"] <= 2
+
+
+def test_improve_sections_runs_entries_concurrently(monkeypatch):
+    """La latencia total se acerca a la de la llamada más lenta"""
+    def fake_improve(model, bullets, instruction=None, **kwargs):
+        time.sleep(0.2)
+        if bullets == ["falla"]:
+            raise RuntimeError("Ollama caído")
+        return [b.upper() for b in bullets]
+
+    monkeypatch.setattr(ollama_service, "improve_bullets", fake_improve)
+
+    sections = {
+        "experiencia": [
+            {"company": "A", "highlights": ["uno"]},
+            {"company": "B", "highlights": ["falla"]},
+            {"company": "C", "highlights": ["tres"]},
+        ],
+        "skills": ["Python"],
+    }
+
+    start = time.time()
+    result = improve_sections_highlights("phi3.5:latest", sections)
+    elapsed = time.time() - start
+
+    assert [e["highlights"] for e in result["experiencia"]] == [["UNO"], ["falla"], ["TRES"]]
+    assert result["skills"] == ["Python"]
+    assert elapsed < 0.5
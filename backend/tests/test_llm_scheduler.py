@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Tests para el planificador de generaciones LLM"""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ollama_service
+from app.services.llm_scheduler_service import (
+    LLMScheduler, SchedulerBusyError, INTERACTIVE, REVIEW, TRAINING
+)
+
+client = TestClient(app)
+
+LIMITS = {
+    INTERACTIVE: {"max_concurrent": 1, "max_queue": 10},
+    REVIEW: {"max_concurrent": 1, "max_queue": 10},
+    TRAINING: {"max_concurrent": 1, "max_queue": 1},
+}
+
+
+def _hold_slot(scheduler, priority, user_key, started, release):
+    with scheduler.slot(priority, user_key):
+        started.set()
+        release.wait()
+
+
+def _wait_for_waiting(scheduler, count):
+    deadline = time.time() + 2
+    while scheduler.queue_depth() < count and time.time() < deadline:
+        time.sleep(0.005)
+
+
+def test_higher_priority_is_served_first():
+    scheduler = LLMScheduler(max_concurrent=1, class_limits=LIMITS)
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=_hold_slot, args=(scheduler, TRAINING, "t", started, release))
+    blocker.start()
+    started.wait()
+
+    order = []
+
+    def run(priority):
+        with scheduler.slot(priority, priority):
+            order.append(priority)
+
+    threads = []
+    for priority in (TRAINING, REVIEW, INTERACTIVE):
+        t = threading.Thread(target=run, args=(priority,))
+        t.start()
+        threads.append(t)
+        _wait_for_waiting(scheduler, len(threads))
+
+    release.set()
+    for t in threads + [blocker]:
+        t.join()
+    assert order == [INTERACTIVE, REVIEW, TRAINING]
+
+
+def test_training_cannot_take_every_slot():
+    scheduler = LLMScheduler(max_concurrent=2, class_limits=LIMITS)
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=_hold_slot, args=(scheduler, TRAINING, "t", started, release))
+    blocker.start()
+    started.wait()
+
+    # El segundo cupo sigue libre para peticiones interactivas
+    with scheduler.slot(INTERACTIVE, "u1"):
+        status = scheduler.get_status()["classes"]
+        assert status[TRAINING]["running"] == 1
+        assert status[INTERACTIVE]["running"] == 1
+
+    release.set()
+    blocker.join()
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    scheduler = LLMScheduler(max_concurrent=1, class_limits=LIMITS)
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=_hold_slot, args=(scheduler, TRAINING, "t", started, release))
+    blocker.start()
+    started.wait()
+
+    queued = threading.Thread(target=_hold_slot, args=(scheduler, TRAINING, "t", threading.Event(), release))
+    queued.start()
+    _wait_for_waiting(scheduler, 1)
+
+    with pytest.raises(SchedulerBusyError) as exc:
+        with scheduler.slot(TRAINING, "t"):
+            pass
+    assert exc.value.retry_after >= 1
+
+    release.set()
+    for t in (blocker, queued):
+        t.join()
+
+
+def test_users_share_slots_fairly():
+    scheduler = LLMScheduler(max_concurrent=1, class_limits=LIMITS)
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=_hold_slot, args=(scheduler, INTERACTIVE, "x", started, release))
+    blocker.start()
+    started.wait()
+
+    order = []
+
+    def run(user):
+        with scheduler.slot(INTERACTIVE, user):
+            order.append(user)
+
+    threads = []
+    for user in ("heavy", "heavy", "heavy", "light"):
+        t = threading.Thread(target=run, args=(user,))
+        t.start()
+        threads.append(t)
+        _wait_for_waiting(scheduler, len(threads))
+
+    release.set()
+    for t in threads + [blocker]:
+        t.join()
+    # "light" no espera a que terminen todas las peticiones de "heavy"
+    assert order.index("light") <= 1
+
+
+def test_busy_scheduler_returns_503(monkeypatch):
+    def busy(*args, **kwargs):
+        raise SchedulerBusyError(INTERACTIVE, 7)
+
+    monkeypatch.setattr(ollama_service, "_post", busy)
+    response = client.post("/ollama/improve-bullets", json={"bullets": ["a"], "model": "phi3.5:latest"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
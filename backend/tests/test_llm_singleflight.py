@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""Tests para la coalescencia de peticiones idénticas a Ollama"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, GameSession, GameTrainingData
+from app.services import ollama_service
+from app.services.game_training_service import GameTrainingService
+from app.services.llm_singleflight_service import SingleFlight, request_key
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+def _run_concurrently(fn, n):
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_singleflight_shares_result_and_errors():
+    """Las llamadas concurrentes con la misma clave se ejecutan una vez"""
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "ok"
+
+    assert _run_concurrently(lambda: flight.do("k", slow), 5) == ["ok"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", failing)
+    # Tras terminar, una nueva llamada vuelve a ejecutarse
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_request_key_depends_on_model_prompt_and_options():
+    base = {"model": "m", "messages": [{"role": "user", "content": "hola"}], "options": {"temperature": 0.4}}
+    assert request_key("chat", base) == request_key("chat", dict(base, stream=False))
+    assert request_key("chat", base) != request_key("chat", dict(base, model="otro"))
+    assert request_key("chat", base) != request_key("chat", dict(base, options={"temperature": 0.7}))
+
+
+def test_identical_reviews_share_one_generation(monkeypatch):
+    """Dos revisiones idénticas simultáneas generan una sola petición upstream"""
+    posts = []
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append(url)
+        time.sleep(0.1)
+        return FakeResponse({"message": {"content": "### 🌟 Fortalezas"}})
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+
+    cv = {"name": "Ana", "skills": ["Python"]}
+    reviews = _run_concurrently(lambda: ollama_service.review_cv("phi3.5:latest", cv), 3)
+
+    assert reviews == ["### 🌟 Fortalezas"] * 3
+    assert len(posts) == 1
+
+
+def test_analyze_game_with_ai_is_coalesced(monkeypatch):
+    """Los análisis simultáneos de la misma partida comparten la generación"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    session = GameSession(game_id="tictactoe", score=1, won=True)
+    db.add(session)
+    db.flush()
+    record = GameTrainingData(
+        session_id=session.id, game_id="tictactoe", moves_sequence=[],
+        player_won=True, player_score=1, total_moves=5
+    )
+    db.add(record)
+    db.commit()
+    record_id = record.id
+    db.close()
+
+    posts = []
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append(json)
+        time.sleep(0.1)
+        return FakeResponse({"response": '{"player_patterns": [], "ai_weaknesses": [], '
+                                         '"suggested_adjustments": {"max_depth": 4}, "reasoning": "ok"}'})
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+
+    def analyze():
+        local = Session()
+        try:
+            return GameTrainingService.analyze_game_with_ai(local, record_id, model="qwen3:0.6b")
+        finally:
+            local.close()
+
+    results = _run_concurrently(analyze, 3)
+
+    assert len(posts) == 1
+    assert posts[0]["options"] == {"num_predict": 500}
+    assert all(r["suggested_adjustments"] == {"max_depth": 4} for r in results)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Tests para la telemetría de tokens y latencia de Ollama"""
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ollama_service
+from app.services.llm_telemetry_service import LLMTelemetry, percentile
+
+client = TestClient(app)
+
+RESPONSE = {
+    "message": {"content": '{"bullets": ["Lideré un equipo de 5 personas"]}'},
+    "eval_count": 40,
+    "eval_duration": 2_000_000_000,
+    "prompt_eval_count": 300,
+    "prompt_eval_duration": 1_000_000_000,
+    "load_duration": 500_000_000,
+    "total_duration": 4_000_000_000,
+}
+
+
+class FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return RESPONSE
+
+
+def test_aggregates_tokens_per_second_and_shares(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    telemetry = LLMTelemetry(path=str(path))
+    telemetry.record("phi3.5:latest", "improve_bullets", RESPONSE, latency=4.1)
+    telemetry.record("phi3.5:latest", "improve_bullets", RESPONSE, latency=3.9)
+    telemetry.record_error("phi3.5:latest", "improve_bullets", latency=0.1, error="timeout")
+
+    [row] = telemetry.get_summary()
+    assert row["calls"] == 2
+    assert row["errors"] == 1
+    assert row["tokens_per_second"] == 20.0
+    assert row["prompt_tokens_per_second"] == 300.0
+    assert row["prompt_eval_share"] == 0.25
+    assert row["load_share"] == 0.125
+    assert row["avg_latency_seconds"] == 4.0
+
+    telemetry.flush()
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["ok"] for line in lines] == [True, True, False]
+    assert lines[0]["eval_count"] == 40
+
+
+def test_slow_disk_does_not_block_callers(tmp_path, monkeypatch):
+    path = tmp_path / "telemetry.jsonl"
+    telemetry = LLMTelemetry(path=str(path), max_pending=3)
+    release = threading.Event()
+    real_write = telemetry._write
+
+    def slow_write(records):
+        release.wait(2)
+        real_write(records)
+
+    monkeypatch.setattr(telemetry, "_write", slow_write)
+    start = time.time()
+    for _ in range(6):
+        telemetry.record("phi3.5:latest", "review_cv", RESPONSE, latency=1.0)
+    assert time.time() - start < 0.5
+    assert telemetry.get_summary()[0]["calls"] == 6  # los agregados no esperan al disco
+
+    release.set()
+    telemetry.flush()
+    written = len(path.read_text(encoding="utf-8").splitlines())
+    # Cola acotada: lo que no cupo se cuenta en lugar de esperar
+    assert written + telemetry.dropped_lines == 6
+    assert telemetry.dropped_lines >= 2
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([], 50) is None
+
+
+def test_calls_are_recorded_and_exposed(monkeypatch):
+    telemetry = LLMTelemetry(path="")
+    monkeypatch.setattr(ollama_service, "telemetry", telemetry)
+    monkeypatch.setattr("app.api.routes_ollama.telemetry", telemetry)
+    monkeypatch.setattr(ollama_service.requests, "post", lambda url, json=None, timeout=None: FakeResponse())
+
+    assert ollama_service.improve_bullets("phi3.5:latest", ["Trabajé en equipo"]) == ["Lideré un equipo de 5 personas"]
+
+    data = client.get("/ollama/metrics").json()
+    [row] = data["metrics"]
+    assert row["model"] == "phi3.5:latest"
+    assert row["task"] == "improve_bullets"
+    assert row["eval_tokens"] == 40
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Tests para las migraciones versionadas y los planes de las consultas frecuentes"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import and_, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.database import Base, CV, Comment, GameSession, User, UserGameBest, UserProfile, Visit
+from app.models.db import create_db_engine
+from app.models.migrations import MIGRATIONS, current_version, run_migrations
+
+NEW_INDEXES = {
+    "cvs": {"idx_cv_user_created_id", "idx_cv_published_created_id",
+            "idx_cv_published_likes_id", "idx_cv_published_visits_id"},
+    "comments": {"idx_comment_cv_parent_date_id"},
+    "point_history": {"idx_point_history_user_date"},
+    "user_profiles": {"idx_profile_points_user"},
+    "visits": {"idx_visit_dedup"},
+    "user_game_best": {"idx_game_best_rank"},
+}
+NEW_TABLES = ["user_game_best"]
+
+
+def _index_names(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """Base creada antes de los índices nuevos (como las ya desplegadas)"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for names in NEW_INDEXES.values():
+            for name in names:
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+        for table in NEW_TABLES:
+            conn.exec_driver_sql(f"DROP TABLE {table}")
+    return engine
+
+
+def test_migrations_add_indexes_to_existing_tables(legacy_engine):
+    assert current_version(legacy_engine) == 0
+
+    applied = run_migrations(legacy_engine)
+
+    assert applied == [number for number, _, _ in MIGRATIONS]
+    assert current_version(legacy_engine) == MIGRATIONS[-1][0]
+    for table, names in NEW_INDEXES.items():
+        assert names <= _index_names(legacy_engine, table)
+
+
+def test_best_scores_are_backfilled(legacy_engine):
+    with Session(legacy_engine) as db:
+        db.add(User(id="ana", username="ana", email="ana@x.com", hashed_password="x"))
+        db.add_all([
+            GameSession(user_id="ana", game_id="snake", score=score)
+            for score in (5, 12, 3, 12)
+        ] + [
+            GameSession(user_id="ana", game_id="pong", score=7),
+            GameSession(user_id=None, game_id="snake", score=99),  # demo: sin usuario
+        ])
+        db.commit()
+
+    run_migrations(legacy_engine)
+
+    with Session(legacy_engine) as db:
+        rows = {row.game_id: row for row in db.scalars(select(UserGameBest))}
+        assert set(rows) == {"snake", "pong"}
+        assert (rows["snake"].best_score, rows["snake"].games_played) == (12, 4)
+        # A igual puntuación queda la primera partida
+        assert rows["snake"].session_id == 2
+        assert (rows["pong"].best_score, rows["pong"].games_played) == (7, 1)
+
+
+def test_migrations_are_idempotent(legacy_engine):
+    run_migrations(legacy_engine)
+    assert run_migrations(legacy_engine) == []
+
+
+def test_models_declare_the_same_indexes(tmp_path):
+    """Una base nueva (create_all + migraciones) termina con el mismo esquema"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(bind=engine)
+    for table, names in NEW_INDEXES.items():
+        assert names <= _index_names(engine, table)
+    run_migrations(engine)
+    assert current_version(engine) == MIGRATIONS[-1][0]
+
+
+def _plan(engine, statement) -> str:
+    compiled = statement.compile(dialect=engine.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    params = [p.isoformat(" ") if isinstance(p, datetime) else p for p in params]
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(params)).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("name, statement, index", [
+    ("browse recientes",
+     select(CV).where(CV.is_published == True).order_by(CV.created_at.desc(), CV.id.desc()).limit(20),
+     "idx_cv_published_created_id"),
+    ("browse populares",
+     select(CV).where(CV.is_published == True).order_by(CV.total_likes.desc(), CV.id.desc()).limit(20),
+     "idx_cv_published_likes_id"),
+    ("browse visitados",
+     select(CV).where(CV.is_published == True).order_by(CV.total_visits.desc(), CV.id.desc()).limit(20),
+     "idx_cv_published_visits_id"),
+    ("browse populares, página siguiente",
+     select(CV).where(CV.is_published == True, CV.total_likes <= 7,
+                      or_(CV.total_likes < 7, and_(CV.total_likes == 7, CV.id < "cv9")))
+     .order_by(CV.total_likes.desc(), CV.id.desc()).limit(20),
+     "idx_cv_published_likes_id"),
+    ("mis CVs",
+     select(CV).where(CV.user_id == "u1").order_by(CV.created_at.desc(), CV.id.desc()),
+     "idx_cv_user_created_id"),
+    ("comentarios",
+     select(Comment).filter_by(cv_id="cv1", parent_id=None).order_by(Comment.created_at.desc(), Comment.id.desc()),
+     "idx_comment_cv_parent_date_id"),
+    ("leaderboard",
+     select(User, UserProfile).join(UserProfile).where(UserProfile.total_points > 0)
+     .order_by(UserProfile.total_points.desc(), UserProfile.user_id.desc()).limit(100),
+     "idx_profile_points_user"),
+    ("dedup de visitas",
+     select(Visit).where(Visit.cv_id == "cv1", Visit.visitor_ip == "1.2.3.4",
+                         Visit.created_at >= datetime.utcnow() - timedelta(hours=1)).limit(1),
+     "idx_visit_dedup"),
+    ("ranking de un juego",
+     select(UserGameBest).where(UserGameBest.game_id == "snake")
+     .order_by(UserGameBest.best_score.desc(), UserGameBest.session_id).limit(50),
+     "idx_game_best_rank"),
+])
+def test_hot_queries_use_indexes(legacy_engine, name, statement, index):
+    run_migrations(legacy_engine)
+    plan = _plan(legacy_engine, statement)
+    assert f"INDEX {index}" in plan, f"{name}: {plan}"
+    # El orden lo da el índice: sin ordenación en memoria
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, f"{name}: {plan}"
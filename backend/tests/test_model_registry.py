@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Tests para el registro en caché de modelos de Ollama"""
+import time
+
+import requests
+
+from app.services import model_registry_service
+from app.services.model_registry_service import ModelRegistry
+
+TAGS = {
+    "models": [
+        {
+            "name": "qwen3:0.6b",
+            "size": 522653767,
+            "details": {"family": "qwen3", "parameter_size": "751.63M", "quantization_level": "Q4_K_M"},
+        },
+        {
+            "name": "phi3.5:latest",
+            "size": 2176178913,
+            "details": {"family": "phi3", "parameter_size": "3.8B", "quantization_level": "Q4_0"},
+        },
+    ]
+}
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+def _fake_get(calls, fail=lambda: False):
+    def fake_get(url, timeout=None):
+        calls.append(url)
+        if fail():
+            raise requests.exceptions.ConnectionError("Ollama caído")
+        return FakeResponse(TAGS)
+    return fake_get
+
+
+def test_models_are_cached_with_metadata(monkeypatch):
+    calls = []
+    monkeypatch.setattr(model_registry_service.requests, "get", _fake_get(calls))
+    registry = ModelRegistry(base_url="http://ollama/api", ttl=60)
+
+    assert registry.list_names() == ["qwen3:0.6b", "phi3.5:latest"]
+    assert registry.list_names() == ["qwen3:0.6b", "phi3.5:latest"]
+    assert len(calls) == 1
+
+    meta = registry.get_metadata("phi3.5:latest")
+    assert meta["family"] == "phi3"
+    assert meta["quantization_level"] == "Q4_0"
+    assert meta["size_bytes"] == 2176178913
+    assert meta["parameter_count"] == 3.8e9
+
+
+def test_stale_list_is_served_while_ollama_is_down(monkeypatch):
+    calls = []
+    down = {"value": False}
+    monkeypatch.setattr(model_registry_service.requests, "get", _fake_get(calls, lambda: down["value"]))
+    registry = ModelRegistry(base_url="http://ollama/api", ttl=0, retry_interval=0)
+
+    assert len(registry.list_names()) == 2
+    down["value"] = True
+
+    # La caché venció: se sirve la lista anterior y se refresca en segundo plano
+    assert len(registry.list_names()) == 2
+    deadline = time.time() + 2
+    while registry.get_status()["last_refresh_ok"] is not False and time.time() < deadline:
+        time.sleep(0.01)
+
+    status = registry.get_status()
+    assert status["last_refresh_ok"] is False
+    assert status["stale"] is True
+    assert status["models_count"] == 2
+    assert len(calls) >= 2
+
+
+def test_first_load_failure_returns_empty_list(monkeypatch):
+    monkeypatch.setattr(model_registry_service.requests, "get", _fake_get([], lambda: True))
+    registry = ModelRegistry(base_url="http://ollama/api", ttl=60, retry_interval=60)
+
+    assert registry.list_names() == []
+    assert registry.is_available() is False
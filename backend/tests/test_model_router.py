@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Tests para el enrutado de modelos por presupuesto de latencia"""
+import threading
+
+import pytest
+
+from app.services import model_router_service
+from app.services.llm_scheduler_service import LLMScheduler, REVIEW
+from app.services.llm_telemetry_service import LLMTelemetry
+from app.services.model_router_service import ModelRouter, load_benchmark_priors
+
+
+class FakeRegistry:
+    def __init__(self, models):
+        self.models = models
+
+    def list_names(self):
+        return list(self.models)
+
+    def get_metadata(self, name):
+        return {"parameter_count": self.models[name]}
+
+
+PRIORS = {
+    ("phi3.5:latest", "review-cv"): {"success": True, "seconds": 58.8, "quality": 5},
+    ("gemma3:1b", "review-cv"): {"success": True, "seconds": 19.7, "quality": 5},
+    ("gemma3:270m", "review-cv"): {"success": False, "seconds": 3.6, "quality": 1},
+    ("qwen3:4b", "review-cv"): {"success": False, "seconds": 120, "quality": 0},
+    ("phi3.5:latest", "improve-bullets"): {"success": True, "seconds": 13.1, "quality": 5},
+    ("gemma3:1b", "improve-bullets"): {"success": True, "seconds": 6.5, "quality": 5},
+}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(model_router_service, "registry", FakeRegistry({
+        "phi3.5:latest": 3.8e9, "gemma3:1b": 1e9, "gemma3:270m": 2.7e8, "qwen3:4b": 4e9,
+    }))
+    monkeypatch.setattr(model_router_service, "telemetry", LLMTelemetry(path=""))
+    monkeypatch.setattr(model_router_service, "scheduler", LLMScheduler(max_concurrent=2))
+    return ModelRouter(priors=PRIORS, default_model="phi3.5:latest")
+
+
+def test_priors_are_loaded_from_repo_benchmark():
+    priors = load_benchmark_priors()
+    assert priors[("gemma3:1b", "review-cv")]["success"] is True
+    assert priors[("qwen3:4b", "review-cv")]["success"] is False
+
+
+def test_picks_largest_model_within_budget(router):
+    assert router.choose_model("review_cv", budget=60) == "phi3.5:latest"
+    assert router.choose_model("review_cv", budget=30) == "gemma3:1b"
+    # Ninguno cabe: el más rápido de los aptos (los que fallaron el benchmark no cuentan)
+    decision = router.route("review_cv", budget=5)
+    assert decision["model"] == "gemma3:1b"
+    assert decision["reason"] == "fastest_over_budget"
+    # Tareas desconocidas usan el modelo por defecto
+    assert router.choose_model("generate_text") == "phi3.5:latest"
+
+
+def test_live_telemetry_overrides_priors(router):
+    for _ in range(3):
+        model_router_service.telemetry.record("phi3.5:latest", "review_cv", {}, 25.0)
+    assert router.choose_model("review_cv", budget=30) == "phi3.5:latest"
+
+
+def test_deep_queue_falls_back_to_smaller_model(router, monkeypatch):
+    scheduler = LLMScheduler(max_concurrent=1, class_limits={
+        p: {"max_concurrent": 1, "max_queue": 10} for p in ("interactive", "review", "training")
+    })
+    monkeypatch.setattr(model_router_service, "scheduler", scheduler)
+    assert router.choose_model("review_cv", budget=60) == "phi3.5:latest"
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        with scheduler.slot(REVIEW, "a"):
+            started.set()
+            release.wait(2)
+
+    def queued():
+        with scheduler.slot(REVIEW, "b"):
+            pass
+
+    threads = [threading.Thread(target=hold)]
+    threads[0].start()
+    started.wait(1)
+    threads += [threading.Thread(target=queued) for _ in range(2)]
+    for t in threads[1:]:
+        t.start()
+    while scheduler.queue_depth(REVIEW) < 2:
+        pass
+
+    decision = router.route("review_cv", budget=60)
+    assert decision["queue_wait_seconds"] == 20.0
+    assert decision["model"] == "gemma3:1b"
+
+    release.set()
+    for t in threads:
+        t.join()
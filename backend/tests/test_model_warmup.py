@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Tests para la precarga de modelos y la gestión de keep_alive"""
+from contextlib import contextmanager
+
+from app.services import model_warmup_service, ollama_service
+from app.services.circuit_breaker_service import CircuitBreaker
+from app.services.llm_scheduler_service import TRAINING
+from app.services.model_warmup_service import ModelWarmupManager, OLLAMA_HOT_REQUESTS
+
+
+class FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"done": True}
+
+
+def test_keep_alive_depends_on_pin_and_traffic():
+    manager = ModelWarmupManager(warmup_models=[], pinned_models=["phi3.5:latest"])
+
+    assert manager.keep_alive_for("phi3.5:latest") == -1
+    assert manager.keep_alive_for("qwen3:0.6b") == model_warmup_service.OLLAMA_KEEP_ALIVE_DEFAULT
+
+    for _ in range(OLLAMA_HOT_REQUESTS):
+        manager.record_request("qwen3:0.6b", 0.5)
+    assert manager.keep_alive_for("qwen3:0.6b") == model_warmup_service.OLLAMA_KEEP_ALIVE_HOT
+
+
+def test_pin_most_used_model():
+    manager = ModelWarmupManager(warmup_models=[], pinned_models=[], pin_most_used=True)
+    manager.record_request("gemma3:1b", 0.3)
+    manager.record_request("qwen3:1.7b", 0.3)
+    manager.record_request("qwen3:1.7b", 0.3)
+
+    assert manager.most_used_model() == "qwen3:1.7b"
+    assert manager.keep_alive_for("qwen3:1.7b") == -1
+    assert manager.keep_alive_for("gemma3:1b") != -1
+
+
+def test_cold_and_warm_latencies_are_reported_separately():
+    manager = ModelWarmupManager(warmup_models=[], pinned_models=[])
+    manager.record_request("phi3.5:latest", 12.0, load_duration_ns=9_000_000_000)
+    manager.record_request("phi3.5:latest", 2.0, load_duration_ns=20_000_000)
+    manager.record_request("phi3.5:latest", 4.0)
+
+    stats = manager.get_status()["models"]["phi3.5:latest"]
+    assert stats["cold"] == {"count": 1, "avg_seconds": 12.0, "max_seconds": 12.0}
+    assert stats["warm"]["count"] == 2
+    assert stats["warm"]["avg_seconds"] == 3.0
+
+
+def test_warmup_all_loads_only_installed_models(monkeypatch):
+    posts = []
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append(json)
+        return FakeResponse()
+
+    priorities = []
+    real_slot = ollama_service.scheduler.slot
+
+    @contextmanager
+    def recording_slot(priority, user_key=None):
+        priorities.append(priority)
+        with real_slot(priority, user_key):
+            yield
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+    monkeypatch.setattr(ollama_service.scheduler, "slot", recording_slot)
+    traffic = []
+    monkeypatch.setattr(ollama_service.warmup_manager, "record_request", lambda *args: traffic.append(args))
+    monkeypatch.setattr(model_warmup_service.registry, "list_names", lambda: ["phi3.5:latest", "qwen3:0.6b"])
+
+    manager = ModelWarmupManager(warmup_models=["phi3.5:latest", "no-instalado:1b"], pinned_models=["qwen3:0.6b"])
+    results = manager.warmup_all()
+
+    assert results == {"phi3.5:latest": True, "qwen3:0.6b": True}
+    assert {p["model"]: p["keep_alive"] for p in posts} == {
+        "phi3.5:latest": model_warmup_service.OLLAMA_KEEP_ALIVE_DEFAULT,
+        "qwen3:0.6b": -1,
+    }
+    assert all(p["prompt"] == "" for p in posts)
+    # Pasa por el planificador con la prioridad más baja y no cuenta como tráfico
+    assert priorities == [TRAINING, TRAINING]
+    assert traffic == []
+
+
+def test_warmup_skipped_while_circuit_is_open(monkeypatch):
+    posts = []
+    monkeypatch.setattr(ollama_service.requests, "post", lambda *a, **k: posts.append(k) or FakeResponse())
+    monkeypatch.setattr(model_warmup_service.registry, "list_names", lambda: ["phi3.5:latest"])
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure(RuntimeError("Ollama caído"))
+    monkeypatch.setattr(ollama_service, "breaker", breaker)
+
+    manager = ModelWarmupManager(warmup_models=["phi3.5:latest"], pinned_models=[])
+    assert manager.warmup_all() == {}
+    assert posts == []
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Tests para la paginación por cursor y los totales aproximados"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.database import CV, Comment, User, UserProfile
+from app.services.auth_service import AuthService
+from app.services.gamification_service import GamificationService
+from app.services.pagination_service import (
+    ApproximateCounter, InvalidCursor, approx_counts, decode_cursor, encode_cursor
+)
+
+client = TestClient(app)
+
+
+def _seed(db):
+    now = datetime.utcnow()
+    for u in range(30):
+        db.add(User(id=f"u{u:02d}", username=f"user{u}", email=f"u{u}@x.com", hashed_password="x"))
+        # Empates de puntos a propósito: el user_id desempata
+        db.add(UserProfile(user_id=f"u{u:02d}", total_points=10 * (u % 4) + 10))
+    for i in range(45):
+        db.add(CV(
+            id=f"cv{i:02d}", user_id=f"u{i % 3:02d}", name=f"CV {i}", slug=f"cv-{i}",
+            yaml_content="cv: {}", is_published=i % 9 != 0, total_likes=i % 5,
+            created_at=now - timedelta(minutes=i // 2)
+        ))
+    for c in range(12):
+        db.add(Comment(id=f"c{c:02d}", cv_id="cv01", user_id="u01", content="Hola",
+                       created_at=now - timedelta(minutes=c // 3)))
+
+
+@pytest.fixture
+def Session(memory_db):
+    return memory_db(_seed)
+
+
+def _walk(path, key, limit):
+    """Recorre todas las páginas y devuelve los elementos en orden"""
+    items, cursor, pages = [], None, 0
+    while True:
+        url = f"{path}{'&' if '?' in path else '?'}limit={limit}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        data = client.get(url).json()
+        items.extend(data[key])
+        pages += 1
+        cursor = data["next_cursor"]
+        if not cursor:
+            return items, pages
+
+
+@pytest.mark.parametrize("sort_by, field", [
+    ("popular", "total_likes"), ("visited", "total_visits"), ("created", "created_at"),
+])
+def test_browse_pages_cover_every_cv_once(Session, sort_by, field):
+    items, pages = _walk(f"/community/browse?sort_by={sort_by}", "cvs", 7)
+
+    ids = [cv["id"] for cv in items]
+    assert len(ids) == len(set(ids)) == 40  # 45 CVs, 5 sin publicar
+    assert pages == 6
+    keys = [(cv[field], cv["id"]) for cv in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_comments_and_leaderboard_pages(Session):
+    comments, _ = _walk("/community/cv01/comments", "comments", 5)
+    # Más recientes primero; a igual fecha, id descendente
+    expected = [f"c{3 * g + i:02d}" for g in range(4) for i in (2, 1, 0)]
+    assert [c["id"] for c in comments] == expected
+
+    users, pages = _walk("/gamification/leaderboard", "leaderboard", 8)
+    assert pages == 4
+    keys = [(u["total_points"], u["user_id"]) for u in users]
+    assert len(set(keys)) == 30
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_invalid_cursor_is_rejected(Session):
+    assert client.get("/community/browse?cursor=basura").status_code == 400
+    # Cursor válido pero de otro listado (aridad distinta)
+    assert client.get(f"/gamification/leaderboard?cursor={encode_cursor([1])}").status_code == 400
+
+
+def test_total_is_cached_count(Session):
+    assert client.get("/community/browse?limit=5").json()["total"] == 40
+
+    db = Session()
+    db.add(CV(id="nuevo", user_id="u00", name="Nuevo", slug="nuevo", yaml_content="cv: {}", is_published=True))
+    db.commit()
+    db.close()
+
+    data = client.get("/community/browse?limit=5").json()
+    assert data["total"] == 40  # aproximado: sigue en caché
+    assert data["cvs"][0]["id"] == "nuevo"  # la página sí es fresca
+
+
+def test_cursor_roundtrip_restores_types():
+    when = datetime(2025, 1, 2, 3, 4, 5, 123456)
+    values = decode_cursor(encode_cursor([when, "cv1"]), [CV.created_at, CV.id])
+    assert values == [when, "cv1"]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(["no-es-fecha", "cv1"]), [CV.created_at, CV.id])
+
+
+def test_approximate_counter_ttl():
+    counter = ApproximateCounter(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert counter.count("k", compute) == 1
+    assert counter.count("k", compute) == 1
+    counter.invalidate("k")
+    assert counter.count("k", compute) == 2
+    assert len(counter) == 1
+
+
+def test_counter_is_bounded_lru():
+    counter = ApproximateCounter(ttl=60, max_entries=2)
+    counter.count("a", lambda: 1)
+    counter.count("b", lambda: 2)
+    counter.count("a", lambda: 99)  # usada hace poco: no se descarta
+    counter.count("c", lambda: 3)
+    assert len(counter) == 2
+    assert counter.count("a", lambda: 99) == 1
+    assert counter.count("b", lambda: 20) == 20
+
+
+def test_writes_invalidate_totals_on_commit(Session):
+    headers = {"Authorization": f"Bearer {AuthService.create_access_token(data={'sub': 'u00'})}"}
+    assert client.get("/community/browse").json()["total"] == 40
+    assert client.get("/cv/my", headers=headers).json()["total"] == 15
+    assert client.get("/community/cv01/comments").json()["total"] == 12
+
+    assert client.post("/cv/cv00/publish", headers=headers).json()["is_published"]
+    assert client.get("/community/browse").json()["total"] == 41
+
+    assert client.delete("/cv/cv00", headers=headers).status_code == 200
+    assert client.get("/community/browse").json()["total"] == 40
+    assert client.get("/cv/my", headers=headers).json()["total"] == 14
+
+    with Session() as db:
+        GamificationService.add_comment(db, "cv01", "u02", "Respuesta", parent_id="c00")
+    assert client.get("/community/cv01/comments").json()["total"] == 12  # solo cuenta raíces
+    with Session() as db:
+        GamificationService.add_comment(db, "cv01", "u02", "Otro")
+    assert client.get("/community/cv01/comments").json()["total"] == 13
+
+
+def test_rollback_keeps_cached_total(Session):
+    assert client.get("/community/browse").json()["total"] == 40
+    with Session() as db:
+        approx_counts.invalidate_on_commit(db, "cvs:published")
+        db.add(CV(id="nuevo", user_id="u00", name="Nuevo", slug="nuevo", yaml_content="cv: {}", is_published=True))
+        db.flush()
+        db.rollback()
+        db.add(CV(id="otro", user_id="u00", name="Otro", slug="otro", yaml_content="cv: {}", is_published=True))
+        db.commit()
+    assert client.get("/community/browse").json()["total"] == 40
+
+
+def test_browse_still_accepts_deprecated_skip(Session):
+    first = client.get("/community/browse?limit=5&sort_by=popular").json()
+    second = client.get(f"/community/browse?limit=5&sort_by=popular&cursor={first['next_cursor']}").json()
+    skipped = client.get("/community/browse?limit=5&sort_by=popular&skip=5").json()
+    assert [cv["id"] for cv in skipped["cvs"]] == [cv["id"] for cv in second["cvs"]]
+    assert skipped["next_cursor"] == second["next_cursor"]
+    # Con cursor, skip se ignora
+    both = client.get(f"/community/browse?limit=5&sort_by=popular&skip=5&cursor={first['next_cursor']}").json()
+    assert both["cvs"] == second["cvs"]
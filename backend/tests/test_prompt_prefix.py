@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Tests para el prefijo estático de los prompts (caché KV de Ollama)"""
+import pytest
+
+from app.services import ollama_service
+from app.services.llm_telemetry_service import LLMTelemetry
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    posts = []
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append(json)
+        count = json["messages"][-1]["content"].count("\n- ")
+        content = '{"bullets": [%s]}' % ", ".join('"Mejorado"' for _ in range(max(count, 1)))
+        return FakeResponse({
+            "message": {"content": content},
+            "prompt_eval_count": 40,
+            "prompt_eval_duration": 2_000_000_000,
+            "total_duration": 4_000_000_000,
+        })
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+    monkeypatch.setattr(ollama_service, "telemetry", LLMTelemetry(path=""))
+    return posts
+
+
+def test_system_prefix_is_identical_across_calls(posts):
+    """La instrucción y los textos del usuario nunca alteran el mensaje de sistema"""
+    ollama_service.improve_bullets("gemma3:1b", ["Trabajé en equipo"])
+    ollama_service.improve_bullets("gemma3:1b", ["Desarrollé apps", "Lideré"], instruction="Hazlo breve")
+    ollama_service.review_cv("gemma3:1b", {"name": "Ana"})
+    ollama_service.review_cv("gemma3:1b", {"name": "Luis"})
+
+    assert len(posts) == 4
+    bullets_systems = [p["messages"][0] for p in posts[:2]]
+    review_systems = [p["messages"][0] for p in posts[2:]]
+    assert bullets_systems == [{"role": "system", "content": ollama_service.BULLETS_SYSTEM_PROMPT}] * 2
+    assert review_systems == [{"role": "system", "content": ollama_service.REVIEW_SYSTEM_PROMPT}] * 2
+    assert "Hazlo breve" in posts[1]["messages"][1]["content"]
+    assert "Ana" in posts[2]["messages"][1]["content"]
+
+
+def test_telemetry_is_tagged_with_prompt_version(posts):
+    """El tiempo de prompt_eval se agrega por versión de prompt para comparar"""
+    ollama_service.review_cv("gemma3:1b", {"name": "Ana"})
+
+    summary = ollama_service.telemetry.get_summary()
+    assert [(s["task"], s["prompt_version"]) for s in summary] == [
+        ("review_cv", ollama_service.PROMPT_VERSION)
+    ]
+    assert summary[0]["avg_prompt_eval_seconds"] == 2.0
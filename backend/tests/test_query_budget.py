@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Presupuesto de consultas SQL por endpoint (sin N+1)"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.models.database import CV, Comment, GameSession, User, UserProfile
+
+client = TestClient(app)
+
+
+def _seed(db):
+    now = datetime.utcnow()
+    for u in range(5):
+        db.add(User(id=f"u{u}", username=f"user{u}", email=f"u{u}@x.com", hashed_password="x"))
+        db.add(UserProfile(user_id=f"u{u}", total_points=100 * (u + 1)))
+        db.add(GameSession(user_id=f"u{u}", game_id="pong", score=10 * u, won=True))
+    for i in range(20):
+        db.add(CV(
+            id=f"cv{i}", user_id=f"u{i % 5}", name=f"CV {i}", slug=f"cv-{i}",
+            yaml_content="cv: {}", is_published=True, total_likes=i,
+            created_at=now - timedelta(minutes=i)
+        ))
+    for c in range(10):
+        db.add(Comment(id=f"c{c}", cv_id="cv0", user_id=f"u{c % 5}", content="Buen CV",
+                       created_at=now - timedelta(minutes=c)))
+        for r in range(c % 3):
+            db.add(Comment(id=f"c{c}-r{r}", cv_id="cv0", user_id=f"u{r}", content="Gracias",
+                           parent_id=f"c{c}"))
+
+
+@pytest.fixture
+def engine(memory_db):
+    return memory_db(_seed).kw["bind"]
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+# Los listados paginados hacen la página + el COUNT del total (cacheado después)
+@pytest.mark.parametrize("path, budget", [
+    ("/community/browse?limit=20", 2),
+    ("/community/browse?limit=20&sort_by=popular", 2),
+    ("/community/public/cv-3", 1),
+    ("/community/cv0/comments", 2),
+    ("/gamification/leaderboard", 2),
+    ("/games/leaderboard/pong", 1),
+])
+def test_endpoint_query_budget(engine, path, budget):
+    with count_queries(engine) as statements:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert len(statements) <= budget, "\n\n".join(statements)
+
+
+def test_browse_includes_authors(engine):
+    cvs = client.get("/community/browse?limit=20").json()["cvs"]
+    assert len(cvs) == 20
+    assert cvs[0]["id"] == "cv0"
+    assert cvs[0]["author"]["username"] == "user0"
+    assert cvs[4]["author"]["username"] == "user4"
+
+
+def test_comments_count_replies(engine):
+    comments = client.get("/community/cv0/comments").json()["comments"]
+    assert len(comments) == 10  # solo comentarios raíz
+    counts = {c["id"]: c["replies_count"] for c in comments}
+    assert counts == {f"c{c}": c % 3 for c in range(10)}
+    assert comments[0]["author"]["username"] == "user0"
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Tests para la caché de respuestas de los leaderboards"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.models.database import User, UserProfile
+from app.services.gamification_service import GamificationService
+from app.services.response_cache_service import MemoryBackend, NullBackend, ResponseCache, response_cache
+
+client = TestClient(app)
+
+
+def _seed(db):
+    for u in range(5):
+        db.add(User(id=f"u{u}", username=f"user{u}", email=f"u{u}@x.com", hashed_password="x"))
+        db.add(UserProfile(user_id=f"u{u}", total_points=10 * (u + 1)))
+
+
+@pytest.fixture
+def Session(memory_db):
+    return memory_db(_seed)
+
+
+@pytest.fixture
+def queries(Session):
+    seen = []
+    event.listen(Session.kw["bind"], "before_cursor_execute", lambda *args: seen.append(args[2]))
+    return seen
+
+
+
+def test_hit_serves_bytes_without_queries(queries):
+    first = client.get("/gamification/leaderboard?limit=3")
+    assert first.headers["X-Cache"] == "MISS"
+    queries.clear()
+
+    second = client.get("/gamification/leaderboard?limit=3")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert queries == []
+    assert [u["user_id"] for u in second.json()["leaderboard"]] == ["u4", "u3", "u2"]
+
+    stats = response_cache.get_stats()["namespaces"]["leaderboard"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_points_invalidate_on_commit_only(Session):
+    client.get("/gamification/leaderboard")
+
+    with Session() as db:
+        GamificationService.award_many(db, "u0", [{"action": "cv_published"}], commit=False)
+        db.rollback()
+    assert client.get("/gamification/leaderboard").headers["X-Cache"] == "HIT"
+
+    with Session() as db:
+        GamificationService.add_points(db, "u0", "cv_published")
+    response = client.get("/gamification/leaderboard")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["leaderboard"][0]["user_id"] == "u0"
+
+
+def test_game_session_invalidates_only_its_game(Session):
+    client.get("/games/leaderboard/pong")
+    client.get("/games/leaderboard/snake")
+
+    with Session() as db:
+        GamificationService.record_game_session(db, "u1", "pong", score=3, won=True, game_data={"opponent_score": 1})
+
+    pong = client.get("/games/leaderboard/pong")
+    assert pong.headers["X-Cache"] == "MISS"
+    assert [row["user_id"] for row in pong.json()["leaderboard"]] == ["u1"]
+    assert client.get("/games/leaderboard/snake").headers["X-Cache"] == "HIT"
+
+
+def test_render_during_invalidation_is_not_stored():
+    cache = ResponseCache(backend=MemoryBackend())
+
+    def render():
+        cache.invalidate("ns")  # llega un commit mientras se calcula
+        return {"v": 1}
+
+    body, hit = cache.get_or_render("ns", "k", render)
+    assert (json.loads(body), hit) == ({"v": 1}, False)
+    assert cache.get_or_render("ns", "k", lambda: {"v": 2})[0] == b'{"v":2}'
+    assert cache.get_or_render("ns", "k", lambda: {"v": 3})[0] == b'{"v":2}'
+
+
+def test_backends():
+    memory = MemoryBackend(max_entries=2)
+    memory.set("a:1", b"1", ttl=60)
+    memory.set("a:2", b"2", ttl=60)
+    memory.set("b:1", b"3", ttl=60)
+    assert memory.get("a:1") is None  # LRU
+    assert memory.delete_prefix("a:") == 1
+    memory.set("c:1", b"4", ttl=0)
+    assert memory.get("c:1") is None  # vencida
+
+    cache = ResponseCache(backend=NullBackend())
+    assert cache.get_or_render("ns", "k", lambda: [1])[1] is False
+    assert cache.get_or_render("ns", "k", lambda: [1])[1] is False
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""Tests para las revisiones de CV en segundo plano"""
+import threading
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import routes_ollama
+from app.services import ollama_service
+from app.services.circuit_breaker_service import CircuitOpenError
+from app.services.review_job_service import ReviewJobManager, DONE, ERROR
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    manager = ReviewJobManager(ttl=60, max_workers=2)
+    monkeypatch.setattr(routes_ollama, "review_jobs", manager)
+    return manager
+
+
+def test_job_returns_immediately_and_result_is_retrievable(monkeypatch, jobs):
+    release = threading.Event()
+    calls = []
+
+    def fake_review(model=None, cv_data=None, user_key=None, raise_errors=False):
+        calls.append(cv_data)
+        release.wait(2)
+        return "### 🌟 Fortalezas"
+
+    monkeypatch.setattr(ollama_service, "review_cv", fake_review)
+    cv = {"name": "Ana", "skills": ["Python"]}
+
+    start = time.time()
+    first = client.post("/ollama/review-cv/jobs", json={"cv_data": cv, "model": "gemma3:1b"})
+    assert first.status_code == 202
+    assert time.time() - start < 1
+    assert first.json()["status"] in ("queued", "running")
+
+    # Reabrir el modal con el mismo CV devuelve el mismo trabajo
+    second = client.post("/ollama/review-cv/jobs", json={"cv_data": dict(reversed(list(cv.items()))), "model": "gemma3:1b"})
+    assert second.json()["job_id"] == first.json()["job_id"]
+
+    release.set()
+    job = client.get(f"/ollama/review-cv/jobs/{first.json()['job_id']}?wait=5").json()
+    assert job["status"] == DONE
+    assert job["review"] == "### 🌟 Fortalezas"
+    assert len(calls) == 1
+    assert jobs.get_stats()["deduplicated"] == 1
+
+
+def test_sse_stream_ends_with_result(monkeypatch, jobs):
+    monkeypatch.setattr(ollama_service, "review_cv", lambda **kwargs: "ok")
+    job_id = client.post("/ollama/review-cv/jobs", json={"cv_data": {"name": "Luis"}}).json()["job_id"]
+
+    body = client.get(f"/ollama/review-cv/jobs/{job_id}/events").text
+    assert '"status": "done"' in body
+    assert client.get("/ollama/review-cv/jobs/desconocido").status_code == 404
+
+
+def test_failed_jobs_are_retried_and_results_expire(monkeypatch):
+    manager = ReviewJobManager(ttl=0.05, max_workers=1)
+
+    def unavailable(**kwargs):
+        raise CircuitOpenError(12)
+
+    monkeypatch.setattr(ollama_service, "review_cv", unavailable)
+    failed = manager.submit(None, {"name": "Ana"})
+    failed.done.wait(2)
+    assert failed.status == ERROR
+    assert failed.retry_after == 12
+
+    monkeypatch.setattr(ollama_service, "review_cv", lambda **kwargs: "ok")
+    retried = manager.submit(None, {"name": "Ana"})
+    assert retried.id != failed.id
+    retried.done.wait(2)
+    assert retried.status == DONE
+
+    time.sleep(0.1)
+    assert manager.get(retried.id) is None
+
+
+def test_ollama_timeout_fails_the_job_and_allows_retry(monkeypatch):
+    manager = ReviewJobManager(ttl=60, max_workers=1)
+
+    def timeout(*args, **kwargs):
+        raise requests.exceptions.ReadTimeout("read timed out")
+
+    monkeypatch.setattr(ollama_service, "_post", timeout)
+    failed = manager.submit("gemma3:1b", {"name": "Ana"})
+    failed.done.wait(2)
+    assert failed.status == ERROR
+    assert failed.review is None
+    assert "Timeout" in failed.error
+
+    retried = manager.submit("gemma3:1b", {"name": "Ana"})
+    assert retried.id != failed.id
+    retried.done.wait(2)
+    assert manager.get_stats()["deduplicated"] == 0
+
+
+def test_pending_jobs_are_capped_and_stale_ones_expire(monkeypatch):
+    manager = ReviewJobManager(ttl=60, max_workers=1, max_pending=2, queue_timeout=0.2)
+    monkeypatch.setattr(routes_ollama, "review_jobs", manager)
+    release = threading.Event()
+    calls = []
+
+    def slow_review(**kwargs):
+        calls.append(kwargs["cv_data"])
+        release.wait(2)
+        return "ok"
+
+    monkeypatch.setattr(ollama_service, "review_cv", slow_review)
+    running = manager.submit(None, {"name": "Ana"})
+    queued = manager.submit(None, {"name": "Luis"})
+
+    # Con la cola llena se responde 503 + Retry-After, como la ruta síncrona
+    full = client.post("/ollama/review-cv/jobs", json={"cv_data": {"name": "Eva"}})
+    assert full.status_code == 503
+    assert int(full.headers["Retry-After"]) >= 1
+
+    time.sleep(0.3)
+    assert manager.get(queued.id).status == ERROR
+    release.set()
+    running.done.wait(2)
+    deadline = time.time() + 2
+    while manager.get_stats()["backlog"] and time.time() < deadline:
+        time.sleep(0.01)
+
+    stats = manager.get_stats()
+    assert (stats["rejected"], stats["expired"], stats["backlog"]) == (1, 1, 0)
+    assert calls == [{"name": "Ana"}]  # el trabajo expirado nunca llegó a Ollama
+    assert manager.submit(None, {"name": "Eva"}).status in ("queued", "running")
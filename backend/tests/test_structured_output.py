@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Tests para la salida JSON restringida por schema de improve_bullets"""
+import pytest
+
+from app.services import ollama_service
+from app.services.llm_telemetry_service import LLMTelemetry
+from app.services.ollama_service import validate_bullets, bullets_schema
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self._content = content
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"message": {"content": self._content}}
+
+
+@pytest.fixture
+def telemetry(monkeypatch):
+    telemetry = LLMTelemetry(path="")
+    monkeypatch.setattr(ollama_service, "telemetry", telemetry)
+    return telemetry
+
+
+def _fake_ollama(monkeypatch, contents):
+    posts = []
+    replies = iter(contents)
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append(json)
+        return FakeResponse(next(replies))
+
+    monkeypatch.setattr(ollama_service.requests, "post", fake_post)
+    return posts
+
+
+def test_validate_bullets_is_strict():
+    assert validate_bullets('{"bullets": [" Lideré "]}', 1) == ["Lideré"]
+    for content in ('no json', '{"items": []}', '{"bullets": ["a", "b"]}', '{"bullets": [""]}', '[1]'):
+        with pytest.raises(ValueError):
+            validate_bullets(content, 1)
+
+
+def test_schema_is_sent_as_format(monkeypatch, telemetry):
+    posts = _fake_ollama(monkeypatch, ['{"bullets": ["Optimicé procesos [X]%", "Lideré 3 proyectos"]}'])
+
+    result = ollama_service.improve_bullets("gemma3:1b", ["Optimicé procesos", "Lideré proyectos"])
+
+    assert result == ["Optimicé procesos [X]%", "Lideré 3 proyectos"]
+    assert posts[0]["format"] == bullets_schema(2)
+    assert posts[0]["format"]["properties"]["bullets"]["minItems"] == 2
+    assert telemetry.get_stats("gemma3:1b")["parse_ok"] == 1
+
+
+def test_single_repair_attempt(monkeypatch, telemetry):
+    posts = _fake_ollama(monkeypatch, ['Aquí tienes: - Lideré', '{"bullets": ["Lideré un equipo de 5"]}'])
+
+    assert ollama_service.improve_bullets("qwen3:0.6b", ["Lideré"]) == ["Lideré un equipo de 5"]
+    assert len(posts) == 2
+    assert posts[1]["messages"][2] == {"role": "assistant", "content": "Aquí tienes: - Lideré"}
+    assert telemetry.get_stats("qwen3:0.6b")["parse_repaired"] == 1
+
+
+def test_failed_repair_returns_original_and_is_tracked(monkeypatch, telemetry):
+    posts = _fake_ollama(monkeypatch, ['{"bullets": []}', 'sigo sin JSON'])
+
+    assert ollama_service.improve_bullets("qwen3:0.6b", ["Trabajé en equipo"]) == ["Trabajé en equipo"]
+    assert len(posts) == 2
+    stats = telemetry.get_stats("qwen3:0.6b", "improve_bullets")
+    assert stats["parse_failed"] == 1
+    assert stats["parse_failure_rate"] == 1.0
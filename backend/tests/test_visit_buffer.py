@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Tests para el buffer write-behind de visitas"""
+import time
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+
+from app.api import routes_cv_community
+from app.main import app
+from app.models.database import CV, PointHistory, User, UserProfile, Visit
+from app.services.visit_buffer_service import VisitBuffer
+
+client = TestClient(app)
+
+
+def _seed(db):
+    for u in ("ana", "beto"):
+        db.add(User(id=u, username=u, email=f"{u}@x.com", hashed_password="x"))
+    db.add(UserProfile(user_id="ana"))  # beto no tiene perfil todavía
+    for cv_id, owner in (("cv-a1", "ana"), ("cv-a2", "ana"), ("cv-b1", "beto")):
+        db.add(CV(id=cv_id, user_id=owner, name=cv_id, slug=cv_id, yaml_content="cv: {}", is_published=True))
+
+
+@pytest.fixture
+def Session(memory_db):
+    return memory_db(_seed)
+
+
+@pytest.fixture
+def engine(Session):
+    return Session.kw["bind"]
+
+
+def test_flush_aggregates_counters_per_cv_and_owner(Session):
+    buffer = VisitBuffer(Session)
+    for i in range(6):
+        assert buffer.record("cv-a1", f"10.0.0.{i}")
+    for i in range(3):
+        buffer.record("cv-a2", f"10.0.1.{i}")
+    buffer.record("cv-b1", "10.0.2.1")
+
+    assert buffer.flush() == 10
+    assert buffer.pending() == 0
+
+    with Session() as db:
+        assert db.get(CV, "cv-a1").total_visits == 6
+        assert db.get(CV, "cv-a2").total_visits == 3
+        ana, beto = db.get(UserProfile, "ana"), db.get(UserProfile, "beto")
+        assert ana.total_visits_received == 9
+        assert ana.total_points == ana.experience == 45
+        assert beto.total_visits_received == 1 and beto.total_points == 5
+        assert db.scalar(select(func.count(Visit.id))) == 10
+        # Una fila de historial por CV y lote, con los puntos agregados
+        history = db.scalars(select(PointHistory).order_by(PointHistory.related_cv_id)).all()
+        assert [(h.related_cv_id, h.points) for h in history] == [("cv-a1", 30), ("cv-a2", 15), ("cv-b1", 5)]
+
+
+def test_flush_uses_constant_number_of_statements(engine, Session):
+    buffer = VisitBuffer(Session)
+    for i in range(200):
+        buffer.record(("cv-a1", "cv-a2", "cv-b1")[i % 3], f"10.1.{i // 250}.{i % 250}")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert buffer.flush() == 200
+    assert len(statements) <= 12, "\n".join(statements)
+
+
+def test_duplicates_are_dropped_in_memory_and_against_db(Session):
+    with Session() as db:
+        db.add(Visit(cv_id="cv-a1", visitor_ip="1.1.1.1", created_at=datetime.utcnow()))
+        db.commit()
+
+    buffer = VisitBuffer(Session)
+    assert buffer.record("cv-a1", "2.2.2.2")
+    assert not buffer.record("cv-a1", "2.2.2.2")  # misma IP y CV en la ventana
+    assert buffer.record("cv-a2", "2.2.2.2")
+    assert buffer.record("cv-a1", "1.1.1.1")  # ya guardada en BD: se descarta al volcar
+    assert buffer.record("cv-inexistente", "3.3.3.3")
+
+    assert buffer.flush() == 2
+    stats = buffer.get_stats()
+    assert stats["duplicates"] == 3 and stats["flushed"] == 2
+    with Session() as db:
+        assert db.get(CV, "cv-a1").total_visits == 1
+
+
+def test_full_buffer_flushes_inline(Session):
+    buffer = VisitBuffer(Session, max_pending=5)
+    for i in range(12):
+        buffer.record("cv-a1", f"10.2.0.{i}")
+
+    assert buffer.pending() == 2
+    assert buffer.get_stats()["forced_flushes"] == 2
+    with Session() as db:
+        assert db.get(CV, "cv-a1").total_visits == 10
+
+
+def test_background_flush_and_clean_shutdown(Session):
+    buffer = VisitBuffer(Session, flush_interval_ms=20)
+    buffer.start()
+    buffer.record("cv-a1", "10.3.0.1")
+    deadline = time.time() + 2
+    while not buffer.get_stats()["flushed"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert buffer.get_stats()["flushed"] == 1
+
+    buffer._stop.set()  # sin más ciclos periódicos: lo pendiente lo vuelca stop()
+    buffer._thread.join()
+    buffer.record("cv-a1", "10.3.0.2")
+    buffer.stop()
+    with Session() as db:
+        assert db.get(CV, "cv-a1").total_visits == 2
+
+
+def test_failed_flush_keeps_visits(Session):
+    calls = []
+
+    def broken_session():
+        calls.append(1)
+        if len(calls) == 1:
+            raise_on = Session()
+            raise_on.execute = lambda *a, **k: (_ for _ in ()).throw(RuntimeError("BD caída"))
+            return raise_on
+        return Session()
+
+    buffer = VisitBuffer(broken_session)
+    buffer.record("cv-a1", "10.4.0.1")
+    assert buffer.flush() == 0
+    assert buffer.pending() == 1
+    assert buffer.flush() == 1
+
+
+def test_failed_flush_counts_what_does_not_fit(Session):
+    def broken_session():
+        session = Session()
+        session.execute = lambda *a, **k: (_ for _ in ()).throw(RuntimeError("BD caída"))
+        return session
+
+    buffer = VisitBuffer(broken_session)
+    for i in range(3):
+        buffer.record("cv-a1", f"10.5.0.{i}")
+    buffer.max_pending = 1
+    assert buffer.flush() == 0
+
+    stats = buffer.get_stats()
+    assert (stats["pending"], stats["dropped"], stats["failed_batches"]) == (1, 2, 1)
+    # Las visitas descartadas no bloquean la siguiente de la misma IP
+    assert buffer.record("cv-a1", "10.5.0.2")
+    assert not buffer.record("cv-a1", "10.5.0.0")
+
+
+def test_visit_endpoint_enqueues(Session, monkeypatch):
+    buffer = VisitBuffer(Session)
+    monkeypatch.setattr(routes_cv_community, "visit_buffer", buffer)
+
+    assert client.post("/community/public/cv-a1/visit?visitor_ip=9.9.9.9").status_code == 200
+    assert client.post("/community/cv-a1/visit?visitor_ip=9.9.9.9").status_code == 200
+    assert client.post("/community/public/nada/visit").status_code == 404
+
+    assert buffer.pending() == 1
+    buffer.flush()
+    with Session() as db:
+        assert db.get(CV, "cv-a1").total_visits == 1
@@ -165,6 +165,7 @@ function EditorContent() {
     });
     
     const data = await res.json();
+    if (!res.ok) throw new Error(data.detail || 'El servicio de IA no está disponible');
     return data.improved || [];
   };
 
@@ -223,13 +224,24 @@ function EditorContent() {
     setReviewContent('');
     setShowReviewModal(true);
     try {
-      const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/ollama/review-cv`, {
+      // La revisión corre en segundo plano: si el modal se cierra y se reabre
+      // con el mismo CV, el backend devuelve el mismo trabajo en curso.
+      const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/ollama/review-cv/jobs`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ cv_data: formData, model: selectedModel })
       });
-      const data = await res.json();
-      setReviewContent(data.review);
+      let job = await res.json();
+      while (res.ok && job.status !== 'done' && job.status !== 'error') {
+        const poll = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/ollama/review-cv/jobs/${job.job_id}?wait=25`);
+        job = await poll.json();
+        if (!poll.ok) throw new Error(job.detail || 'La revisión expiró');
+      }
+      if (!res.ok || job.status === 'error') {
+        setReviewContent(`⚠️ ${job.detail || job.error || 'El servicio de IA no está disponible'}`);
+      } else {
+        setReviewContent(job.review);
+      }
     } catch (e: any) {
       setReviewContent('Error al realizar la revisión: ' + e.message);
     } finally {